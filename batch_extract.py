@@ -0,0 +1,180 @@
+"""Offline re-extraction of resume fields for every user.
+
+    python batch_extract.py [--processes 4] [--batch-size 64] [--mode senter]
+                            [--checkpoint batch_extract.checkpoint] [--limit N]
+                            [--local-storage DIR] [--dry-run]
+
+Enumerates parsed_output/*/output-1-to-1.json, streams the OCR texts through
+nlp.pipe (with `--processes` worker processes), builds the same fields as
+extract_resume_fields and writes them to the `resume` collection with a
+Firestore BulkWriter. Every uid whose write has been flushed successfully is
+appended to the checkpoint file, so an interrupted run resumes where it stopped;
+delete the checkpoint (or pass --restart) to reprocess everyone. Writes that
+still fail after MAX_WRITE_ATTEMPTS are left out of the checkpoint and retried
+by the next run. --dry-run neither reads nor writes the checkpoint.
+
+Local runs:
+  --local-storage DIR   read objects from DIR/<bucket>/parsed_output/... instead of GCS
+  FIRESTORE_EMULATOR_HOST=localhost:8080 GCLOUD_PROJECT=demo-elevatex
+                        write to the Firestore emulator instead of production
+"""
+import argparse
+import json
+import logging
+import os
+import re
+import time
+
+import main
+from main import extraction_modes
+
+logger = logging.getLogger('resume-parsing')
+
+OUTPUT_RE = re.compile(r"^parsed_output/([^/]+)/output-1-to-1\.json$")
+# Same limit as the BulkWriter's default error handler, which a custom one replaces.
+MAX_WRITE_ATTEMPTS = 15
+
+
+def use_local_backends(storage_root):
+    if storage_root:
+        from local_backends import LocalStorageClient
+        client = LocalStorageClient(storage_root)
+        main.storage_client = client
+        main.buckets[main.BUCKET_NAME] = client.bucket(main.BUCKET_NAME)
+    if os.environ.get("FIRESTORE_EMULATOR_HOST"):
+        # The emulator accepts any credentials; skip Application Default Credentials.
+        from google.auth.credentials import AnonymousCredentials
+        from google.cloud import firestore
+        main.db = firestore.Client(project=os.environ.get("GCLOUD_PROJECT", "demo-elevatex"),
+                                   credentials=AnonymousCredentials())
+        main.service_state["firestore"] = main.READY
+
+
+def load_checkpoint(path):
+    if not path or not os.path.exists(path):
+        return set()
+    with open(path) as f:
+        return {line.strip() for line in f if line.strip()}
+
+
+def list_uids(bucket, done):
+    for blob in bucket.list_blobs(prefix="parsed_output/"):
+        match = OUTPUT_RE.match(blob.name)
+        if match and match.group(1) not in done:
+            yield match.group(1), blob
+
+
+def stream_chunks(items, stats):
+    # Yields (chunk, (uid, chunk_count)) pairs for nlp.pipe(as_tuples=True).
+    for uid, blob in items:
+        try:
+            full_text = main.read_vision_text(blob)
+        except Exception as e:
+            logger.error(f"Skipping {uid}: could not read {blob.name}: {e}")
+            stats["failed"] += 1
+            continue
+        chunks = extraction_modes.chunk_text(full_text)
+        for chunk in chunks:
+            yield chunk, (uid, len(chunks))
+
+
+def group_docs(piped):
+    # nlp.pipe preserves input order, so a document's chunks arrive consecutively,
+    # and chunk_text is lossless, so the chunks join back into the full text.
+    pending = []
+    for doc, (uid, chunk_count) in piped:
+        pending.append(doc)
+        if len(pending) == chunk_count:
+            yield uid, "".join(d.text for d in pending), pending
+            pending = []
+
+
+def run(args):
+    use_local_backends(args.local_storage)
+    main.init_services(load_spacy=True)
+    mode = extraction_modes.resolve_mode(main.nlp, args.mode)
+    disabled = extraction_modes.disabled_components(main.nlp, mode)
+
+    # A dry run writes nothing, so it must not mark anyone as done either.
+    checkpoint_path = None if args.dry_run else args.checkpoint
+    if args.restart and checkpoint_path and os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+    done = load_checkpoint(checkpoint_path)
+    stats = {"processed": 0, "failed": 0, "write_failed": 0, "skipped_checkpoint": len(done)}
+
+    items = list_uids(main.get_bucket(), done)
+    if args.limit:
+        items = (item for i, item in enumerate(items) if i < args.limit)
+    piped = main.nlp.pipe(stream_chunks(items, stats), as_tuples=True, disable=disabled,
+                          batch_size=args.batch_size, n_process=args.processes)
+
+    writer = None if args.dry_run else main.db.bulk_writer()
+    failed_writes = set()
+    if writer is not None:
+        def on_write_error(error, bulk_writer):
+            if error.attempts < MAX_WRITE_ATTEMPTS:
+                return True  # retry
+            logger.error(f"Write for {error.operation.reference.id} failed: {error.message}")
+            failed_writes.add(error.operation.reference.id)
+            return False
+
+        writer.on_write_error(on_write_error)
+    checkpoint = open(checkpoint_path, "a") if checkpoint_path else None
+    unflushed = []
+    start = time.perf_counter()
+    try:
+        for uid, full_text, docs in group_docs(piped):
+            entities = main.entities_from_docs(full_text, docs, mode)
+            if writer is not None:
+                # A single set() replaces the document, as the callable does.
+                writer.set(main.db.collection("resume").document(uid), entities)
+            unflushed.append(uid)
+            stats["processed"] += 1
+            if len(unflushed) >= args.flush_every:
+                flush(writer, checkpoint, unflushed, failed_writes, stats)
+        flush(writer, checkpoint, unflushed, failed_writes, stats)
+    finally:
+        if writer is not None:
+            writer.close()
+        if checkpoint is not None:
+            checkpoint.close()
+
+    elapsed = time.perf_counter() - start
+    stats.update({
+        "mode": mode,
+        "processes": args.processes,
+        "elapsed_s": round(elapsed, 2),
+        "docs_per_sec": round(stats["processed"] / elapsed, 2) if elapsed else None,
+    })
+    return stats
+
+
+def flush(writer, checkpoint, unflushed, failed_writes, stats):
+    if writer is not None:
+        writer.flush()  # every error callback has run once this returns
+    written = [uid for uid in unflushed if uid not in failed_writes]
+    stats["write_failed"] += len(unflushed) - len(written)
+    failed_writes.difference_update(unflushed)
+    if checkpoint is not None:
+        checkpoint.writelines(uid + "\n" for uid in written)
+        checkpoint.flush()
+    unflushed.clear()
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--processes", type=int, default=1, help="nlp.pipe worker processes")
+    parser.add_argument("--batch-size", type=int, default=64, help="nlp.pipe batch size")
+    parser.add_argument("--flush-every", type=int, default=200, help="documents per BulkWriter flush/checkpoint")
+    parser.add_argument("--mode", default=None, help="extraction mode (see extraction_modes.py)")
+    parser.add_argument("--checkpoint", default="batch_extract.checkpoint")
+    parser.add_argument("--restart", action="store_true", help="ignore and truncate the checkpoint")
+    parser.add_argument("--limit", type=int, default=None)
+    parser.add_argument("--local-storage", default=None, help="directory standing in for Cloud Storage")
+    parser.add_argument("--dry-run", action="store_true", help="extract but do not write to Firestore or the checkpoint")
+    args = parser.parse_args()
+    print(json.dumps(run(args), indent=2))
+
+
+if __name__ == "__main__":
+    main_cli()
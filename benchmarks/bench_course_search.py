@@ -0,0 +1,155 @@
+"""Latency and token usage: one monolithic course-search prompt vs per-skill cached lookups.
+
+    python -m benchmarks.bench_course_search [--users 40] [--skills-per-user 12] [--ms-per-token 2]
+
+Each simulated user asks for courses for `--skills-per-user` skills spread over
+the four categories, drawn (Zipf-like) from a shared pool, so later users hit
+skills earlier users already warmed. A fake OpenAI client stands in for gpt-4o:
+it answers in the requested JSON shape, counts tokens as characters / 4, takes
+`--base-ms` + `--ms-per-token` per output token, and truncates at max_tokens
+like the real API (finish_reason "length").
+
+    monolithic  the previous search_courses prompt (all skills, max_tokens=2000)
+    per_skill   main.find_courses (per-skill prompts, shared cache, concurrent misses)
+"""
+import argparse
+import json
+import random
+import re
+import time
+from types import SimpleNamespace
+
+import main
+from benchmarks.stats import summarize_ms
+from local_backends import LocalFirestore
+
+_SKILL_POOL = ["Kubernetes", "Docker", "Python", "SQL", "AWS", "React", "System Design", "Communication",
+               "Leadership", "Machine Learning", "Terraform", "Kafka", "Go", "Java", "Spark", "Negotiation",
+               "Public Speaking", "GraphQL", "TypeScript", "Linux", "CI/CD", "Data Structures", "Pandas",
+               "TensorFlow", "Time Management", "Agile", "MongoDB", "Redis", "Microservices", "Security"]
+
+
+class FakeChatCompletions:
+    def __init__(self, base_ms, ms_per_token):
+        self.base_ms = base_ms
+        self.ms_per_token = ms_per_token
+
+    def create(self, model, messages, max_tokens, temperature):
+        prompt = "".join(message["content"] for message in messages)
+        single = re.search(r"improve the skill: (.+)", prompt)
+        if single:
+            content = json.dumps({"courses": self._courses(single.group(1).strip())})
+        else:
+            result = {}
+            for category in main.COURSE_CATEGORIES:
+                listed = re.search(rf"- {category}: (.+)", prompt).group(1).strip()
+                skills = [] if listed == "None" else [s.strip() for s in listed.split(",")]
+                result[category] = {skill: self._courses(skill) for skill in skills}
+            content = json.dumps(result)
+        completion_tokens = len(content) // 4
+        finish_reason = "stop"
+        if completion_tokens > max_tokens:
+            content, completion_tokens, finish_reason = content[:max_tokens * 4], max_tokens, "length"
+        time.sleep((self.base_ms + completion_tokens * self.ms_per_token) / 1000)
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=content), finish_reason=finish_reason)],
+            usage=SimpleNamespace(prompt_tokens=len(prompt) // 4, completion_tokens=completion_tokens))
+
+    @staticmethod
+    def _courses(skill):
+        return [{"source": source, "title": f"Complete {skill} Course {i}", "fee": "₹3,299",
+                 "duration": "12 hours", "link": f"https://www.{source.lower()}.com/search?q={skill}"}
+                for i, source in enumerate(["Udemy", "Coursera", "YouTube", "edX", "Udacity"], start=1)]
+
+
+def monolithic(client, skills_data):
+    # The previous search_courses body: every skill in one prompt, max_tokens=2000.
+    prompt = f"""
+        You are an expert in online education and course recommendations. I need to find courses to improve the following skills, categorized as follows:
+        - Technical Skills: {', '.join(skills_data.get('Technical Skills', {}).keys()) or 'None'}
+        - Soft Skills: {', '.join(skills_data.get('Soft Skills', {}).keys()) or 'None'}
+        - High Priority Gaps: {', '.join(skills_data.get('High Priority Gaps', {}).keys()) or 'None'}
+        - Low Priority Gaps: {', '.join(skills_data.get('Low Priority Gaps', {}).keys()) or 'None'}
+        Search for courses on the following platforms, ensuring they are accessible in India:
+        - Udemy: Find relevant courses with high ratings (4.5+ stars) and significant enrollments (e.g., 10,000+ students).
+        - Coursera: Find courses from reputable institutions (e.g., universities or companies like Google, IBM).
+        - YouTube: Identify authentic education channels with high views (e.g., 500,000+ views on relevant videos) and suggest either their playlists or create a playlist of the most relevant 3-5 videos for the skills.
+        Additionally, if there are other well-known sources (e.g., edX, Udacity, LinkedIn Learning) with relevant courses for these skills, include those as well.
+        For each course, provide:
+        - Source (e.g., Udemy, Coursera, YouTube).
+        - Course or playlist title.
+        - Fee in Indian Rupees (INR) (e.g., "Free", "₹4150", "Subscription-based"). Convert USD to INR using an exchange rate of 1 USD = 83 INR.
+        - Duration (e.g., "10 hours", "4 weeks").
+        - Direct link (or a search link if a direct link isn't available).
+        Provide the top 5 course or playlist suggestions per skill, categorized by the skill type (Technical Skills, Soft Skills, High Priority Gaps, Low Priority Gaps). Ensure the suggestions are recent (2024 or 2025) and relevant to the skills provided. Return the result as a JSON object with the structure:
+        {{
+          "Technical Skills": {{
+            "Skill1": [{{"source": "...", "title": "...", "fee": "...", "duration": "...", "link": "..."}}, ...],
+            ...
+          }},
+          "Soft Skills": {{...}},
+          "High Priority Gaps": {{...}},
+          "Low Priority Gaps": {{...}}
+        }}
+        """
+    response = client.chat.completions.create(
+        model="gpt-4o",
+        messages=[
+            {"role": "system", "content": "You are an expert in online education and course recommendations."},
+            {"role": "user", "content": prompt},
+        ],
+        max_tokens=2000,
+        temperature=0.7,
+    )
+    usage = {"prompt_tokens": response.usage.prompt_tokens, "completion_tokens": response.usage.completion_tokens}
+    try:
+        result = json.loads(response.choices[0].message.content)
+    except json.JSONDecodeError:
+        result = None  # truncated at max_tokens
+    return result, usage
+
+
+def user_skills(rng, count):
+    weights = [1 / (rank + 1) for rank in range(len(_SKILL_POOL))]
+    chosen = list(dict.fromkeys(rng.choices(_SKILL_POOL, weights, k=count * 3)))[:count]
+    data = {category: {} for category in main.COURSE_CATEGORIES}
+    for i, skill in enumerate(chosen):
+        data[main.COURSE_CATEGORIES[i % len(main.COURSE_CATEGORIES)]][skill] = "gap"
+    return data
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=40)
+    parser.add_argument("--skills-per-user", type=int, default=12)
+    parser.add_argument("--base-ms", type=float, default=300.0, help="fake time to first token")
+    parser.add_argument("--ms-per-token", type=float, default=2.0, help="fake output speed")
+    args = parser.parse_args()
+
+    client = SimpleNamespace(chat=SimpleNamespace(completions=FakeChatCompletions(args.base_ms, args.ms_per_token)))
+    main.db = LocalFirestore()
+    rng = random.Random(7)
+    users = [user_skills(rng, args.skills_per_user) for _ in range(args.users)]
+
+    report = {}
+    for name in ("monolithic", "per_skill"):
+        latencies, prompt_tokens, completion_tokens, incomplete = [], 0, 0, 0
+        for skills_data in users:
+            start = time.perf_counter()
+            if name == "monolithic":
+                result, usage = monolithic(client, skills_data)
+            else:
+                skills = [skill for category in main.COURSE_CATEGORIES for skill in skills_data[category]]
+                result, usage, _ = main.find_courses(client, skills)
+            latencies.append((time.perf_counter() - start) * 1000)
+            prompt_tokens += usage.get("prompt_tokens", 0)
+            completion_tokens += usage.get("completion_tokens", 0)
+            incomplete += result is None
+        report[name] = {**summarize_ms(latencies), "prompt_tokens": prompt_tokens,
+                        "completion_tokens": completion_tokens, "truncated_responses": incomplete}
+    report["per_skill"]["cache"] = main.course_cache.stats()
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main_cli()
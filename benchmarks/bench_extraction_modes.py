@@ -0,0 +1,87 @@
+"""Latency and RSS of extract_entities per spaCy execution mode.
+
+    python -m benchmarks.bench_extraction_modes [--corpus DIR] [--modes full senter sentencizer]
+
+The corpus is every *.txt file in DIR (e.g. OCR text dumped from
+parsed_output/*), or synthetic resumes from one page up to a very long OCR dump.
+Each mode runs in its own interpreter so peak RSS is per mode. "full" needs the
+full en_core_web_sm model: run it with NLP_ARTIFACT_DIR pointing to a missing
+directory, otherwise it falls back to "senter" on the trimmed artifact.
+"""
+import argparse
+import glob
+import json
+import os
+import subprocess
+import sys
+import time
+
+from benchmarks.corpus import synthetic_resume
+from benchmarks.stats import peak_rss_mb, summarize_ms
+
+
+def load_corpus(directory):
+    if directory:
+        texts = []
+        for path in sorted(glob.glob(os.path.join(directory, "*.txt"))):
+            with open(path, encoding="utf-8") as f:
+                texts.append(f.read())
+        return texts
+    # One page, a few pages, and long multi-page OCR dumps that exercise chunking.
+    return [synthetic_resume(paragraphs=n, seed=i) for i, n in enumerate([8, 8, 20, 40, 80, 400, 2000])]
+
+
+def worker(mode, corpus_dir):
+    import main
+
+    start = time.perf_counter()
+    main._single_flight("spacy", main._load_spacy)
+    main._single_flight("taxonomy", main._load_taxonomies)
+    load_ms = (time.perf_counter() - start) * 1000
+    texts = load_corpus(corpus_dir)
+
+    samples = []
+    by_length = []
+    for text in texts:
+        start = time.perf_counter()
+        entities = main.extract_entities(text, mode)
+        elapsed = (time.perf_counter() - start) * 1000
+        samples.append(elapsed)
+        by_length.append({"chars": len(text), "ms": round(elapsed, 2)})
+    print(json.dumps({
+        "requested_mode": mode,
+        "effective_mode": entities["extraction_mode"],
+        "pipeline": main.nlp.pipe_names,
+        "load_ms": round(load_ms, 1),
+        "latency": summarize_ms(samples),
+        "by_length": by_length,
+        "peak_rss_mb": peak_rss_mb(),
+    }))
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", default=None, help="directory of *.txt resumes (default: synthetic)")
+    parser.add_argument("--modes", nargs="+", default=["full", "senter", "sentencizer"])
+    parser.add_argument("--worker", default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        worker(args.worker, args.corpus)
+        return
+
+    report = []
+    for mode in args.modes:
+        cmd = [sys.executable, "-m", "benchmarks.bench_extraction_modes", "--worker", mode]
+        if args.corpus:
+            cmd += ["--corpus", args.corpus]
+        out = subprocess.run(cmd, capture_output=True, text=True)
+        if out.returncode != 0:
+            report.append({"requested_mode": mode, "error": out.stderr.strip().splitlines()[-1]})
+        else:
+            report.append(json.loads(out.stdout.strip().splitlines()[-1]))
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main_cli()
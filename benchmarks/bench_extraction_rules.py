@@ -0,0 +1,95 @@
+"""Regex field extraction: inline per-field re.findall vs the single-pass extraction_rules.scan.
+
+    python -m benchmarks.bench_extraction_rules [--paragraphs 10 100 1000 5000] [--docs 50]
+
+Resumes are benchmarks.corpus.synthetic_resume with extra dated job entries
+and "worked as" / "certified in" phrases, so every rule has matches. The legacy
+side is the three re.findall calls extract_resume_fields used to make (and
+still doesn't compute date-range experience); the scan side also collects and
+merges date ranges. Course durations compare the old schedule_and_block_courses
+parse (the same re.search run twice per course) with extraction_rules.duration_hours.
+"""
+import argparse
+import json
+import random
+import re
+import time
+
+import extraction_rules
+from benchmarks.corpus import synthetic_resume
+from benchmarks.stats import summarize_ms
+
+_DURATIONS = ["2 hours", "6.5 hours", "12 hours", "4 weeks", "45 minutes", "2h 30m", "30 hours", "Self-paced"]
+
+
+def legacy_fields(full_text):
+    experience_pattern = r'(\d+)\s*(years|yrs)\s*(of)?\s*experience'
+    experience_matches = re.findall(experience_pattern, full_text, re.IGNORECASE)
+    job_title_pattern = r'(worked as|currently|last position as)\s*([A-Za-z\s]+)'
+    job_title_regex_matches = re.findall(job_title_pattern, full_text, re.IGNORECASE)
+    cert_pattern = r'(certified in|certification in)\s*([A-Za-z\s]+)'
+    cert_regex_matches = re.findall(cert_pattern, full_text, re.IGNORECASE)
+    return experience_matches, job_title_regex_matches, cert_regex_matches
+
+
+def scan_fields(full_text):
+    found = extraction_rules.scan(full_text)
+    return found, extraction_rules.experience_years(found.date_ranges)
+
+
+def legacy_hours(duration):
+    return float(re.search(r'(\d+\.?\d*)', duration).group(1) if re.search(r'(\d+\.?\d*)', duration) else 0)
+
+
+def long_resume(paragraphs, seed):
+    rng = random.Random(seed)
+    text = synthetic_resume(paragraphs=paragraphs, seed=seed)
+    jobs = []
+    for i in range(max(1, paragraphs // 10)):
+        year = rng.randint(2005, 2022)
+        jobs.append(f"Worked as Engineer {i} at Example {i}, Mar {year} - Jun {year + rng.randint(1, 3)}")
+    return text + "\n".join(jobs) + "\nCurrently certified in Kubernetes administration\n"
+
+
+def time_calls(fn, inputs, repeat=1):
+    samples = []
+    for value in inputs:
+        start = time.perf_counter()
+        for _ in range(repeat):
+            fn(value)
+        samples.append((time.perf_counter() - start) * 1000 / repeat)
+    return summarize_ms(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--paragraphs", type=int, nargs="+", default=[10, 100, 1000, 5000])
+    parser.add_argument("--docs", type=int, default=50)
+    parser.add_argument("--courses", type=int, default=10_000)
+    args = parser.parse_args()
+
+    report = {"fields": {}}
+    for paragraphs in args.paragraphs:
+        texts = [long_resume(paragraphs, seed) for seed in range(args.docs)]
+        report["fields"][paragraphs] = {
+            "chars": sum(map(len, texts)) // len(texts),
+            "legacy_findall": time_calls(legacy_fields, texts),
+            "scan": time_calls(scan_fields, texts),
+        }
+
+    rng = random.Random(0)
+    durations = [rng.choice(_DURATIONS) for _ in range(args.courses)]
+    batch = [durations]
+    report["durations"] = {
+        "courses": args.courses,
+        "legacy_ms": time_calls(lambda values: [legacy_hours(v) for v in values], batch)["p50_ms"],
+        "duration_hours_ms": time_calls(lambda values: [extraction_rules.duration_hours(v) for v in values],
+                                        batch)["p50_ms"],
+        "parsed": {d: {"legacy": legacy_hours(d), "duration_hours": extraction_rules.duration_hours(d)}
+                   for d in _DURATIONS},
+    }
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
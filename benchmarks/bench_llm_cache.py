@@ -0,0 +1,97 @@
+"""Upstream calls and latency of llm_cache under concurrent, skewed generate_jd traffic.
+
+    python -m benchmarks.bench_llm_cache [--requests 400] [--keys 50] [--instances 2] [--concurrency 16]
+
+Requests draw (company, position, location, experience) combinations from a
+Zipf-like distribution, as real goal data does ("Software Engineer at Google,
+Bangalore" dominates), with spelling/casing variants of the same inputs. Each
+simulated instance has its own in-memory tier; all share one in-process
+Firestore. The fake upstream sleeps `--upstream-ms` like a gpt-4o call.
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import llm_cache
+from benchmarks.stats import summarize_ms
+from local_backends import LocalFirestore
+
+_COMPANIES = ["Google", "Microsoft", "Amazon", "Infosys", "TCS", "Flipkart", "Razorpay", "Swiggy"]
+_POSITIONS = ["Software Engineer", "Data Scientist", "Product Manager", "DevOps Engineer", "Backend Developer"]
+_LOCATIONS = ["Bangalore", "Hyderabad", "Pune", "Remote"]
+PARAMS = {"model": "gpt-4o", "max_tokens": 1000, "temperature": 0.7, "prompt_version": 1}
+
+
+def combos(count, seed):
+    rng = random.Random(seed)
+    return [(rng.choice(_COMPANIES), rng.choice(_POSITIONS), rng.choice(_LOCATIONS), f"{rng.randint(0, 10)} years")
+            for _ in range(count)]
+
+
+def variant(rng, text):
+    # Same input as typed by different users.
+    return rng.choice([text, text.lower(), f" {text} ", text.upper()])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--keys", type=int, default=50, help="distinct input combinations")
+    parser.add_argument("--instances", type=int, default=2)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--upstream-ms", type=float, default=300.0)
+    parser.add_argument("--max-entries", type=int, default=32, help="per-instance LRU size")
+    args = parser.parse_args()
+
+    rng = random.Random(1)
+    keys = combos(args.keys, seed=0)
+    weights = [1 / (rank + 1) for rank in range(len(keys))]
+    requests = rng.choices(keys, weights, k=args.requests)
+
+    db = LocalFirestore()
+    caches = [llm_cache.LLMCache("generate_jd", ttl_s=3600, max_entries=args.max_entries)
+              for _ in range(args.instances)]
+    upstream_calls = Counter()
+    lock = threading.Lock()
+
+    def one_request(i):
+        company, position, location, experience = requests[i]
+        raw = [variant(random.Random(i), value) for value in (company, position, location)]
+        cache = caches[i % len(caches)]
+        inputs = {"company": llm_cache.normalize(raw[0]), "position": llm_cache.normalize(raw[1]),
+                  "location": llm_cache.normalize(raw[2]), "experience": experience.split()[0]}
+
+        def upstream():
+            with lock:
+                upstream_calls[requests[i]] += 1
+            time.sleep(args.upstream_ms / 1000)
+            return {"summary": f"{position} at {company}, {location}"}
+
+        start = time.perf_counter()
+        _, source = cache.get_or_compute(inputs, PARAMS, upstream, db=db)
+        return (time.perf_counter() - start) * 1000, source
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        results = list(pool.map(one_request, range(args.requests)))
+    elapsed = time.perf_counter() - start
+
+    print(json.dumps({
+        "requests": args.requests,
+        "distinct_keys_requested": len(set(requests)),
+        "upstream_calls": sum(upstream_calls.values()),
+        "duplicate_upstream_calls": sum(count - 1 for count in upstream_calls.values()),
+        "sources": dict(Counter(source for _, source in results)),
+        "latency": summarize_ms([ms for ms, _ in results]),
+        "uncached_upstream_s": round(args.requests * args.upstream_ms / 1000, 1),
+        "elapsed_s": round(elapsed, 2),
+        "per_instance": [cache.stats() for cache in caches],
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
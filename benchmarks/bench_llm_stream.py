@@ -0,0 +1,183 @@
+"""Time to first section vs total latency: blocking completions vs llm_stream.
+
+    python -m benchmarks.bench_llm_stream [--jds 20] [--users 10] [--skills-per-user 8] [--ms-per-token 2]
+
+A fake OpenAI client stands in for gpt-4o: `--base-ms` to the first token, then
+`--ms-per-token` per ~4-character token, either as one response or as stream
+chunks (stream=True, with a final usage chunk). Firestore is local_backends.
+
+    jd        main.request_jd blocking vs streamed through main.jd_section_writer
+              (first_ms = the first section written to jd/{uid}; blocking: the whole JD)
+    courses   main.find_courses blocking vs streamed into a PartialWriter (first_ms =
+              the first course written; caches are cleared between modes so both miss)
+    parser    IncrementalJSON.feed over a 2000-token completion vs one json.loads of it
+"""
+import argparse
+import json
+import random
+import re
+import time
+from types import SimpleNamespace
+
+import datastore
+import llm_cache
+import llm_stream
+import main
+from benchmarks.bench_course_search import user_skills
+from benchmarks.stats import summarize_ms
+from local_backends import LocalFirestore
+
+_CHARS_PER_TOKEN = 4
+
+
+class FakeStreamingCompletions:
+    def __init__(self, base_ms, ms_per_token, seed=0):
+        self.base_ms = base_ms
+        self.ms_per_token = ms_per_token
+        self.rng = random.Random(seed)
+
+    def create(self, model, messages, max_tokens, temperature, stream=False, stream_options=None):
+        prompt = "".join(message["content"] for message in messages)
+        skill = re.search(r"improve the skill: (.+)", prompt)
+        content = json.dumps(self._courses(skill.group(1).strip()) if skill else self._jd(), indent=1)
+        content = content[:max_tokens * _CHARS_PER_TOKEN]
+        usage = SimpleNamespace(prompt_tokens=len(prompt) // _CHARS_PER_TOKEN,
+                                completion_tokens=len(content) // _CHARS_PER_TOKEN)
+        if stream:
+            return self._chunks(content, usage)
+        time.sleep((self.base_ms + usage.completion_tokens * self.ms_per_token) / 1000)
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content),
+                                                        finish_reason="stop")], usage=usage)
+
+    def _chunks(self, content, usage):
+        time.sleep(self.base_ms / 1000)
+        for i in range(0, len(content), _CHARS_PER_TOKEN):
+            time.sleep(self.ms_per_token / 1000)
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(
+                content=content[i:i + _CHARS_PER_TOKEN]))], usage=None)
+        yield SimpleNamespace(choices=[], usage=usage)
+
+    def _jd(self):
+        def sentence(words):
+            return " ".join(self.rng.choice(["build", "scalable", "services", "with", "teams", "across",
+                                             "cloud", "data", "platform", "customers", "reliable"])
+                            for _ in range(words)).capitalize() + "."
+
+        return {
+            "summary": " ".join(sentence(18) for _ in range(3)),
+            "responsibilities": [f"- {sentence(14)}" for _ in range(7)],
+            "qualifications": [f"- {sentence(12)}" for _ in range(5)],
+            "skills": [f"- {sentence(6)}" for _ in range(7)],
+            "relevance": " ".join(sentence(16) for _ in range(3)),
+        }
+
+    @staticmethod
+    def _courses(skill):
+        return {"courses": [{"source": source, "title": f"Complete {skill} Course {i}", "fee": "₹3,299",
+                             "duration": "12 hours", "link": f"https://www.{source.lower()}.com/search?q={skill}"}
+                            for i, source in enumerate(["Udemy", "Coursera", "YouTube", "edX", "Udacity"], start=1)]}
+
+
+def bench_jd(client, jds):
+    store = datastore.DataStore(LocalFirestore())
+    report = {}
+    for mode in ("blocking", "streamed"):
+        first, total = [], []
+        for n in range(jds):
+            start = time.perf_counter()
+            if mode == "blocking":
+                main.request_jd(client, "Acme", "Data Engineer", "Pune", "3 years")
+                first.append((time.perf_counter() - start) * 1000)
+            else:
+                writer = main.jd_section_writer(store, f"user-{n}")
+                seen = []
+
+                def on_section(name, value):
+                    if not seen:
+                        seen.append((time.perf_counter() - start) * 1000)
+                    writer(name, value)
+
+                main.request_jd(client, "Acme", "Data Engineer", "Pune", "3 years", on_section)
+                first.append(seen[0])
+            total.append((time.perf_counter() - start) * 1000)
+        report[mode] = {"first_section": summarize_ms(first), "total": summarize_ms(total)}
+    report["streamed"]["writes_per_jd"] = store.round_trips["set"] / jds
+    return report
+
+
+def bench_courses(client, users, skills_per_user):
+    rng = random.Random(7)
+    skill_sets = [[skill for skills in user_skills(rng, skills_per_user).values() for skill in skills]
+                  for _ in range(users)]
+    report = {}
+    for mode in ("blocking", "streamed"):
+        main.course_cache = llm_cache.LLMCache("search_courses", ttl_s=3600, max_entries=2048)
+        main.db = LocalFirestore()
+        store = datastore.DataStore(main.db)
+        first, total, writes = [], [], 0
+        for n, skills in enumerate(skill_sets):
+            start = time.perf_counter()
+            on_courses = None
+            seen = []
+            if mode == "streamed":
+                writer = llm_stream.PartialWriter(
+                    lambda fields: store.put("course_search", f"user-{n}", fields, merge=True),
+                    main.COURSE_STREAM_WRITE_INTERVAL_S)
+
+                def on_courses(skill, courses):
+                    if courses and not seen:
+                        seen.append((time.perf_counter() - start) * 1000)
+                    writer.update({"result": {skill: courses}})
+
+            main.find_courses(client, skills, on_courses)
+            total.append((time.perf_counter() - start) * 1000)
+            if mode == "streamed":
+                writer.flush()
+                writes += writer.writes
+            first.append(seen[0] if seen else total[-1])
+        report[mode] = {"first_course": summarize_ms(first), "total": summarize_ms(total)}
+    report["streamed"]["partial_writes_per_user"] = writes / users
+    return report
+
+
+def bench_parser(repeat):
+    content = json.dumps({"courses": FakeStreamingCompletions._courses("Kubernetes")["courses"] * 16}, indent=1)
+    content = content[:2000 * _CHARS_PER_TOKEN].rsplit("},", 1)[0] + "}]}"
+    chunks = [content[i:i + _CHARS_PER_TOKEN] for i in range(0, len(content), _CHARS_PER_TOKEN)]
+    feed, loads = [], []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        parser = llm_stream.IncrementalJSON()
+        for chunk in chunks:
+            parser.feed(chunk)
+        feed.append((time.perf_counter() - start) * 1000)
+        assert parser.complete
+        start = time.perf_counter()
+        json.loads(content)
+        loads.append((time.perf_counter() - start) * 1000)
+    return {"chars": len(content), "chunks": len(chunks), "incremental": summarize_ms(feed),
+            "json_loads": summarize_ms(loads)}
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--jds", type=int, default=20)
+    parser.add_argument("--users", type=int, default=10)
+    parser.add_argument("--skills-per-user", type=int, default=8)
+    parser.add_argument("--base-ms", type=float, default=300.0, help="fake time to first token")
+    parser.add_argument("--ms-per-token", type=float, default=2.0, help="fake output speed")
+    parser.add_argument("--parser-repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    client = SimpleNamespace(chat=SimpleNamespace(completions=FakeStreamingCompletions(args.base_ms,
+                                                                                       args.ms_per_token)))
+    report = {
+        "jd": bench_jd(client, args.jds),
+        "courses": bench_courses(client, args.users, args.skills_per_user),
+        "parser": bench_parser(args.parser_repeat),
+    }
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main_cli()
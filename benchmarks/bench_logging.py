@@ -0,0 +1,145 @@
+"""Logging cost per request on the request thread: the old StreamHandler vs structured_logging.
+
+    python -m benchmarks.bench_logging [--requests 500] [--threads 4] [--sink-us 200] [--response-chars 3000]
+
+A request makes the log calls of one extract_resume_openai invocation (cold
+start excluded), either as main.py made them before (everything at INFO as
+f-strings, including the first 500 characters of the resume and the raw model
+response) or as it makes them now (the resume's length only, the response at DEBUG
+behind LOG_RESUME_DATA, inside metrics.traced, which adds the spans record). Modes:
+
+    sync_text       before: logging.StreamHandler + text Formatter on the request thread
+    sync_json       structured_logging with LOG_ASYNC=0 (JSON, redaction, caps on the request thread)
+    queued          structured_logging: the request thread filters and enqueues
+    queued_debug    queued, with extract_resume_openai at DEBUG and LOG_RESUME_DATA=1 (redacted, capped)
+    queued_sampled  queued, LOG_SAMPLE_RATE=0.1
+
+The sink is a stream whose write() takes --sink-us, like a pipe to a busy log
+agent. Per mode: ms per request on the request thread, output bytes per request,
+time to drain the queue after the last request, and dropped records.
+"""
+import argparse
+import io
+import json
+import logging
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import metrics
+import structured_logging
+from benchmarks.corpus import synthetic_resume
+from benchmarks.stats import summarize_ms
+
+logger = logging.getLogger('resume-parsing')
+
+
+class SlowSink(io.TextIOBase):
+    def __init__(self, write_s):
+        self.write_s = write_s
+        self.bytes = 0
+
+    def write(self, text):
+        if self.write_s:
+            time.sleep(self.write_s)
+        self.bytes += len(text)
+        return len(text)
+
+
+def request_before(uid, full_text, raw_response):
+    logger.info("Starting extract_resume_openai function...")
+    logger.info(f"User UID: {uid}")
+    logger.info(f"Checking for JSON file at gs://bucket/parsed_output/{uid}/output-1-to-1.json...")
+    logger.info(f"Cache miss for extract_openai ({uid})")
+    logger.info("Vision output text streamed successfully.")
+    logger.info(f"Full text: {full_text[:500]}...")
+    logger.info(f"Raw OpenAI response: {raw_response}")
+
+
+def extract_resume_openai(uid, full_text, raw_response):
+    logger.info("Starting extract_resume_openai function...")
+    logger.info(f"User UID: {uid}")
+    logger.info(f"Checking for JSON file at gs://bucket/parsed_output/{uid}/output-1-to-1.json...")
+    logger.info(f"Cache miss for extract_openai ({uid})")
+    with metrics.span("gcs.read_vision_output", bytes=len(full_text)):
+        logger.info("Vision output text streamed successfully.")
+    logger.info(f"Full text: {len(full_text)} characters")
+    with metrics.span("llm", model="gpt-3.5-turbo") as span:
+        span.set(prompt_tokens=len(full_text) // 4, completion_tokens=len(raw_response) // 4)
+    if structured_logging.LOG_RESUME_DATA:
+        logger.debug("Raw OpenAI response: %s", raw_response)
+    with metrics.span("firestore.set", collection="resume", bytes=len(raw_response)):
+        pass
+
+
+request_after = metrics.traced(extract_resume_openai)
+
+
+def handler_for(mode, sink):
+    if mode == "sync_text":
+        handler = logging.StreamHandler(sink)
+        handler.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
+        return handler, None, logging.INFO
+    request_filter = structured_logging.RequestFilter(
+        level=logging.INFO,
+        levels={"extract_resume_openai": logging.DEBUG} if mode == "queued_debug" else {},
+        sample_rate=0.1 if mode == "queued_sampled" else 1.0, sample_rates={})
+    handler, listener = structured_logging.build_handler(sink, asynchronous=mode != "sync_json",
+                                                         request_filter=request_filter)
+    return handler, listener, request_filter.minimum_level()
+
+
+def run_mode(mode, args, payloads):
+    structured_logging.LOG_RESUME_DATA = mode == "queued_debug"
+    sink = SlowSink(args.sink_us / 1e6)
+    handler, listener, level = handler_for(mode, sink)
+    logger.handlers = [handler]
+    logger.setLevel(level)
+    logger.propagate = False
+    request = request_before if mode == "sync_text" else request_after
+
+    def one(n):
+        full_text, raw_response = payloads[n % len(payloads)]
+        start = time.perf_counter()
+        request(f"user-{n}", full_text, raw_response)
+        return (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.threads) as pool:
+        samples = list(pool.map(one, range(args.requests)))
+    requests_done = time.perf_counter()
+    if listener is not None:
+        listener.stop()  # returns once the queue is drained
+    drained = time.perf_counter()
+    return {
+        "request_thread": summarize_ms(samples),
+        "wall_ms": round((requests_done - start) * 1000, 1),
+        "drain_ms": round((drained - requests_done) * 1000, 1),
+        "bytes_per_request": round(sink.bytes / args.requests),
+        "dropped": getattr(handler, "dropped", 0),
+    }
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--sink-us", type=float, default=200.0, help="time per write to the log stream")
+    parser.add_argument("--response-chars", type=int, default=3000, help="size of the raw model response")
+    parser.add_argument("--modes", default="sync_text,sync_json,queued,queued_debug,queued_sampled")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    payloads = []
+    for n in range(16):
+        full_text = synthetic_resume(paragraphs=rng.choice([8, 16, 40]), seed=n)
+        full_text += f"\nContact: candidate{n}@example.com, +91 98765 4{n:04d}"
+        raw_response = json.dumps({"brief_description": full_text[:args.response_chars]})[:args.response_chars]
+        payloads.append((full_text, raw_response))
+
+    report = {mode: run_mode(mode, args, payloads) for mode in args.modes.split(",")}
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main_cli()
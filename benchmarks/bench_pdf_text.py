@@ -0,0 +1,57 @@
+"""Text-layer extraction time by page count, and which OCR path each PDF would take.
+
+    python -m benchmarks.bench_pdf_text [--pages 1 2 5 10] [--scanned 0 1 6] [--runs 5]
+
+Builds synthetic digital PDFs (optionally with some image-only pages) and
+times pdf_text.page_texts, which is all the common path does before writing
+output-1-to-1.json. For comparison, the async Vision path it replaces takes
+tens of seconds per resume (operation + GCS output + finalize).
+"""
+import argparse
+import json
+import time
+
+import pdf_text
+from benchmarks.corpus import synthetic_resume, text_pdf
+from benchmarks.stats import summarize_ms
+
+# Mirrors main.VISION_SYNC_MAX_PAGES without importing the Functions SDK.
+VISION_SYNC_MAX_PAGES = 5
+
+
+def route(texts):
+    if texts is None:
+        return "vision_async"
+    scanned = sum(text is None for text in texts)
+    if not scanned:
+        return "text_layer"
+    return "text_layer+vision_sync" if scanned <= VISION_SYNC_MAX_PAGES else "vision_async"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, nargs="+", default=[1, 2, 5, 10])
+    parser.add_argument("--scanned", type=int, nargs="+", default=[0, 1, 6], help="image-only pages per PDF")
+    parser.add_argument("--paragraphs", type=int, default=12, help="resume length per page")
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    report = []
+    for pages in args.pages:
+        for scanned in args.scanned:
+            if scanned > pages:
+                continue
+            texts = [synthetic_resume(args.paragraphs, seed=i) for i in range(pages - scanned)] + [None] * scanned
+            data = text_pdf(texts)
+            timings = []
+            for _ in range(args.runs):
+                start = time.perf_counter()
+                result = pdf_text.page_texts(data)
+                timings.append((time.perf_counter() - start) * 1000)
+            report.append({"pages": pages, "scanned": scanned, "pdf_kb": round(len(data) / 1024, 1),
+                           "route": route(result), **summarize_ms(timings)})
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
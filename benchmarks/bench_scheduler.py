@@ -0,0 +1,75 @@
+"""Local course scheduler: time per plan for many courses over long date ranges.
+
+    python -m benchmarks.bench_scheduler [--courses 10 100 500 1000] [--days 30 365 730] [--runs 5]
+
+Each plan is checked for the constraints the Gemini prompt used to state:
+sessions only on selected days inside the range, inside the time slot, at most
+hours_per_day per day, no overlaps, and Sundays free unless needed.
+"""
+import argparse
+import json
+import random
+import time
+from collections import defaultdict
+from datetime import date, timedelta
+
+import course_scheduler
+from benchmarks.stats import summarize_ms
+
+
+def make_courses(count, seed=0):
+    rng = random.Random(seed)
+    durations = ["2 hours", "6.5 hours", "12 hours", "20 hours", "4 weeks", "45 minutes", "30 hours"]
+    return [course_scheduler.Course(f"Course {i}", d, course_scheduler.course_hours(d))
+            for i, d in ((i, rng.choice(durations)) for i in range(count))]
+
+
+def check(plan, start, end, selected_days, time_slot, hours_per_day):
+    slot_start, slot_end = course_scheduler.parse_time_slot(time_slot)
+    weekdays = course_scheduler.parse_days(selected_days)
+    per_day = defaultdict(list)
+    for session in plan.sessions:
+        day = date.fromisoformat(session["Start Date"])
+        assert start <= day <= end and day.weekday() in weekdays
+        t0 = int(session["Start Time"][:2]) * 60 + int(session["Start Time"][3:])
+        t1 = int(session["End Time"][:2]) * 60 + int(session["End Time"][3:])
+        assert slot_start <= t0 < t1 <= slot_end
+        per_day[day].append((t0, t1))
+    for day, spans in per_day.items():
+        spans.sort()
+        assert all(a[1] <= b[0] for a, b in zip(spans, spans[1:])), f"overlap on {day}"
+        assert sum(t1 - t0 for t0, t1 in spans) <= hours_per_day * 60
+    sundays = sum(day.weekday() == course_scheduler.SUNDAY for day in per_day)
+    assert sundays == plan.sundays_used
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--courses", type=int, nargs="+", default=[10, 100, 500, 1000])
+    parser.add_argument("--days", type=int, nargs="+", default=[30, 365, 730])
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    selected_days = ["Mon", "Wed", "Fri", "Sat", "Sun"]
+    time_slot, hours_per_day = "9:00-11:00", 2.0
+    start = date(2025, 1, 1)
+    report = []
+    for days in args.days:
+        end = start + timedelta(days=days - 1)
+        for count in args.courses:
+            courses = make_courses(count)
+            timings = []
+            for _ in range(args.runs):
+                t = time.perf_counter()
+                plan = course_scheduler.build_schedule(courses, start.isoformat(), end.isoformat(),
+                                                       selected_days, time_slot, hours_per_day)
+                timings.append((time.perf_counter() - t) * 1000)
+            check(plan, start, end, selected_days, time_slot, hours_per_day)
+            report.append({"days": days, "courses": count, "sessions": len(plan.sessions),
+                           "unscheduled": len(plan.unscheduled), "sundays_used": plan.sundays_used,
+                           **summarize_ms(timings)})
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
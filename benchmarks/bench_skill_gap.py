@@ -0,0 +1,186 @@
+"""Latency and token usage of analyze_missing_skills: whole-JD gpt-4o prompt vs the local gap engine.
+
+    python -m benchmarks.bench_skill_gap [--pairs 200] [--base-ms 300] [--ms-per-token 2]
+
+JD/resume pairs are generated from the taxonomies in the shapes generate_jd and
+the extractors write: skills, qualification bullets (degree, years, a
+certification, sometimes a free-text requirement) and a resume with part of
+the JD's skills. A fake client stands in for gpt-4o: tokens are characters / 4,
+each call takes `--base-ms` + `--ms-per-token` per output token.
+
+    llm    the previous analyze_missing_skills prompt, once per pair (max_tokens=1500)
+    local  skill_gap.analyze, plus main.classify_residual when items are left over
+
+CHECKS are JD skills that a resume item does or doesn't cover (React Native is not
+React; ReactJS is); the report lists any the local engine gets wrong.
+"""
+import argparse
+import json
+import random
+import re
+import time
+from types import SimpleNamespace
+
+import main
+import skill_gap
+import taxonomy
+from benchmarks.stats import summarize_ms
+
+_FREE_TEXT = ["Passion for building developer tools", "Exposure to the payments domain",
+              "Comfortable working in a fast-paced startup", "Published open-source work is a plus"]
+# (JD skill, resume skill, whether the JD skill should be reported missing)
+CHECKS = [("React Native", "React", True), ("ReactJS", "React", False), ("Spring Boot", "Spring", True),
+          ("Postgres", "PostgreSQL", False), ("Node.js", "NodeJS", False)]
+_DEGREES = ["Bachelor's degree in Computer Science", "Master's degree in Data Science or related field",
+            "B.Tech in Information Technology", "Diploma in Electronics"]
+
+
+class FakeChatCompletions:
+    def __init__(self, base_ms, ms_per_token):
+        self.base_ms = base_ms
+        self.ms_per_token = ms_per_token
+        self.usage = {"calls": 0, "prompt_tokens": 0, "completion_tokens": 0}
+
+    def create(self, model, messages, max_tokens, temperature):
+        prompt = "".join(message["content"] for message in messages)
+        listed = re.search(r"Requirements:\n(.*?)\n\s*Resume:", prompt, re.DOTALL)
+        items = [line.strip()[2:] for line in listed.group(1).splitlines()] if listed else []
+        result = {"education_gap": "No education gap",
+                  "high_priority_gaps": [f"JD requires: {item}; Not found in resume" for item in items],
+                  "low_priority_gaps": [], "technical_skills": ["Kubernetes", "Terraform", "Kafka"],
+                  "soft_skills": ["Communication"]}
+        content = json.dumps(result)
+        completion_tokens = min(len(content) // 4 + (0 if listed else 120), max_tokens)
+        time.sleep((self.base_ms + completion_tokens * self.ms_per_token) / 1000)
+        self.usage["calls"] += 1
+        self.usage["prompt_tokens"] += len(prompt) // 4
+        self.usage["completion_tokens"] += completion_tokens
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=content), finish_reason="stop")],
+            usage=SimpleNamespace(prompt_tokens=len(prompt) // 4, completion_tokens=completion_tokens))
+
+
+def legacy(client, jd_data, resume_data):
+    # The previous analyze_missing_skills body: the whole JD and resume in one prompt.
+    jd_text = (
+        f"Summary: {jd_data.get('summary', '')}\n"
+        f"Responsibilities: {jd_data.get('responsibilities', '')}\n"
+        f"Qualifications: {jd_data.get('qualifications', '')}\n"
+        f"Skills: {jd_data.get('skills', '')}\n"
+        f"Relevance: {jd_data.get('relevance', '')}"
+    )
+    resume_text = (
+        f"Job Title: {resume_data.get('current_job_title', '')}\n"
+        f"Experience: {resume_data.get('years_of_experience', '')}\n"
+        f"Description: {resume_data.get('brief_description', '')}\n"
+        f"Skills: {', '.join(resume_data.get('key_skills_tools', []))}\n"
+        f"Education: {resume_data.get('highest_education', '')}\n"
+        f"Certifications: {', '.join(resume_data.get('certifications', []))}"
+    )
+    prompt = f"""
+        You are a career expert tasked with comparing a job description (JD) and a resume to identify gaps. Follow these steps:
+        1. Extract all required skills, qualifications, and experiences from the JD, considering all sections (summary, responsibilities, qualifications, skills, relevance).
+        2. Identify skills, qualifications, and experiences present in the resume, considering all sections (job title, experience, description, skills, education, certifications).
+        3. Compare the two and identify:
+           - "education_gap": If the JD's qualifications require a specific education level or field (e.g., "Bachelor's degree in Computer Science") that the resume's highest_education does not meet (e.g., "Diploma in Mechanical Engineering"), describe the mismatch as a string (e.g., "JD requires: Bachelor's degree in Computer Science; Resume has: Diploma in Mechanical Engineering"). If no mismatch, return "No education gap".
+           - "high_priority_gaps": Critical non-skill requirements (e.g., certifications, core experiences) in the JD that are missing from the resume (e.g., "JD requires: AWS certification; Not found in resume").
+           - "low_priority_gaps": Less critical non-skill requirements (e.g., nice-to-have experiences) in the JD that are missing from the resume (e.g., "JD requires: Experience with microservices architecture; Not found in resume").
+           - Missing skills: Skills required by the JD but not present in the resume.
+        4. Categorize missing skills into:
+           - "technical_skills": Skills related to tools, technologies, or specific expertise (e.g., "Kubernetes", "Python").
+           - "soft_skills": Skills related to interpersonal or behavioral traits (e.g., "Communication", "Problem-solving").
+           Use your judgment to categorize skills and prioritize non-skill gaps based on their importance to the role.
+        Return the result as a JSON object with "education_gap" (string), "high_priority_gaps" (list of strings), "low_priority_gaps" (list of strings), "technical_skills" (list of strings), and "soft_skills" (list of strings). Do not include any additional text or explanations.
+
+        JD:
+        {jd_text}
+
+        Resume:
+        {resume_text}
+        """
+    response = client.chat.completions.create(
+        model="gpt-4o",
+        messages=[
+            {"role": "system", "content": "You are a career expert specializing in resume and JD analysis."},
+            {"role": "user", "content": prompt},
+        ],
+        max_tokens=1500,
+        temperature=0.7,
+    )
+    return response.choices[0].message.content
+
+
+def make_pair(rng, skill_names, soft_names, cert_names):
+    jd_skills = rng.sample(skill_names, 6)
+    qualifications = [rng.choice(_DEGREES), f"{rng.randint(1, 8)}+ years of professional experience",
+                      f"{rng.choice(cert_names)} preferred"]
+    if rng.random() < 0.4:
+        qualifications.append(rng.choice(_FREE_TEXT))
+    jd_data = {
+        "summary": "Join a growing team building reliable products used by millions.",
+        "responsibilities": "\n".join(f"- Build and operate services using {skill}" for skill in jd_skills[:3])
+                            + f"\n- Show strong {rng.choice(soft_names).lower()} with product teams",
+        "qualifications": qualifications,
+        "skills": "\n".join(f"- {skill}" for skill in jd_skills + rng.sample(soft_names, 2)),
+        "relevance": "The role is central to the company's platform plans for 2025.",
+    }
+    resume_data = {
+        "current_job_title": "Software Engineer",
+        "years_of_experience": f"{rng.randint(0, 8)} years",
+        "brief_description": "Developed backend services and led a small team.",
+        "key_skills_tools": rng.sample(jd_skills, 3) + rng.sample(skill_names, 4),
+        "highest_education": rng.choice(["Bachelor in Computer Science", "Master in Data Science", "Not Found"]),
+        "certifications": ["Not Found"],
+    }
+    return jd_data, resume_data
+
+
+def run_checks(taxonomies):
+    failed = []
+    for required, have, expect_missing in CHECKS:
+        analysis, residual = skill_gap.analyze({"skills": f"- {required}"},
+                                               {"key_skills_tools": [have, "Docker", "Git"]}, taxonomies)
+        missing = bool(analysis["technical_skills"] or residual)
+        if missing != expect_missing:
+            failed.append({"jd": required, "resume": have, "expected_missing": expect_missing})
+    return {"passed": len(CHECKS) - len(failed), "failed": failed}
+
+
+def canonical_names(name):
+    with open(taxonomy.taxonomy_path(name), encoding="utf-8") as f:
+        return [line.split("\t")[0].strip() for line in f if line.strip() and not line.startswith("#")]
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pairs", type=int, default=200)
+    parser.add_argument("--base-ms", type=float, default=300.0, help="fake time to first token")
+    parser.add_argument("--ms-per-token", type=float, default=2.0, help="fake output speed")
+    args = parser.parse_args()
+
+    taxonomies = taxonomy.load_taxonomies(taxonomy.DEFAULT_NAMES + ("soft_skills",))
+    names = {name: canonical_names(name) for name in taxonomies}
+    rng = random.Random(3)
+    pairs = [make_pair(rng, names["skills"], names["soft_skills"], names["certifications"])
+             for _ in range(args.pairs)]
+
+    report = {"checks": run_checks(taxonomies)}
+    for name in ("llm", "local"):
+        client = SimpleNamespace(chat=SimpleNamespace(
+            completions=FakeChatCompletions(args.base_ms, args.ms_per_token)))
+        latencies = []
+        for jd_data, resume_data in pairs:
+            start = time.perf_counter()
+            if name == "llm":
+                legacy(client, jd_data, resume_data)
+            else:
+                analysis, residual = skill_gap.analyze(jd_data, resume_data, taxonomies)
+                if residual:
+                    skill_gap.apply_residual(analysis, main.classify_residual(client, residual, resume_data))
+            latencies.append((time.perf_counter() - start) * 1000)
+        report[name] = {**summarize_ms(latencies), **client.chat.completions.usage}
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main_cli()
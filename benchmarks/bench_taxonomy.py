@@ -0,0 +1,104 @@
+"""Taxonomy matcher vs spaCy PhraseMatcher at 100, 10k and 100k terms.
+
+    python -m benchmarks.bench_taxonomy [--sizes 100 10000 100000] [--docs 200]
+
+Terms are synthetic one- to three-word phrases with an alias each; the corpus is
+synthetic resumes with taxonomy terms sprinkled in. For each size it reports
+build time, RSS growth, and per-document match latency. The PhraseMatcher side
+needs spaCy (blank English tokenizer, attr="LOWER") and is skipped without it.
+"""
+import argparse
+import gc
+import json
+import random
+import time
+
+from benchmarks.corpus import synthetic_resume
+from benchmarks.stats import current_rss_mb, summarize_ms
+from taxonomy import Taxonomy
+
+_SYLLABLES = ["ka", "lo", "ri", "zen", "tor", "mi", "vex", "dra", "pol", "sun", "qua", "nex", "bar", "fy"]
+
+
+def synthetic_terms(count, seed=0):
+    rng = random.Random(seed)
+    seen = set()
+    terms = []
+    while len(terms) < count:
+        words = ["".join(rng.choice(_SYLLABLES) for _ in range(rng.randint(2, 4))).capitalize()
+                 for _ in range(rng.randint(1, 3))]
+        term = " ".join(words)
+        if term.lower() not in seen:
+            seen.add(term.lower())
+            terms.append((term, [term.replace(" ", "").lower()[:12] + "x"]))
+    return terms
+
+
+def corpus(terms, docs, seed=0):
+    rng = random.Random(seed)
+    texts = []
+    for i in range(docs):
+        injected = ", ".join(rng.choice(terms)[0] for _ in range(10))
+        texts.append(synthetic_resume(paragraphs=12, seed=i) + f"Tools: {injected}\n")
+    return texts
+
+
+def time_matching(match, texts):
+    samples = []
+    for text in texts:
+        start = time.perf_counter()
+        match(text)
+        samples.append((time.perf_counter() - start) * 1000)
+    return summarize_ms(samples)
+
+
+def bench_taxonomy(terms, texts):
+    gc.collect()
+    rss_before = current_rss_mb()
+    start = time.perf_counter()
+    taxonomy = Taxonomy("bench", terms)
+    taxonomy.matcher.compile()
+    build_ms = (time.perf_counter() - start) * 1000
+    result = {"build_ms": round(build_ms, 1), "rss_delta_mb": round(current_rss_mb() - rss_before, 1),
+              "match": time_matching(taxonomy.find, texts)}
+    del taxonomy
+    return result
+
+
+def bench_phrase_matcher(terms, texts):
+    try:
+        import spacy
+        from spacy.matcher import PhraseMatcher
+    except ImportError:
+        return "skipped (spaCy not installed)"
+    nlp = spacy.blank("en")
+    gc.collect()
+    rss_before = current_rss_mb()
+    start = time.perf_counter()
+    matcher = PhraseMatcher(nlp.vocab, attr="LOWER")
+    patterns = [nlp.make_doc(surface) for term, aliases in terms for surface in (term, *aliases)]
+    matcher.add("TERM", patterns)
+    build_ms = (time.perf_counter() - start) * 1000
+    result = {"build_ms": round(build_ms, 1), "rss_delta_mb": round(current_rss_mb() - rss_before, 1),
+              "match": time_matching(lambda text: matcher(nlp.make_doc(text)), texts)}
+    del matcher, patterns
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 10_000, 100_000])
+    parser.add_argument("--docs", type=int, default=200)
+    args = parser.parse_args()
+
+    report = {}
+    for size in args.sizes:
+        terms = synthetic_terms(size)
+        texts = corpus(terms, args.docs)
+        report[size] = {"taxonomy": bench_taxonomy(terms, texts),
+                        "phrase_matcher": bench_phrase_matcher(terms, texts)}
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
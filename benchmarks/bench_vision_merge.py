@@ -0,0 +1,105 @@
+"""End-to-end latency of finalizing sharded Vision output, by page count.
+
+    python -m benchmarks.bench_vision_merge [--pages 1 5 20 50 100] [--batch-size 20] [--latency-ms 30]
+
+For each page count, writes the raw shards Vision would produce with
+OutputConfig.batch_size (output-{start}-to-{end}.json) to an in-process bucket
+that sleeps `--latency-ms` per API call, then times finalize + reading the text
+back from output-1-to-1.json, as the extraction step does:
+
+    legacy  pick max(name), rename it, delete the rest one by one
+    serial  finalize_vision_output with one reader thread
+    merged  finalize_vision_output: parallel shard reads, one merged write, batched deletes
+
+`pages_kept` shows how many pages survive; the legacy path keeps one shard.
+"""
+import argparse
+import json
+import time
+
+import main
+from benchmarks.corpus import synthetic_resume, vision_output
+from local_backends import LocalFirestore, LocalStorageClient
+
+
+def write_shards(bucket, uid, pages, batch_size, paragraphs):
+    for start in range(1, pages + 1, batch_size):
+        end = min(start + batch_size - 1, pages)
+        shard = vision_output(synthetic_resume(paragraphs, seed=start), pages=end - start + 1)
+        for offset, response in enumerate(shard["responses"]):
+            # Tag each page so the merged order can be checked.
+            response["fullTextAnnotation"]["text"] = f"PAGE {start + offset}\n" + response["fullTextAnnotation"]["text"]
+        bucket.blob(f"parsed_output/{uid}/raw/output-{start}-to-{end}.json").upload_from_string(json.dumps(shard))
+
+
+def legacy_finalize(uid):
+    # The pre-sharding finalize from parse_resume_by_vision.
+    bucket = main.get_bucket()
+    output_files = [blob.name for blob in bucket.list_blobs(prefix=f"parsed_output/{uid}/raw/")]
+    latest_file = max(output_files, key=lambda x: x)
+    bucket.rename_blob(bucket.blob(latest_file), f"parsed_output/{uid}/output-1-to-1.json")
+    for file in output_files:
+        if file != latest_file:
+            bucket.blob(file).delete()
+
+
+def serial_finalize(uid):
+    workers = main.VISION_READ_WORKERS
+    main.VISION_READ_WORKERS = 1
+    try:
+        main.finalize_vision_output(uid, operation_done=True)
+    finally:
+        main.VISION_READ_WORKERS = workers
+
+
+def merged_finalize(uid):
+    main.finalize_vision_output(uid, operation_done=True)
+
+
+def storage_calls(bucket):
+    return bucket.rpc_count + bucket.client.batch_requests
+
+
+def run(finalize, uid, bucket):
+    rpcs = storage_calls(bucket)
+    start = time.perf_counter()
+    finalize(uid)
+    text = main.read_vision_text(bucket.blob(f"parsed_output/{uid}/output-1-to-1.json"))
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    page_tags = [line for line in text.splitlines() if line.startswith("PAGE ")]
+    return {
+        "e2e_ms": round(elapsed_ms, 1),
+        "storage_calls": storage_calls(bucket) - rpcs,
+        "pages_kept": len(page_tags),
+        "in_order": page_tags == sorted(page_tags, key=lambda tag: int(tag.split()[1])),
+    }
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, nargs="+", default=[1, 5, 20, 50, 100])
+    parser.add_argument("--batch-size", type=int, default=main.VISION_BATCH_SIZE, help="pages per Vision shard")
+    parser.add_argument("--latency-ms", type=float, default=30.0, help="simulated latency per Storage call")
+    parser.add_argument("--paragraphs", type=int, default=10, help="resume length per page")
+    args = parser.parse_args()
+
+    client = LocalStorageClient(latency_s=args.latency_ms / 1000)
+    bucket = client.bucket(main.BUCKET_NAME)
+    main.storage_client = client
+    main.buckets[main.BUCKET_NAME] = bucket
+    main.db = LocalFirestore()
+    main.service_state["firestore"] = main.READY
+
+    report = []
+    for pages in args.pages:
+        row = {"pages": pages, "shards": -(-pages // args.batch_size)}
+        for name, finalize in (("legacy", legacy_finalize), ("serial", serial_finalize), ("merged", merged_finalize)):
+            uid = f"bench-{name}-{pages}"
+            write_shards(bucket, uid, pages, args.batch_size, args.paragraphs)
+            row[name] = run(finalize, uid, bucket)
+        report.append(row)
+    print(json.dumps({"batch_size": args.batch_size, "latency_ms": args.latency_ms, "results": report}, indent=2))
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,72 @@
+"""Peak memory and time: temp file + json.load vs streaming fullTextAnnotation reader.
+
+    python -m benchmarks.bench_vision_reader [--pages 1 5 20] [--paragraphs 40]
+
+Builds synthetic Vision outputs (with per-word/per-symbol geometry, like the
+real thing) and reads the text back both ways from an in-process blob. Peak
+memory is measured with tracemalloc, which sees every Python-level allocation
+json.load makes.
+"""
+import argparse
+import json
+import tempfile
+import time
+import tracemalloc
+
+from benchmarks.corpus import synthetic_resume, vision_output_bytes
+from local_backends import LocalStorageClient
+from vision_text import read_full_text
+
+
+def legacy_read(blob):
+    # The pre-streaming path from extract_resume_fields/extract_resume_openai.
+    with tempfile.NamedTemporaryFile() as temp:
+        blob.download_to_file(temp)
+        temp.flush()
+        temp.seek(0)
+        parsed_data = json.load(temp)
+    return parsed_data['responses'][0]['fullTextAnnotation']['text']
+
+
+def streaming_read(blob):
+    with blob.open("rb") as stream:
+        return read_full_text(stream)
+
+
+def measure(fn, blob, runs):
+    # Timed runs without tracing (tracemalloc slows allocation-heavy code), then one traced run.
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn(blob)
+        timings.append((time.perf_counter() - start) * 1000)
+    tracemalloc.start()
+    fn(blob)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {"median_ms": round(sorted(timings)[len(timings) // 2], 1), "peak_mb": round(peak / (1024 * 1024), 2)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, nargs="+", default=[1, 5, 20])
+    parser.add_argument("--paragraphs", type=int, default=40, help="resume length per page")
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    bucket = LocalStorageClient().bucket("bench")
+    report = []
+    for pages in args.pages:
+        blob = bucket.blob(f"parsed_output/bench/output-{pages}.json")
+        blob.upload_from_string(vision_output_bytes(synthetic_resume(args.paragraphs), pages))
+        report.append({
+            "pages": pages,
+            "output_mb": round(blob.size / (1024 * 1024), 2),
+            "legacy": measure(legacy_read, blob, args.runs),
+            "streaming": measure(streaming_read, blob, args.runs),
+        })
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""Check datastore.DataStore semantics and round trips against the Firestore emulator.
+
+    FIRESTORE_EMULATOR_HOST=localhost:8080 GCLOUD_PROJECT=demo-elevatex \
+        python -m benchmarks.check_datastore [--users 20]
+
+Without FIRESTORE_EMULATOR_HOST it runs against local_backends.LocalFirestore,
+which checks the logic but not the latency. For each simulated user it compares
+the previous access patterns (delete + set overwrite, one .get() per document)
+with the DataStore ones (single set, one get_all), asserts both leave the same
+data, and reports round trips and wall time per pattern.
+"""
+import argparse
+import json
+import os
+import time
+import uuid
+
+import datastore
+from benchmarks.stats import summarize_ms
+
+
+def make_db():
+    if os.environ.get("FIRESTORE_EMULATOR_HOST"):
+        # The emulator accepts any credentials; skip Application Default Credentials.
+        from google.auth.credentials import AnonymousCredentials
+        from google.cloud import firestore
+        return firestore.Client(project=os.environ.get("GCLOUD_PROJECT", "demo-elevatex"),
+                                credentials=AnonymousCredentials()), "emulator"
+    from local_backends import LocalFirestore
+    return LocalFirestore(), "local"
+
+
+def legacy_overwrite(db, uid, data):
+    doc_ref = db.collection("resume").document(uid)
+    doc_ref.delete()
+    doc_ref.set(data, merge=False)
+    return 2
+
+
+def legacy_reads(db, uid):
+    jd_doc = db.collection("jd").document(uid).get()
+    resume_doc = db.collection("resume").document(uid).get()
+    index_doc = db.collection("resume_index").document(uid).get()
+    return [doc.to_dict() if doc.exists else None for doc in (jd_doc, resume_doc, index_doc)], 3
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, (time.perf_counter() - start) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=20)
+    args = parser.parse_args()
+
+    db, backend = make_db()
+    run = uuid.uuid4().hex[:8]
+    old_fields = {"current_job_title": "Analyst", "stale_field": "from an older extractor"}
+    new_fields = {"current_job_title": "Data Engineer", "key_skills_tools": ["Python", "SQL"]}
+    timings = {"legacy_overwrite": [], "put": [], "legacy_reads": [], "get_many": [], "batch": []}
+    round_trips = {"legacy_overwrite": 0, "legacy_reads": 0}
+    store = datastore.DataStore(db)
+    # Separate stores so the overwrite and read patterns have their own round-trip counts.
+    writes, reads = datastore.DataStore(db), datastore.DataStore(db)
+
+    for i in range(args.users):
+        uid = f"check-{run}-{i}"
+        db.collection("jd").document(uid).set({"skills": ["Python"]})
+
+        # Overwrite: both patterns must drop fields the new document doesn't have.
+        db.collection("resume").document(uid).set(old_fields)
+        trips, ms = timed(legacy_overwrite, db, uid, new_fields)
+        round_trips["legacy_overwrite"] += trips
+        timings["legacy_overwrite"].append(ms)
+        db.collection("resume").document(uid).set(old_fields)
+        _, ms = timed(writes.put, "resume", uid, new_fields)
+        timings["put"].append(ms)
+        assert store.get("resume", uid) == new_fields, "put(merge=False) must replace the document"
+
+        # Reads: same documents, same order, None for the missing index.
+        (legacy, trips), ms = timed(legacy_reads, db, uid)
+        round_trips["legacy_reads"] += trips
+        timings["legacy_reads"].append(ms)
+        batched, ms = timed(reads.get_many, [("jd", uid), ("resume", uid), ("resume_index", uid)])
+        timings["get_many"].append(ms)
+        assert batched == legacy and batched[2] is None, (batched, legacy)
+
+        # Batch: every write lands together, one commit.
+        def write_batch():
+            with store.batch() as batch:
+                batch.set("schedules", uid, {"schedule": []}, merge=True)
+                batch.delete("jd", uid)
+        _, ms = timed(write_batch)
+        timings["batch"].append(ms)
+        assert store.get_many([("schedules", uid), ("jd", uid)]) == [{"schedule": []}, None]
+
+        with store.batch() as batch:
+            for collection in ("resume", "schedules"):
+                batch.delete(collection, uid)
+
+    print(json.dumps({
+        "backend": backend,
+        "users": args.users,
+        "round_trips_per_user": {
+            "overwrite": {"legacy": round_trips["legacy_overwrite"] / args.users,
+                          "datastore": writes.total_round_trips / args.users},
+            "reads": {"legacy": round_trips["legacy_reads"] / args.users,
+                      "datastore": reads.total_round_trips / args.users},
+        },
+        "datastore_round_trips": dict(store.round_trips),
+        "latency": {name: summarize_ms(samples) for name, samples in timings.items()},
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""Per-function cold-start report: import cost of each SDK, measured in a fresh interpreter.
+
+    python -m benchmarks.cold_start_report [--runs 3] [--json]
+
+Each dependency is imported in its own subprocess (so nothing is already in
+sys.modules) and the median of `--runs` samples is compared against the
+per-function budget in startup_timing.COLD_START_BUDGETS_MS. Client init cost
+(initialize_app, spacy.load, ...) needs credentials and is reported in the
+function logs by startup_timing.track_cold_start instead.
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+from startup_timing import COLD_START_BUDGETS_MS, FUNCTION_DEPENDENCIES
+
+_PROBE = (
+    "import time, importlib\n"
+    "t = time.perf_counter()\n"
+    "importlib.import_module({module!r})\n"
+    "print((time.perf_counter() - t) * 1000)\n"
+)
+
+
+def import_cost_ms(module, runs):
+    samples = []
+    for _ in range(runs):
+        result = subprocess.run(
+            [sys.executable, "-c", _PROBE.format(module=module)],
+            capture_output=True, text=True,
+        )
+        if result.returncode != 0:
+            return None
+        samples.append(float(result.stdout.strip()))
+    return round(statistics.median(samples), 1)
+
+
+def build_report(runs):
+    modules = sorted({m for deps in FUNCTION_DEPENDENCIES.values() for m in deps} | {"firebase_functions"})
+    costs = {module: import_cost_ms(module, runs) for module in modules}
+
+    functions = {}
+    for name, deps in FUNCTION_DEPENDENCIES.items():
+        # firebase_functions is imported by main.py itself, so every function pays for it.
+        per_dep = {dep: costs[dep] for dep in ["firebase_functions"] + deps}
+        total = round(sum(v for v in per_dep.values() if v is not None), 1)
+        budget = COLD_START_BUDGETS_MS.get(name)
+        functions[name] = {
+            "imports_ms": per_dep,
+            "total_ms": total,
+            "budget_ms": budget,
+            "within_budget": budget is None or total <= budget,
+            "missing": [dep for dep, v in per_dep.items() if v is None],
+        }
+    return {"runs": runs, "import_cost_ms": costs, "functions": functions}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--json", action="store_true", help="print the raw report as JSON")
+    args = parser.parse_args()
+
+    report = build_report(args.runs)
+    if args.json:
+        print(json.dumps(report, indent=2, sort_keys=True))
+        return
+
+    for name, entry in report["functions"].items():
+        status = "OK" if entry["within_budget"] else "OVER"
+        print(f"{name:<28} {entry['total_ms']:>8.1f} ms / {entry['budget_ms']} ms  {status}")
+        for dep, cost in entry["imports_ms"].items():
+            shown = "not installed" if cost is None else f"{cost:.1f} ms"
+            print(f"    {dep:<26} {shown}")
+
+
+if __name__ == "__main__":
+    main()
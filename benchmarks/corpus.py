@@ -0,0 +1,172 @@
+"""Synthetic resumes, Vision outputs and model answers for the benchmark harnesses."""
+import json
+import random
+import re
+
+_TITLES = ["Software Engineer", "Senior Software Engineer", "Data Scientist", "DevOps Engineer",
+           "Product Manager", "Backend Developer", "Machine Learning Engineer"]
+_SKILLS = ["Python", "Java", "JavaScript", "C++", "SQL", "AWS", "Docker", "Kubernetes", "React",
+           "Angular", "Node.js", "Machine Learning", "Git", "Linux", "MySQL", "MongoDB", "TensorFlow",
+           "Pandas", "NumPy", "Agile", "Scrum", "k8s", "Terraform", "Kafka"]
+_VERBS = ["Developed", "Led", "Managed", "Designed", "Built", "Migrated", "Automated", "Owned"]
+_OBJECTS = ["a payments platform", "the data pipeline", "internal tooling", "a recommendation service",
+            "the CI/CD workflow", "customer-facing APIs", "a monitoring stack", "the mobile backend"]
+_FILLER = ["across three teams", "serving millions of users", "with strict latency targets",
+           "in an agile environment", "reducing cost by 30%", "on a tight schedule"]
+
+
+def synthetic_resume(paragraphs=8, seed=0):
+    rng = random.Random(seed)
+    title = rng.choice(_TITLES)
+    lines = [
+        "Jane Doe",
+        "SUMMARY",
+        f"{title} with {rng.randint(1, 15)} years of experience building distributed systems.",
+        "EXPERIENCE",
+        f"{title}, Example Corp  Jan {rng.randint(2010, 2020)} - Present",
+    ]
+    for _ in range(paragraphs):
+        sentence = f"{rng.choice(_VERBS)} {rng.choice(_OBJECTS)} {rng.choice(_FILLER)} using {rng.choice(_SKILLS)}."
+        lines.append(f"- {sentence} Worked on project responsibilities with {rng.choice(_SKILLS)}.")
+    lines += [
+        "EDUCATION",
+        "Bachelor in Computer Science, State University",
+        "SKILLS",
+        ", ".join(rng.sample(_SKILLS, 8)),
+        "CERTIFICATIONS",
+        "AWS Certified Solutions Architect; certified in Kubernetes administration",
+    ]
+    return "\n".join(lines) + "\n"
+
+
+def vision_output(text, pages=1, words_per_block=40):
+    """A Vision `DOCUMENT_TEXT_DETECTION` output document with per-word/symbol geometry."""
+    def box():
+        return {"normalizedVertices": [{"x": 0.1, "y": 0.1}, {"x": 0.9, "y": 0.1},
+                                       {"x": 0.9, "y": 0.2}, {"x": 0.1, "y": 0.2}]}
+
+    responses = []
+    page_texts = [text] * pages
+    for page_number, page_text in enumerate(page_texts, start=1):
+        words = page_text.split()
+        blocks = []
+        for i in range(0, len(words), words_per_block):
+            block_words = [{
+                "boundingBox": box(),
+                "symbols": [{"boundingBox": box(), "text": ch, "confidence": 0.99} for ch in word],
+                "confidence": 0.98,
+            } for word in words[i:i + words_per_block]]
+            blocks.append({"boundingBox": box(), "paragraphs": [{"boundingBox": box(), "words": block_words}],
+                           "blockType": "TEXT", "confidence": 0.97})
+        responses.append({
+            "fullTextAnnotation": {
+                "pages": [{"width": 612, "height": 792, "blocks": blocks, "confidence": 0.97}],
+                "text": page_text,
+            },
+            "context": {"uri": "gs://bucket/resumes/uid/resume.pdf", "pageNumber": page_number},
+        })
+    return {"inputConfig": {"gcsSource": {"uri": "gs://bucket/resumes/uid/resume.pdf"},
+                            "mimeType": "application/pdf"},
+            "responses": responses}
+
+
+def vision_output_bytes(text, pages=1):
+    return json.dumps(vision_output(text, pages)).encode("utf-8")
+
+
+def _pdf_escape(line):
+    return line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def text_pdf(page_texts):
+    """A minimal PDF with one Helvetica text page per entry; None makes an image-only ("scanned") page."""
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>", None,
+               "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>"]
+    page_ids = []
+    for text in page_texts:
+        if text is None:
+            # A filled rectangle stands in for the scanned image: no text operators at all.
+            content = "0.5 g 72 72 468 648 re f"
+        else:
+            lines = [f"({_pdf_escape(line)}) Tj T*" for line in text.splitlines()]
+            content = "BT /F1 10 Tf 12 TL 72 740 Td " + " ".join(lines) + " ET"
+        objects.append(f"<< /Length {len(content.encode('latin-1'))} >>\nstream\n{content}\nendstream")
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+                       f"/Resources << /Font << /F1 3 0 R >> >> /Contents {len(objects)} 0 R >>")
+        page_ids.append(len(objects))
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(f'{i} 0 R' for i in page_ids)}] /Count {len(page_ids)} >>"
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n{body}\nendobj\n".encode("latin-1")
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode("latin-1")
+    out += "".join(f"{offset:010d} 00000 n \n" for offset in offsets).encode("latin-1")
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode("latin-1")
+    return bytes(out)
+
+
+def resume_pages(text, lines_per_page=50):
+    lines = text.splitlines()
+    return ["\n".join(lines[i:i + lines_per_page]) for i in range(0, len(lines), lines_per_page)] or [""]
+
+
+def resume_document(paragraphs, scanned_pages=0, seed=0):
+    """(pdf bytes, page texts) for a synthetic resume whose first `scanned_pages` pages have no text layer."""
+    pages = resume_pages(synthetic_resume(paragraphs=paragraphs, seed=seed))
+    layer = [None if i < scanned_pages else page for i, page in enumerate(pages)]
+    return text_pdf(layer), pages
+
+
+_JD_SKILLS = ["Python", "SQL", "Kubernetes", "Docker", "Terraform", "Kafka", "AWS", "React", "Go", "Spark"]
+_FIELD_ANSWERS = {
+    "current_job_title": "Software Engineer",
+    "years_of_experience": "5 years",
+    "brief_description": "Built data pipelines and APIs.",
+    "key_skills_tools": ["Python", "SQL", "Docker"],
+    "highest_education": "Bachelor in Computer Science",
+    "certifications": ["Not Found"],
+}
+
+
+def llm_response(messages, model):
+    """Well-formed JSON answers to the prompts main.py sends to OpenAI, for local_backends.LocalOpenAI."""
+    prompt = "".join(message["content"] for message in messages)
+    rng = random.Random(prompt)
+    if skill := re.search(r"improve the skill: (.+)", prompt):
+        name = skill.group(1).strip()
+        return json.dumps({"courses": [
+            {"source": source, "title": f"Complete {name} Course {i}", "fee": rng.choice(["Free", "₹3,299"]),
+             "duration": rng.choice(["6 hours", "12 hours", "4 weeks"]),
+             "link": f"https://www.{source.lower()}.com/search?q={name}"}
+            for i, source in enumerate(["Udemy", "Coursera", "YouTube", "edX", "Udacity"], start=1)]})
+    if "job description" in prompt:
+        skills = rng.sample(_JD_SKILLS, 6)
+        return json.dumps({
+            "summary": "Own the data platform end to end. Work with product and analytics teams.",
+            "responsibilities": [f"- Build and operate services with {skill}" for skill in skills[:5]],
+            "qualifications": ["- Bachelor's degree in Computer Science", f"- {rng.randint(2, 8)}+ years of experience",
+                               "- AWS certification preferred", "- Experience mentoring engineers"],
+            "skills": [f"- {skill}" for skill in skills] + ["- Communication"],
+            "relevance": "Data platforms are central to the company's growth this year.",
+        }, indent=2)
+    if "Compare these job requirements" in prompt:
+        items = re.findall(r"^\s*- (.+)$", prompt.split("Requirements:", 1)[1].split("Resume:", 1)[0], re.MULTILINE)
+        return json.dumps({"high_priority_gaps": [f"JD requires: {item}; Not found in resume" for item in items[:1]],
+                           "low_priority_gaps": [], "technical_skills": [], "soft_skills": []})
+    if "Extract the following structured data" in prompt:
+        fields = re.findall(r"^\s*- (\w+):", prompt, re.MULTILINE)
+        return json.dumps({field: _FIELD_ANSWERS.get(field, "Not Found") for field in fields})
+    return "{}"
+
+
+def gemini_response(prompt, model):
+    """A JSON schedule for gemini_schedule's prompt, for local_backends.LocalGenAI."""
+    courses = re.search(r"completing these courses: (.+)", prompt)
+    titles = re.findall(r"([^,]+?) \([^)]*\)", courses.group(1)) if courses else []
+    start = re.search(r"Start date: (\S+)", prompt)
+    day = start.group(1) if start else "2025-01-06"
+    return json.dumps([{"Subject": title.strip(), "Start Date": day, "Start Time": "09:00", "End Date": day,
+                        "End Time": "11:00"} for title in titles])
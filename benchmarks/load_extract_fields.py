@@ -0,0 +1,87 @@
+"""Concurrent load test for extract_resume_fields on a single instance.
+
+    python -m benchmarks.load_extract_fields [--requests 64] [--concurrency 1 4 8 16]
+
+Runs the extraction core from many threads at once against in-process Storage
+and Firestore (local_backends), starting from a cold instance. It checks that
+the spaCy model is loaded exactly once no matter how many requests race for it,
+and reports latency percentiles and throughput per concurrency level.
+"""
+import argparse
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import main
+from benchmarks.corpus import synthetic_resume, vision_output_bytes
+from benchmarks.stats import peak_rss_mb, summarize_ms
+from local_backends import LocalFirestore, LocalStorageClient
+
+
+def install_local_backends(users):
+    client = LocalStorageClient()
+    bucket = client.bucket(main.BUCKET_NAME)
+    for i in range(users):
+        text = synthetic_resume(paragraphs=10, seed=i)
+        bucket.blob(f"parsed_output/user-{i}/output-1-to-1.json").upload_from_string(vision_output_bytes(text))
+    main.storage_client = client
+    main.buckets[main.BUCKET_NAME] = bucket
+    main.db = LocalFirestore()
+    main.service_state["firestore"] = main.READY
+
+
+def count_spacy_loads():
+    loads = []
+    original = main._load_spacy
+
+    def counting_loader():
+        loads.append(threading.get_ident())
+        original()
+
+    main._load_spacy = counting_loader
+    return loads
+
+
+def one_request(uid):
+    start = time.perf_counter()
+    main.init_services(load_spacy=True)
+    main.run_resume_field_extraction(uid)
+    return (time.perf_counter() - start) * 1000
+
+
+def run_level(concurrency, requests, users):
+    uids = [f"user-{i % users}" for i in range(requests)]
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        latencies = list(pool.map(one_request, uids))
+    elapsed = time.perf_counter() - start
+    return {"concurrency": concurrency, **summarize_ms(latencies),
+            "throughput_rps": round(requests / elapsed, 1)}
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=64)
+    parser.add_argument("--users", type=int, default=16)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 8, 16])
+    args = parser.parse_args()
+
+    install_local_backends(args.users)
+    loads = count_spacy_loads()
+
+    # The first level starts cold: every thread races into init_services at once.
+    levels = [run_level(c, args.requests, args.users) for c in sorted(args.concurrency, reverse=True)]
+    report = {
+        "spacy_loads": len(loads),
+        "service_state": dict(main.service_state),
+        "levels": sorted(levels, key=lambda level: level["concurrency"]),
+        "peak_rss_mb": peak_rss_mb(),
+    }
+    print(json.dumps(report, indent=2))
+    if len(loads) != 1:
+        raise SystemExit(f"expected exactly one spaCy load, got {len(loads)}")
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,68 @@
+"""spaCy init time and peak memory: legacy rebuild vs the prebuilt artifact.
+
+    python nlp_artifact.py build
+    python -m benchmarks.nlp_init_report [--runs 3]
+
+Each sample runs in a fresh interpreter so it measures a real cold start.
+"legacy" is the pre-artifact path: spacy.load("en_core_web_sm") followed by
+running the full pipeline over every pattern to build the five matchers.
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+_COMMON = (
+    "import json, resource, time\n"
+    "t = time.perf_counter()\n"
+)
+_LEGACY = _COMMON + (
+    "import spacy\n"
+    "from spacy.matcher import PhraseMatcher\n"
+    "from resume_patterns import MATCHER_PATTERNS\n"
+    "nlp = spacy.load('en_core_web_sm')\n"
+    "for label, patterns in MATCHER_PATTERNS.values():\n"
+    "    m = PhraseMatcher(nlp.vocab)\n"
+    "    m.add(label, [nlp(p) for p in patterns])\n"
+)
+_ARTIFACT = _COMMON + (
+    "import nlp_artifact\n"
+    "assert nlp_artifact.load() is not None, 'build the artifact first: python nlp_artifact.py build'\n"
+)
+_REPORT = (
+    "print(json.dumps({'init_ms': (time.perf_counter() - t) * 1000,\n"
+    "                  'peak_rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss}))\n"
+)
+
+
+def sample(code, runs):
+    results = []
+    for _ in range(runs):
+        out = subprocess.run([sys.executable, "-c", code + _REPORT], capture_output=True, text=True)
+        if out.returncode != 0:
+            raise SystemExit(out.stderr.strip().splitlines()[-1])
+        results.append(json.loads(out.stdout.strip().splitlines()[-1]))
+    return {
+        "init_ms": round(statistics.median(r["init_ms"] for r in results), 1),
+        "peak_rss_mb": round(statistics.median(r["peak_rss_kb"] for r in results) / 1024, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    before = sample(_LEGACY, args.runs)
+    after = sample(_ARTIFACT, args.runs)
+    print(json.dumps({
+        "before": before,
+        "after": after,
+        "init_speedup": round(before["init_ms"] / after["init_ms"], 2) if after["init_ms"] else None,
+        "peak_rss_saved_mb": round(before["peak_rss_mb"] - after["peak_rss_mb"], 1),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
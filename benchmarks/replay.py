@@ -0,0 +1,317 @@
+"""Offline replay of callable and storage-trigger traffic against in-process backends.
+
+    python -m benchmarks.replay [--synthetic 40] [--requests traffic.jsonl] [--event event.json]
+                                [--concurrency 4] [--out report.json] [--compare baseline.json]
+
+Request streams are JSONL, one call per line, replayed in order per uid (users
+run concurrently, `--concurrency` at a time):
+
+    {"function": "generate_jd", "uid": "user-3", "data": {"stream": true}}
+    {"function": "on_resume_storage_event", "event": {"bucket": "...", "name": "resumes/user-3/resume.pdf"}}
+
+--synthetic N adds N users' sessions over synthetic resumes of varying length
+(some with scanned pages, so both OCR paths run): upload_resume ->
+parse_resume_by_vision -> extract_resume_* -> generate_jd ->
+analyze_missing_skills -> search_courses -> schedule_and_block_courses, or
+run_career_pipeline for `--pipeline-share` of them. --event replays a storage
+event file like event.json. search_courses without "skills" uses the user's
+skill_analysis, as the app does. Every uid gets a resume.pdf, a goal and
+selected courses before the replay starts.
+
+Backends (local_backends): LocalStorageClient, LocalVisionClient, LocalOpenAI
+and LocalGenAI with the latencies below, and LocalFirestore, or the emulator
+when FIRESTORE_EMULATOR_HOST is set. spaCy is the real model when installed;
+functions that need a missing dependency show up as errors, not as skipped.
+The exit status is 1 when every call of some function failed.
+
+The report has, per function: n, errors, the first call (cold) and p50/p95/p99
+latency, throughput, and the highest RSS sampled while the function ran. "spans"
+is metrics.snapshot(): where that time went (GCS, Firestore, LLM, NLP, ...), and
+"counts" is metrics.counters(), e.g. how often each client was created or reused. Keys
+are sorted so two reports diff cleanly; --compare adds each function's p50/p95
+change against an earlier report.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+import main
+import metrics
+from benchmarks.corpus import gemini_response, llm_response, resume_document, synthetic_resume, vision_output_bytes
+from benchmarks.stats import current_rss_mb, peak_rss_mb, summarize_ms
+from local_backends import (LocalFirestore, LocalGenAI, LocalOpenAI, LocalStorageClient, LocalVisionClient,
+                            local_vision_v1)
+
+_PARAGRAPHS = [4, 8, 16, 40, 120, 400]
+_GOALS = [("Acme", "Data Engineer", "Pune"), ("Globex", "Backend Developer", "Bengaluru"),
+          ("Initech", "DevOps Engineer", "Hyderabad"), ("Umbrella", "Machine Learning Engineer", "Remote")]
+_RSS_SAMPLE_S = 0.02
+
+
+def install(args):
+    """Point main.py's clients at the local stand-ins; returns them."""
+    storage = LocalStorageClient(latency_s=args.gcs_ms / 1000)
+    vision = LocalVisionClient(storage, latency_s=args.vision_ms / 1000, page_s=args.vision_page_ms / 1000)
+    openai = LocalOpenAI(llm_response, latency_s=args.llm_ms / 1000, token_s=args.llm_token_ms / 1000)
+    genai = LocalGenAI(gemini_response, latency_s=args.llm_ms / 1000)
+    # main.py imports these SDKs inside the functions that use them.
+    sys.modules["google.cloud.vision_v1"] = local_vision_v1(lambda: vision)
+    sys.modules["google.generativeai"] = genai
+    os.environ.setdefault("GEMINI_API_KEY", "local")
+
+    main.storage_client = storage
+    main.buckets[main.BUCKET_NAME] = storage.bucket(main.BUCKET_NAME)
+    main.vision_client = vision
+    main.openai_client = openai
+    if os.environ.get("FIRESTORE_EMULATOR_HOST"):
+        from google.auth.credentials import AnonymousCredentials
+        from google.cloud import firestore
+        main.db = firestore.Client(project=os.environ.get("GCLOUD_PROJECT", "demo-elevatex"),
+                                   credentials=AnonymousCredentials())
+    else:
+        main.db = LocalFirestore()
+    main.service_state["firestore"] = main.READY
+    return SimpleNamespace(storage=storage, vision=vision, openai=openai, genai=genai)
+
+
+def seed_user(backends, uid, rng):
+    """A resume.pdf of random length (sometimes partly scanned), a goal and selected courses."""
+    paragraphs = rng.choice(_PARAGRAPHS)
+    scanned = rng.choice([0, 0, 0, 1, 8])
+    pdf, pages = resume_document(paragraphs, scanned_pages=scanned, seed=rng.randrange(1 << 30))
+    bucket = main.get_bucket()
+    bucket.blob(f"resumes/{uid}/resume.pdf").upload_from_string(pdf, content_type="application/pdf")
+    backends.vision.transcribe(f"gs://{main.BUCKET_NAME}/resumes/{uid}/resume.pdf", pages)
+
+    company, position, location = rng.choice(_GOALS)
+    main.db.collection("udata").document(uid).set({"company": company, "position": position,
+                                                   "location": location, "deadline": "2026-06-30"})
+    course = {"source": "Udemy", "title": "Complete Python Course", "duration": "12 hours", "link": "https://x"}
+    main.db.collection("selected_courses").document(uid).set({"technical_skills": {"Python": [course]}})
+    return {"paragraphs": paragraphs, "pages": len(pages), "scanned_pages": min(scanned, len(pages))}
+
+
+def synthetic_requests(users, pipeline_share, extractor, rng):
+    requests = []
+    for i in range(users):
+        uid = f"replay-{i}"
+        if rng.random() < pipeline_share:
+            # The pipeline runs the spaCy extractors only; openai maps to hybrid.
+            requests.append({"function": "run_career_pipeline", "uid": uid,
+                             "data": {"stream": rng.random() < 0.5,
+                                      "extractor": "fields" if extractor == "fields" else "hybrid"}})
+            continue
+        requests += [
+            {"function": "upload_resume", "uid": uid, "data": {"filename": "resume.pdf"}},
+            {"function": "parse_resume_by_vision", "uid": uid, "data": {}},
+            {"function": f"extract_resume_{extractor}", "uid": uid, "data": {}},
+            {"function": "generate_jd", "uid": uid, "data": {"stream": rng.random() < 0.5}},
+            {"function": "analyze_missing_skills", "uid": uid, "data": {}},
+            {"function": "search_courses", "uid": uid, "data": {}},
+            {"function": "schedule_and_block_courses", "uid": uid,
+             "data": {"start_date": "2026-01-05", "end_date": "2026-03-31", "selected_days": ["Mon", "Wed", "Sat"],
+                      "time_slot": "19:00-21:00", "hours_per_day": 2}},
+        ]
+    return requests
+
+
+def event_request(path):
+    with open(path) as f:
+        event = json.load(f)
+    parts = event["name"].split("/")
+    return {"function": "on_resume_storage_event", "uid": parts[1] if len(parts) > 1 else "replay-event",
+            "event": event}
+
+
+_REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def app_function(fn):
+    """The function under the SDK's decorators (on_call_wrapped, cross_origin), i.e. the
+    track_cold_start / metrics.traced stack. functools.wraps copies __module__ onto every
+    layer, so a layer is recognized as the repo's own by where its code lives."""
+    while hasattr(fn, "__wrapped__"):
+        filename = os.path.abspath(fn.__code__.co_filename) if hasattr(fn, "__code__") else ""
+        if filename.startswith(_REPO_ROOT + os.sep) and "site-packages" not in filename:
+            break
+        fn = fn.__wrapped__
+    return fn
+
+
+def call(request):
+    function = request["function"]
+    fn = app_function(getattr(main, function))
+    if function == "on_resume_storage_event":
+        event = request["event"]
+        fn(SimpleNamespace(data=SimpleNamespace(bucket=event.get("bucket"), name=event["name"])))
+        return {"status": "success"}
+    data = dict(request.get("data") or {})
+    if function == "search_courses" and "skills" not in data:
+        analysis = main.datastore.DataStore(main.db).get("skill_analysis", request["uid"]) or {}
+        data["skills"] = main.course_skills(analysis)
+    return fn(SimpleNamespace(auth=SimpleNamespace(uid=request["uid"]), data=data))
+
+
+class Recorder:
+    """Per-function latencies, errors, wall-clock span and RSS sampled while the function runs."""
+
+    def __init__(self):
+        self.samples = defaultdict(list)
+        self.errors = defaultdict(list)
+        self.spans = {}
+        self.rss = defaultdict(float)
+        self._active = defaultdict(int)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._sampler = threading.Thread(target=self._sample, daemon=True)
+
+    def _sample(self):
+        while not self._stop.wait(_RSS_SAMPLE_S):
+            rss = current_rss_mb()
+            with self._lock:
+                for function, active in self._active.items():
+                    if active:
+                        self.rss[function] = max(self.rss[function], rss)
+
+    def __enter__(self):
+        self._sampler.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._sampler.join()
+
+    def run(self, request):
+        function = request["function"]
+        with self._lock:
+            self._active[function] += 1
+        start = time.perf_counter()
+        try:
+            response = call(request)
+            error = response.get("error") if response.get("status") == "failed" else None
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+        end = time.perf_counter()
+        rss = current_rss_mb()
+        with self._lock:
+            self._active[function] -= 1
+            self.rss[function] = max(self.rss[function], rss)
+            self.samples[function].append((end - start) * 1000)
+            first, last = self.spans.get(function, (start, end))
+            self.spans[function] = (min(first, start), max(last, end))
+            if error is not None:
+                self.errors[function].append(str(error))
+
+    def report(self):
+        functions = {}
+        for function, samples in self.samples.items():
+            first, last = self.spans[function]
+            errors = self.errors.get(function, [])
+            functions[function] = {
+                **summarize_ms(samples),
+                "first_ms": round(samples[0], 2),
+                "errors": len(errors),
+                "error_examples": sorted(set(errors))[:3],
+                "throughput_rps": round(len(samples) / max(last - first, 1e-9), 2),
+                "rss_mb": self.rss[function],
+            }
+        return functions
+
+
+def compare(report, baseline):
+    changes = {}
+    for function, now in report["functions"].items():
+        before = baseline.get("functions", {}).get(function)
+        if not before:
+            continue
+        changes[function] = {
+            key: {"before": before[key], "after": now[key],
+                  "change_pct": round((now[key] - before[key]) / before[key] * 100, 1) if before[key] else None}
+            for key in ("p50_ms", "p95_ms")}
+    return changes
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--synthetic", type=int, default=40, help="synthetic users (0 for none)")
+    parser.add_argument("--requests", help="JSONL request stream to replay")
+    parser.add_argument("--event", help="storage event file to replay, e.g. event.json")
+    parser.add_argument("--pipeline-share", type=float, default=0.25)
+    parser.add_argument("--extractor", choices=["fields", "openai", "hybrid"], default="fields")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--gcs-ms", type=float, default=15.0)
+    parser.add_argument("--vision-ms", type=float, default=400.0)
+    parser.add_argument("--vision-page-ms", type=float, default=50.0)
+    parser.add_argument("--llm-ms", type=float, default=300.0, help="time to first token")
+    parser.add_argument("--llm-token-ms", type=float, default=2.0)
+    parser.add_argument("--out", help="also write the report here")
+    parser.add_argument("--compare", help="earlier report to compare p50/p95 against")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    requests = synthetic_requests(args.synthetic, args.pipeline_share, args.extractor, rng)
+    if args.requests:
+        with open(args.requests) as f:
+            requests += [json.loads(line) for line in f if line.strip()]
+    if args.event:
+        requests.append(event_request(args.event))
+
+    backends = install(args)
+    sessions = defaultdict(list)
+    for request in requests:
+        sessions[request.setdefault("uid", "replay-user")].append(request)
+    corpus = {uid: seed_user(backends, uid, rng) for uid in sessions}
+    for request in requests:
+        # A recorded trigger on the Vision output needs that output to exist.
+        name = request.get("event", {}).get("name", "")
+        if main.VISION_OUTPUT_RE.match(name):
+            main.get_bucket().blob(name).upload_from_string(
+                vision_output_bytes(synthetic_resume(paragraphs=rng.choice(_PARAGRAPHS), seed=len(name))))
+
+    def run_session(uid):
+        for request in sessions[uid]:
+            recorder.run(request)
+
+    start = time.perf_counter()
+    with Recorder() as recorder, ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        list(pool.map(run_session, list(sessions)))
+    wall_s = time.perf_counter() - start
+
+    report = {
+        "config": {key: value for key, value in vars(args).items() if key not in ("out", "compare")},
+        "corpus": {"users": len(corpus),
+                   "pages": summarize_ms([user["pages"] for user in corpus.values()]),
+                   "partly_scanned": sum(1 for user in corpus.values() if user["scanned_pages"])},
+        "requests": len(requests),
+        "wall_s": round(wall_s, 2),
+        "throughput_rps": round(len(requests) / wall_s, 2),
+        "peak_rss_mb": peak_rss_mb(),
+        "functions": recorder.report(),
+        "spans": metrics.snapshot(),
+        "counts": metrics.counters(),
+        "backends": {"openai": dict(backends.openai.usage), "vision": dict(backends.vision.calls),
+                     "gemini": dict(backends.genai.calls), "gcs_rpcs": main.get_bucket().rpc_count},
+    }
+    if args.compare:
+        with open(args.compare) as f:
+            report["compare"] = compare(report, json.load(f))
+    output = json.dumps(report, indent=2, sort_keys=True, ensure_ascii=False)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(output + "\n")
+    print(output)
+    failing = sorted(function for function, stats in report["functions"].items() if stats["errors"] == stats["n"])
+    if failing:
+        sys.exit(f"Every call failed for: {', '.join(failing)}")
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,92 @@
+"""Content-hash cache for the resume parse and extraction stages.
+
+Every stage result is keyed on the Cloud Storage content hash of its input
+(resume.pdf for "parse", output-1-to-1.json for the extractors) plus a stage
+version, and stored in `resume_cache/{uid}`, one map per stage:
+
+    {"parse":          {"key": "md5:...", "version": "2", "output_key": "md5:...", ...},
+     "extract_fields": {"key": "md5:...", "version": "1:senter:...", "result": {...}, ...}}
+
+A new upload with different bytes, or a bumped version, no longer matches and
+is recomputed; `invalidate` drops entries explicitly (the callables' `force`).
+"""
+import logging
+import threading
+from collections import Counter
+from datetime import datetime
+
+import metrics
+
+logger = logging.getLogger('resume-parsing')
+
+COLLECTION = "resume_cache"
+
+# Bump when a stage's output for the same input changes (new OCR routing, prompt, fields, ...).
+PARSE_VERSION = "1"
+EXTRACT_FIELDS_VERSION = "2"
+EXTRACT_OPENAI_VERSION = "1"
+EXTRACT_HYBRID_VERSION = "1"
+
+_stats = Counter()
+_stats_lock = threading.Lock()
+
+
+def content_key(blob):
+    # GCS has no MD5 for composite objects; CRC32C is always present.
+    if getattr(blob, "md5_hash", None):
+        return f"md5:{blob.md5_hash}"
+    if getattr(blob, "crc32c", None):
+        return f"crc32c:{blob.crc32c}"
+    return None
+
+
+def _count(stage, outcome):
+    with _stats_lock:
+        _stats[f"{stage}.{outcome}"] += 1
+
+
+def stats():
+    with _stats_lock:
+        return dict(_stats)
+
+
+def lookup(db, uid, stage, key, version, check=None):
+    """The cached entry for this input and version, or None.
+
+    `check(entry)` can veto a hit whose stored output has since gone away.
+    """
+    if key is None:
+        _count(stage, "miss")
+        return None
+    with metrics.span("firestore.get", collection=COLLECTION):
+        snapshot = db.collection(COLLECTION).document(uid).get()
+    entry = (snapshot.to_dict() or {}).get(stage) if snapshot.exists else None
+    if entry is None:
+        outcome = "miss"
+    elif entry.get("key") != key or entry.get("version") != version:
+        outcome = "stale"
+    elif check is not None and not check(entry):
+        outcome = "stale"
+    else:
+        outcome = "hit"
+    _count(stage, outcome)
+    logger.info(f"Cache {outcome} for {stage} ({uid})")
+    return entry if outcome == "hit" else None
+
+
+def store(db, uid, stage, key, version, **fields):
+    if key is None:
+        return
+    entry = {"key": key, "version": version, "cached_at": datetime.utcnow().isoformat(), **fields}
+    # merge=[stage] replaces just this stage's map and leaves the other stages alone.
+    with metrics.span("firestore.set", collection=COLLECTION):
+        db.collection(COLLECTION).document(uid).set({stage: entry}, merge=[stage])
+
+
+def invalidate(db, uid, stage=None):
+    doc_ref = db.collection(COLLECTION).document(uid)
+    if stage is None:
+        doc_ref.delete()
+    else:
+        doc_ref.set({stage: None}, merge=[stage])
+    _count(stage or "all", "invalidated")
@@ -0,0 +1,137 @@
+"""Deterministic study-plan scheduler for schedule_and_block_courses.
+
+Packs the selected courses, in order, into the user's study days: every
+selected weekday between start_date and end_date gets one session window that
+starts at the beginning of `time_slot` and lasts `hours_per_day` (clipped to
+the slot). A course longer than a day's window continues on the next study day;
+a day with time left starts the next course. Sundays stay free unless the
+hours don't fit without them, and then only as many as needed are used.
+Output rows match what the Flutter calendar reads from schedules/{uid}:
+
+    {"Subject": ..., "Start Date": "2025-03-03", "Start Time": "09:00",
+     "End Date": "2025-03-03", "End Time": "10:30"}
+"""
+import math
+import re
+from collections import namedtuple
+from datetime import date, timedelta
+
+import extraction_rules
+
+CATEGORIES = ('technical_skills', 'soft_skills', 'high_priority_gaps', 'low_priority_gaps')
+DAY_NAMES = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
+SUNDAY = 6
+# Sessions are laid out on a 15-minute grid.
+STEP_MINUTES = 15
+
+Course = namedtuple("Course", ["title", "duration", "hours"])
+Plan = namedtuple("Plan", ["sessions", "unscheduled", "sundays_used"])
+
+_SLOT_RE = re.compile(r'^\s*(\d{1,2}):(\d{2})\s*-\s*(\d{1,2}):(\d{2})\s*$')
+
+
+def course_hours(duration):
+    """Study hours in a course's duration string ("6.5 hours", "2h 30m", "4 weeks")."""
+    return extraction_rules.duration_hours(duration)
+
+
+def collect_courses(courses_data):
+    """Courses from a selected_courses document, in category order."""
+    courses = []
+    for category in CATEGORIES:
+        for skill, skill_courses in courses_data.get(category, {}).items():
+            for course in skill_courses:
+                duration = course.get('duration', '0 hours')
+                courses.append(Course(course['title'], duration, course_hours(duration)))
+    return courses
+
+
+def parse_time_slot(time_slot):
+    """"9:00-11:00" -> (540, 660) minutes after midnight."""
+    match = _SLOT_RE.match(time_slot or "")
+    if not match:
+        raise ValueError(f"Unrecognized time slot '{time_slot}', expected HH:MM-HH:MM")
+    start_h, start_m, end_h, end_m = map(int, match.groups())
+    start, end = start_h * 60 + start_m, end_h * 60 + end_m
+    if not 0 <= start < end <= 24 * 60:
+        raise ValueError(f"Invalid time slot '{time_slot}'")
+    return start, end
+
+
+def parse_days(selected_days):
+    """Weekday numbers (Mon=0) for "Mon"/"Monday"/"mon"."""
+    weekdays = set()
+    for day in selected_days or []:
+        prefix = str(day).strip()[:3].title()
+        if prefix not in DAY_NAMES:
+            raise ValueError(f"Unrecognized day '{day}'")
+        weekdays.add(DAY_NAMES.index(prefix))
+    if not weekdays:
+        raise ValueError("No study days selected")
+    return weekdays
+
+
+def study_days(start, end, weekdays):
+    day = start
+    while day <= end:
+        if day.weekday() in weekdays:
+            yield day
+        day += timedelta(days=1)
+
+
+def _clock(minutes):
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+def build_schedule(courses, start_date, end_date, selected_days, time_slot, hours_per_day):
+    start = date.fromisoformat(start_date)
+    end = date.fromisoformat(end_date)
+    if end < start:
+        raise ValueError("End date is before start date")
+    slot_start, slot_end = parse_time_slot(time_slot)
+    weekdays = parse_days(selected_days)
+    daily = min(int(float(hours_per_day) * 60) // STEP_MINUTES * STEP_MINUTES, slot_end - slot_start)
+    if daily <= 0:
+        raise ValueError("hours_per_day must allow at least one 15-minute session")
+
+    # Whole course hours, rounded up to the grid; zero-length courses have nothing to schedule.
+    queue = [[course.title, math.ceil(course.hours * 60 / STEP_MINUTES) * STEP_MINUTES]
+             for course in courses if course.hours > 0]
+    needed = sum(minutes for _, minutes in queue)
+
+    days = list(study_days(start, end, weekdays - {SUNDAY}))
+    sundays_used = 0
+    shortfall = needed - len(days) * daily
+    if SUNDAY in weekdays and shortfall > 0:
+        # Only as many Sundays as the hours need, taken from the end of the range.
+        sundays = list(study_days(start, end, {SUNDAY}))
+        extra = sundays[-math.ceil(shortfall / daily):]
+        days = sorted(days + extra)
+        sundays_used = len(extra)
+
+    sessions = []
+    index = 0
+    for day in days:
+        if index == len(queue):
+            break
+        clock = slot_start
+        free = daily
+        day_str = day.isoformat()
+        while free and index < len(queue):
+            title, remaining = queue[index]
+            take = min(free, remaining)
+            sessions.append({
+                "Subject": title,
+                "Start Date": day_str,
+                "Start Time": _clock(clock),
+                "End Date": day_str,
+                "End Time": _clock(clock + take),
+            })
+            clock += take
+            free -= take
+            queue[index][1] = remaining - take
+            if queue[index][1] == 0:
+                index += 1
+
+    unscheduled = [{"Subject": title, "hours": round(minutes / 60, 2)} for title, minutes in queue[index:] if minutes]
+    return Plan(sessions, unscheduled, sundays_used)
@@ -0,0 +1,107 @@
+"""Data-access layer over the Firestore client that counts its round trips.
+
+    store = DataStore(db)
+    jd, resume = store.get_many([("jd", uid), ("resume", uid)])  # one get_all, dicts or None
+    store.put("resume", uid, entities)                            # one overwrite (set, merge=False)
+    with store.batch() as batch:                                   # one commit
+        batch.set("schedules", uid, {...}, merge=True)
+        batch.delete("selected_courses", uid)
+    store.round_trips  # Counter({"get_all": 1, "set": 1, "commit": 1})
+
+A full overwrite is a single `set(merge=False)`; it already replaces every field,
+so the former delete-then-set pairs were two sequential round trips for the
+same result. Each DataStore counts the calls made through it (create one per
+request for per-call numbers); `stats()` totals every store in the process.
+Every round trip is also a metrics span ("firestore.get", ...) with the
+collection and the payload size.
+"""
+import threading
+from collections import Counter
+from contextlib import contextmanager
+
+import metrics
+
+_stats = Counter()
+_stats_lock = threading.Lock()
+
+
+def stats():
+    with _stats_lock:
+        return dict(_stats)
+
+
+class _Batch:
+    def __init__(self, store):
+        self._store = store
+        self._batch = store.db.batch()
+        self.writes = 0
+
+    def set(self, collection, doc_id, data, merge=False):
+        self._batch.set(self._store.ref(collection, doc_id), data, merge=merge)
+        self.writes += 1
+
+    def delete(self, collection, doc_id):
+        self._batch.delete(self._store.ref(collection, doc_id))
+        self.writes += 1
+
+
+class DataStore:
+    def __init__(self, db):
+        self.db = db
+        self.round_trips = Counter()
+
+    def _count(self, op):
+        self.round_trips[op] += 1
+        with _stats_lock:
+            _stats[op] += 1
+
+    @property
+    def total_round_trips(self):
+        return sum(self.round_trips.values())
+
+    def ref(self, collection, doc_id):
+        return self.db.collection(collection).document(doc_id)
+
+    def get(self, collection, doc_id):
+        """The document as a dict, or None if it doesn't exist."""
+        self._count("get")
+        with metrics.span("firestore.get", collection=collection) as span:
+            snapshot = self.ref(collection, doc_id).get()
+            data = snapshot.to_dict() if snapshot.exists else None
+            span.set(bytes=metrics.payload_size(data))
+        return data
+
+    def get_many(self, keys):
+        """Dicts (or None) for [(collection, doc_id), ...], in order, from a single get_all."""
+        refs = [self.ref(collection, doc_id) for collection, doc_id in keys]
+        if not refs:
+            return []
+        self._count("get_all")
+        with metrics.span("firestore.get_all", collection=",".join(sorted({c for c, _ in keys})),
+                          items=len(refs)) as span:
+            # get_all yields snapshots in arbitrary order.
+            found = {snapshot.reference.path: snapshot.to_dict() if snapshot.exists else None
+                     for snapshot in self.db.get_all(refs)}
+            span.set(bytes=sum(metrics.payload_size(data) for data in found.values()))
+        return [found.get(ref.path) for ref in refs]
+
+    def put(self, collection, doc_id, data, merge=False):
+        """Write a document in one round trip; merge=False replaces it entirely."""
+        self._count("set")
+        with metrics.span("firestore.set", collection=collection, bytes=metrics.payload_size(data)):
+            self.ref(collection, doc_id).set(data, merge=merge)
+
+    def delete(self, collection, doc_id):
+        self._count("delete")
+        with metrics.span("firestore.delete", collection=collection):
+            self.ref(collection, doc_id).delete()
+
+    @contextmanager
+    def batch(self):
+        """Writes queued in the block are committed atomically on exit, in one round trip."""
+        batch = _Batch(self)
+        yield batch
+        if batch.writes:
+            self._count("commit")
+            with metrics.span("firestore.commit", items=batch.writes):
+                batch._batch.commit()
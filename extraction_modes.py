@@ -0,0 +1,86 @@
+"""spaCy execution modes and text chunking for extract_resume_fields.
+
+Only two extracted fields touch the spaCy pipeline: `brief_description` needs
+sentence boundaries and `highest_education` needs tokens (for the phrase
+matchers). A mode picks which component provides sentence boundaries; every
+other component is disabled per call, which is thread-safe unlike
+nlp.select_pipes.
+
+    full         whole en_core_web_sm pipeline, sentences from the parser (legacy)
+    senter       statistical sentence recognizer only
+    sentencizer  rule-based punctuation sentencizer only (fastest)
+"""
+import os
+
+DEFAULT_MODE = os.environ.get("EXTRACTION_MODE", "senter")
+DEFAULT_CHUNK_CHARS = int(os.environ.get("EXTRACTION_CHUNK_CHARS", "20000"))
+
+# Component that supplies doc.sents in each mode (None = whatever the full pipeline runs).
+SENTENCE_COMPONENT = {"full": None, "senter": "senter", "sentencizer": "sentencizer"}
+
+# What each spaCy-derived field needs from the pipeline.
+FIELD_NEEDS = {"brief_description": "sents", "highest_education": "tokens"}
+
+
+def prepare_pipeline(nlp):
+    """Make every mode runnable on a loaded pipeline (called once at load time)."""
+    if "senter" in nlp.disabled:
+        nlp.enable_pipe("senter")
+    if "sentencizer" not in nlp.pipe_names:
+        nlp.add_pipe("sentencizer")
+    return nlp
+
+
+def available_modes(nlp):
+    modes = ["sentencizer"]
+    if "senter" in nlp.pipe_names:
+        modes.append("senter")
+    if "parser" in nlp.pipe_names:
+        modes.append("full")
+    return modes
+
+
+def resolve_mode(nlp, mode=None):
+    mode = mode or DEFAULT_MODE
+    if mode not in SENTENCE_COMPONENT:
+        raise ValueError(f"Unknown extraction mode '{mode}', expected one of {sorted(SENTENCE_COMPONENT)}")
+    if mode not in available_modes(nlp):
+        # e.g. "full" on the trimmed artifact pipeline, which has no parser.
+        return "senter" if "senter" in nlp.pipe_names else "sentencizer"
+    return mode
+
+
+def disabled_components(nlp, mode, fields=None):
+    """Pipe names to pass as nlp.pipe(disable=...) for this mode and set of fields."""
+    needs = {FIELD_NEEDS[field] for field in (fields or FIELD_NEEDS) if field in FIELD_NEEDS}
+    if "sents" not in needs:
+        return list(nlp.pipe_names)
+    if mode == "full":
+        return [name for name in ("senter", "sentencizer") if name in nlp.pipe_names]
+    keep = {SENTENCE_COMPONENT[mode]}
+    if "tok2vec" in nlp.pipe_names and keep & set(nlp.get_pipe("tok2vec").listening_components):
+        keep.add("tok2vec")
+    return [name for name in nlp.pipe_names if name not in keep]
+
+
+def chunk_text(text, max_chars=None):
+    """Split long OCR text into chunks of at most max_chars, preferring paragraph and line breaks.
+
+    Keeps parser/senter memory bounded and lets nlp.pipe batch the work.
+    """
+    max_chars = max_chars or DEFAULT_CHUNK_CHARS
+    if len(text) <= max_chars:
+        return [text]
+    chunks = []
+    start = 0
+    while start < len(text):
+        end = min(start + max_chars, len(text))
+        if end < len(text):
+            for separator in ("\n\n", "\n", ". ", " "):
+                cut = text.rfind(separator, start + max_chars // 2, end)
+                if cut != -1:
+                    end = cut + len(separator)
+                    break
+        chunks.append(text[start:end])
+        start = end
+    return chunks
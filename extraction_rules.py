@@ -0,0 +1,137 @@
+"""Precompiled regex rules for the resume fields that don't need spaCy, in one pass.
+
+Every rule is a named group in a single alternation, so `scan` walks the text
+once with finditer instead of one re.findall per field:
+
+    found = scan(full_text)
+    found.stated_years      # "6 years of experience"          -> [6.0]
+    found.job_titles        # "worked as Data Engineer"        -> ["Data Engineer"]
+    found.certifications    # "certified in Kubernetes"        -> ["Kubernetes"]
+    found.date_ranges       # "Jan 2019 – Present", "2016-2018" -> [DateRange(...)]
+
+Trigger phrases consume only themselves and capture their tail in a lookahead,
+so a tail ("Data Engineer at Acme, Jan 2019 - ...") is still scanned for the
+other rules. `experience_years` turns date ranges into total years, merging
+overlapping jobs. `duration_hours` parses course durations ("2h 30m",
+"4 weeks") for course_scheduler.
+"""
+import functools
+import re
+from collections import namedtuple
+from datetime import date
+
+Scan = namedtuple("Scan", ["stated_years", "job_titles", "certifications", "date_ranges"])
+# start/end are month indexes (year * 12 + month - 1); end is exclusive.
+DateRange = namedtuple("DateRange", ["start", "end", "offset", "text"])
+
+_MONTHS = {"jan": 1, "feb": 2, "mar": 3, "apr": 4, "may": 5, "jun": 6,
+           "jul": 7, "aug": 8, "sep": 9, "oct": 10, "nov": 11, "dec": 12}
+_MONTH = (r"(?:jan(?:uary)?|feb(?:ruary)?|mar(?:ch)?|apr(?:il)?|may|june?|july?|aug(?:ust)?"
+          r"|sep(?:t(?:ember)?)?|oct(?:ober)?|nov(?:ember)?|dec(?:ember)?)\.?")
+
+
+def _date(prefix):
+    # The month name is captured inside a lookahead and then matched by backreference: a
+    # lookahead is atomic, so "january" can't backtrack to "jan" (the effect of an atomic
+    # group, which re only supports from Python 3.11). "\s*(?:,\s*)?" splits the
+    # whitespace around a comma only one way.
+    return (rf"(?:(?=(?P<{prefix}_mname>{_MONTH}))(?P={prefix}_mname)\s*(?:,\s*)?"
+            rf"|(?P<{prefix}_mnum>0?[1-9]|1[0-2])\s*[/.]\s*)?"
+            rf"(?P<{prefix}_year>(?:19|20)\d{{2}})")
+
+
+_RULES = [
+    ("years", r"(?P<years_n>\d+(?:\.\d+)?)\s*\+?\s*(?:years|yrs)\s*(?:of\s*)?experience"),
+    ("title", r"(?:worked as|currently|last position as)\b(?=\s*(?P<title_text>[A-Za-z ]+))"),
+    ("cert", r"(?:certified in|certification in)\b(?=\s*(?P<cert_text>[A-Za-z ]+))"),
+    ("range", rf"{_date('from')}\s*(?:-|–|—|to|till|until)\s*"
+              rf"(?:{_date('to')}|(?P<present>present|current|now|till date|to date))\b"),
+]
+# Every rule starts at a word boundary with a digit or one of these letters; checking that first
+# lets most positions fail before any alternative is tried (see _date for how the month names
+# are kept from backtracking).
+_FIRST_CHARS = "0-9jfmasondcwl"
+RULES_RE = re.compile(rf"\b(?=[{_FIRST_CHARS}])(?:"
+                      + "|".join(f"(?P<{name}>{pattern})" for name, pattern in _RULES) + ")", re.IGNORECASE)
+
+# Course durations: every "<number> <unit>" is summed; a bare number is hours.
+_DURATION_RE = re.compile(
+    r"(?P<n>\d+(?:\.\d+)?)\s*(?:(?:-|to)\s*\d+(?:\.\d+)?\s*)?"
+    r"(?P<unit>hours?|hrs?|h\b|minutes?|mins?|m\b|days?|weeks?|wks?|months?)?", re.IGNORECASE)
+# Self-paced courses quoted in days, weeks or months: about an hour a day, five hours a week.
+HOURS_PER_UNIT = {"h": 1.0, "m": 1 / 60, "d": 1.0, "w": 5.0, "mo": 20.0}
+
+
+def _month_index(match, prefix):
+    year = int(match.group(f"{prefix}_year"))
+    name, number = match.group(f"{prefix}_mname"), match.group(f"{prefix}_mnum")
+    if name:
+        return year * 12 + _MONTHS[name[:3].lower()] - 1, True
+    if number:
+        return year * 12 + int(number) - 1, True
+    return year * 12, False
+
+
+def _date_range(match, today):
+    start, _ = _month_index(match, "from")
+    if match.group("present"):
+        end = today.year * 12 + today.month  # through the current month
+    else:
+        end, has_month = _month_index(match, "to")
+        # "Jan 2019 - Mar 2019" includes March; "2016 - 2018" is two years.
+        end += 1 if has_month else 0
+    if end <= start or start > today.year * 12 + today.month - 1:
+        return None
+    return DateRange(start, end, match.start(), match.group(0))
+
+
+def scan(text, today=None):
+    today = today or date.today()
+    stated_years, job_titles, certifications, date_ranges = [], [], [], []
+    for match in RULES_RE.finditer(text):
+        kind = match.lastgroup
+        if kind == "years":
+            stated_years.append(float(match.group("years_n")))
+        elif kind == "title":
+            job_titles.append(match.group("title_text").strip())
+        elif kind == "cert":
+            certifications.append(match.group("cert_text").strip())
+        elif kind == "range":
+            found = _date_range(match, today)
+            if found:
+                date_ranges.append(found)
+    return Scan(stated_years, [t for t in job_titles if t], [c for c in certifications if c], date_ranges)
+
+
+def experience_years(date_ranges, spans=None):
+    """Total years covered by the ranges (overlaps counted once), only those inside `spans` if given."""
+    if spans is not None:
+        date_ranges = [r for r in date_ranges if any(start <= r.offset < end for start, end in spans)]
+    months = 0
+    current_start = current_end = None
+    for start, end in sorted((r.start, r.end) for r in date_ranges):
+        if current_end is None or start > current_end:
+            if current_end is not None:
+                months += current_end - current_start
+            current_start, current_end = start, end
+        else:
+            current_end = max(current_end, end)
+    if current_end is not None:
+        months += current_end - current_start
+    return round(months / 12, 1)
+
+
+def format_years(years):
+    return f"{years:g} years"
+
+
+# Course lists repeat a handful of duration strings ("12 hours", "4 weeks").
+@functools.lru_cache(maxsize=1024)
+def duration_hours(text):
+    """"6.5 hours" -> 6.5, "2h 30m" -> 2.5, "45 minutes" -> 0.75, "4 weeks" -> 20.0, "" -> 0.0."""
+    hours = 0.0
+    for match in _DURATION_RE.finditer(text or ""):
+        unit = (match.group("unit") or "h").lower()
+        key = "mo" if unit.startswith("mo") else unit[0]
+        hours += float(match.group("n")) * HOURS_PER_UNIT[key]
+    return round(hours, 2)
@@ -0,0 +1,187 @@
+"""Cross-user cache for LLM responses that depend only on a few prompt inputs.
+
+    cache = LLMCache("generate_jd", ttl_s=7 * 24 * 3600, max_entries=512)
+    value, source = cache.get_or_compute(inputs, params, compute, db=db)
+
+Keys are a hash of the namespace, the normalized inputs and the model
+parameters (model, temperature, prompt version, ...), so any change to the
+prompt or model is a different key. Lookups go through two tiers:
+
+    memory     per-instance LRU, bounded by `max_entries`, entries expire after ttl_s
+    firestore  llm_cache/{key}, shared by all instances; `expires_at` is also the
+               field for a Firestore TTL policy, which bounds the collection's size
+
+Identical concurrent requests make a single upstream call: within an instance
+later callers wait on the first one, and across instances the first caller
+leaves a short `pending` lease in the Firestore document that others poll.
+"""
+import hashlib
+import json
+import logging
+import re
+import threading
+import time
+from collections import Counter, OrderedDict
+from datetime import datetime, timedelta, timezone
+
+import metrics
+
+logger = logging.getLogger('resume-parsing')
+
+COLLECTION = "llm_cache"
+# How long another instance's in-flight call is waited for before computing anyway.
+LEASE_S = 30
+POLL_S = 0.5
+# Firestore documents are limited to 1 MiB.
+MAX_VALUE_BYTES = 900 * 1024
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize(value):
+    """Case- and whitespace-insensitive form of a prompt input."""
+    if value is None:
+        return ""
+    return _WHITESPACE.sub(" ", str(value)).strip().casefold()
+
+
+def cache_key(namespace, inputs, params):
+    payload = json.dumps({"ns": namespace, "inputs": inputs, "params": params}, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class LLMCache:
+    def __init__(self, namespace, ttl_s, max_entries, collection=COLLECTION):
+        self.namespace = namespace
+        self.ttl_s = ttl_s
+        self.max_entries = max_entries
+        self.collection = collection
+        self._entries = OrderedDict()  # key -> (expires_at monotonic, value)
+        self._flights = {}
+        self._lock = threading.Lock()
+        self._stats = Counter()
+
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self._entries), **self._stats}
+
+    def _count(self, name):
+        with self._lock:
+            self._stats[name] += 1
+
+    def _memory_get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def _memory_put(self, key, value, ttl_s=None):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + (ttl_s or self.ttl_s), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get_or_compute(self, inputs, params, compute, db=None):
+        """Return (value, source) with source one of "memory", "firestore", "computed", "coalesced"."""
+        key = cache_key(self.namespace, inputs, params)
+        value = self._memory_get(key)
+        if value is not None:
+            self._count("memory_hit")
+            return value, "memory"
+
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+        if not leader:
+            self._count("coalesced")
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value, "coalesced"
+
+        try:
+            value, source = self._load_or_compute(key, inputs, compute, db)
+            flight.value = value
+            return value, source
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
+            flight.done.set()
+
+    def _load_or_compute(self, key, inputs, compute, db):
+        doc_ref = db.collection(self.collection).document(key) if db is not None else None
+        if doc_ref is not None:
+            # Includes waiting out another instance's lease.
+            with metrics.span("firestore.llm_cache_get", namespace=self.namespace):
+                value, remaining_s = self._firestore_get(doc_ref)
+            if value is not None:
+                self._count("firestore_hit")
+                self._memory_put(key, value, remaining_s)
+                return value, "firestore"
+
+        self._count("miss")
+        try:
+            value = compute()
+        except Exception:
+            if doc_ref is not None:
+                doc_ref.delete()  # release the lease so other instances stop waiting
+            raise
+        self._memory_put(key, value)
+        if doc_ref is not None:
+            self._firestore_put(doc_ref, inputs, value)
+        return value, "computed"
+
+    def _firestore_get(self, doc_ref):
+        # Returns (value, remaining ttl in seconds), waiting out another instance's lease first.
+        deadline = time.monotonic() + LEASE_S
+        while True:
+            snapshot = doc_ref.get()
+            data = snapshot.to_dict() if snapshot.exists else None
+            now = datetime.now(timezone.utc)
+            if data and not data.get("pending") and data.get("expires_at") and data["expires_at"] > now:
+                return data["value"], (data["expires_at"] - now).total_seconds()
+            leased = data and data.get("pending") and data.get("lease_until") and data["lease_until"] > now
+            if not leased or time.monotonic() >= deadline:
+                break
+            self._count("lease_wait")
+            time.sleep(POLL_S)
+        # Take the lease ourselves; a race here only costs a duplicate upstream call.
+        doc_ref.set({"namespace": self.namespace, "pending": True,
+                     "lease_until": now + timedelta(seconds=LEASE_S),
+                     "expires_at": now + timedelta(seconds=LEASE_S)})
+        return None, None
+
+    def _firestore_put(self, doc_ref, inputs, value):
+        size = len(json.dumps(value).encode("utf-8"))
+        if size > MAX_VALUE_BYTES:
+            logger.warning(f"{self.namespace} response too large for the shared cache; kept in memory only")
+            doc_ref.delete()
+            return
+        now = datetime.now(timezone.utc)
+        with metrics.span("firestore.set", collection=self.collection, bytes=size):
+            doc_ref.set({
+                "namespace": self.namespace,
+                "inputs": inputs,
+                "value": value,
+                "pending": False,
+                "created_at": now,
+                "expires_at": now + timedelta(seconds=self.ttl_s),
+            })
@@ -0,0 +1,238 @@
+"""Streamed chat completions parsed as JSON while they arrive.
+
+    value, raw, timings = stream_json(openai_client, on_item, model=..., messages=..., max_tokens=...)
+
+The completion is requested with stream=True and fed chunk by chunk to
+IncrementalJSON, a single-pass scanner over the top-level object. Each
+top-level member and each element of a top-level array is handed to
+`on_item(path, value)` as soon as its closing character arrives, already
+decoded by json.loads:
+
+    {"summary": "...",            -> on_item(("summary",), "...")
+     "courses": [{...},           -> on_item(("courses", 0), {...})
+                 {...}]}          -> on_item(("courses", 1), {...}), on_item(("courses",), [...])
+
+so callers can write each finished section to Firestore while the rest is still
+being generated. `timings` has first_item_ms (time to the first complete
+section) and total_ms, and the call is an "llm.stream" metrics span with the
+token counts. PartialWriter coalesces those writes when items arrive faster
+than they are worth writing.
+"""
+import json
+import threading
+import time
+
+import metrics
+
+_WHITESPACE = " \t\r\n"
+
+
+class IncrementalJSON:
+    """Incremental parser for one JSON object; feed() returns the (path, value) items completed so far."""
+
+    def __init__(self):
+        self._text = ""
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._expect = "object"    # object, key, colon, value, scalar, after
+        self._key_start = None
+        self._key = None
+        self._value_start = None
+        self._array = False        # the current top-level value is an array
+        self._item_start = None
+        self._item_index = 0
+        self.value = {}
+        self.complete = False
+
+    def feed(self, chunk):
+        if self.complete or not chunk:
+            return []
+        self._text += chunk
+        items = []
+        text = self._text
+        for i in range(self._pos, len(text)):
+            c = text[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif c == "\\":
+                    self._escape = True
+                elif c == '"':
+                    self._in_string = False
+                    if self._key_start is not None:
+                        self._key = json.loads(text[self._key_start:i + 1])
+                        self._key_start = None
+                        self._expect = "colon"
+                continue
+            if self._expect == "object":
+                if c == "{":  # anything before the object (```json, prose) is skipped
+                    self._depth = 1
+                    self._expect = "key"
+                continue
+            if self._depth == 1:
+                self._top_level(c, i, text, items)
+                if self.complete:
+                    break
+            else:
+                self._nested(c, i, text, items)
+        self._pos = len(text)
+        return items
+
+    def _top_level(self, c, i, text, items):
+        expect = self._expect
+        if expect == "key":
+            if c == '"':
+                self._key_start = i
+                self._in_string = True
+            elif c == "}":
+                self.complete = True
+        elif expect == "colon":
+            if c == ":":
+                self._expect = "value"
+        elif expect == "value":
+            if c in _WHITESPACE:
+                return
+            self._value_start = i
+            if c in "{[":
+                self._depth = 2
+                self._array = c == "["
+                self._item_start = None
+                self._item_index = 0
+            else:
+                self._expect = "scalar"
+                self._in_string = c == '"'
+        elif expect == "scalar":
+            if c in ",}":
+                self._emit(items, (self._key,), text[self._value_start:i].strip())
+                self._expect = "key"
+                self.complete = c == "}"
+        elif expect == "after":
+            if c == ",":
+                self._expect = "key"
+            elif c == "}":
+                self.complete = True
+
+    def _nested(self, c, i, text, items):
+        if self._array and self._depth == 2:
+            if self._item_start is None:
+                if c in _WHITESPACE or c == ",":
+                    return
+                if c == "]":
+                    self._close(i, text, items)
+                    return
+                self._item_start = i
+            elif c in ",]":
+                # A scalar item ends here; container items end at their closing bracket.
+                self._emit_item(items, text[self._item_start:i])
+                if c == "]":
+                    self._close(i, text, items)
+                return
+        if c == '"':
+            self._in_string = True
+        elif c in "{[":
+            self._depth += 1
+        elif c in "}]":
+            self._close(i, text, items)
+
+    def _close(self, i, text, items):
+        self._depth -= 1
+        if self._depth == 1:
+            self._emit(items, (self._key,), text[self._value_start:i + 1])
+            self._expect = "after"
+        elif self._array and self._depth == 2 and self._item_start is not None:
+            self._emit_item(items, text[self._item_start:i + 1])
+
+    def _emit_item(self, items, raw):
+        items.append(((self._key, self._item_index), json.loads(raw)))
+        self._item_index += 1
+        self._item_start = None
+
+    def _emit(self, items, path, raw):
+        value = json.loads(raw)
+        self.value[path[0]] = value
+        items.append((path, value))
+
+
+def stream_json(openai_client, on_item, **create_kwargs):
+    """Stream a chat completion, calling on_item for every completed section.
+
+    Returns (parsed object, raw text, timings). Raises ValueError if the stream ends
+    before the object is complete (e.g. cut off at max_tokens); sections already
+    delivered stay delivered.
+    """
+    parser = IncrementalJSON()
+    parts = []
+    usage = None
+    first_item_ms = None
+    start = time.perf_counter()
+    with metrics.span("llm.stream", model=create_kwargs.get("model")) as span:
+        stream = openai_client.chat.completions.create(stream=True, stream_options={"include_usage": True},
+                                                       **create_kwargs)
+        for chunk in stream:
+            if getattr(chunk, "usage", None) is not None:
+                usage = chunk.usage
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content
+            if not delta:
+                continue
+            parts.append(delta)
+            for path, value in parser.feed(delta):
+                if first_item_ms is None:
+                    first_item_ms = (time.perf_counter() - start) * 1000
+                on_item(path, value)
+        raw = "".join(parts)
+        timings = {"first_item_ms": round(first_item_ms, 1) if first_item_ms is not None else None,
+                   "total_ms": round((time.perf_counter() - start) * 1000, 1)}
+        if usage is not None:
+            timings.update(prompt_tokens=usage.prompt_tokens, completion_tokens=usage.completion_tokens)
+        span.usage(usage)
+        span.set(chars=len(raw), first_item_ms=timings["first_item_ms"])
+    if not parser.complete:
+        raise ValueError(f"Streamed response ended before the JSON object was complete ({len(raw)} chars)")
+    return parser.value, raw, timings
+
+
+def _deep_merge(target, update):
+    for key, value in update.items():
+        if isinstance(value, dict) and isinstance(target.get(key), dict):
+            _deep_merge(target[key], value)
+        else:
+            target[key] = value
+    return target
+
+
+class PartialWriter:
+    """Merges partial updates and writes them at most every `min_interval_s` (thread-safe).
+
+    `write(fields)` is called with the merged pending fields, e.g. a Firestore
+    set(..., merge=True); flush() writes whatever is still pending.
+    """
+
+    def __init__(self, write, min_interval_s=0.0):
+        self._write = write
+        self._min_interval_s = min_interval_s
+        self._pending = {}
+        self._last = 0.0
+        self._lock = threading.Lock()
+        self.writes = 0
+
+    def update(self, fields):
+        with self._lock:
+            _deep_merge(self._pending, fields)
+            if time.monotonic() - self._last >= self._min_interval_s:
+                self._flush_locked()
+
+    def flush(self):
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self):
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, {}
+        self._last = time.monotonic()
+        self.writes += 1
+        self._write(pending)
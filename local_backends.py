@@ -0,0 +1,609 @@
+"""In-process stand-ins for Cloud Storage, Firestore, Vision, OpenAI and Gemini.
+
+Used by the batch job and the benchmark harnesses to exercise main.py without
+GCP or model APIs. They implement only the subset of the client APIs that
+main.py calls; the model stand-ins answer through a `respond` callable and
+simulate latency, so timings are repeatable.
+"""
+import base64
+import contextlib
+import copy
+import hashlib
+import io
+import itertools
+import json
+import os
+import threading
+import time
+import types
+import zlib
+from collections import Counter
+from types import SimpleNamespace
+
+
+class _MemoryStore:
+    def __init__(self):
+        self._objects = {}
+        self._lock = threading.Lock()
+
+    def get(self, name):
+        with self._lock:
+            return self._objects.get(name)
+
+    def put(self, name, data):
+        with self._lock:
+            self._objects[name] = data
+
+    def delete(self, name):
+        with self._lock:
+            return self._objects.pop(name, None) is not None
+
+    def names(self):
+        with self._lock:
+            return sorted(self._objects)
+
+
+class _DirectoryStore:
+    """Objects are plain files under `root`, so fixtures can be dropped in by hand."""
+
+    def __init__(self, root):
+        self.root = root
+
+    def _path(self, name):
+        return os.path.join(self.root, *name.split("/"))
+
+    def get(self, name):
+        try:
+            with open(self._path(name), "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def put(self, name, data):
+        path = self._path(name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(data)
+
+    def delete(self, name):
+        try:
+            os.remove(self._path(name))
+            return True
+        except FileNotFoundError:
+            return False
+
+    def names(self):
+        found = []
+        for dirpath, _, filenames in os.walk(self.root):
+            for filename in filenames:
+                rel = os.path.relpath(os.path.join(dirpath, filename), self.root)
+                found.append(rel.replace(os.sep, "/"))
+        return sorted(found)
+
+
+try:
+    # Raise the same exception types as the real clients so callers' handlers work unchanged.
+    from google.api_core.exceptions import Conflict, FailedPrecondition, NotFound
+except ImportError:
+    class NotFound(Exception):
+        pass
+
+    class Conflict(Exception):
+        pass
+
+    class FailedPrecondition(Exception):
+        pass
+
+
+class LocalBlob:
+    def __init__(self, bucket, name):
+        self.bucket = bucket
+        self.name = name
+        self.metadata = None
+        self.content_type = None
+        self._load_properties()
+
+    def _data(self):
+        data = self.bucket._store.get(self.name)
+        if data is None:
+            raise NotFound(f"gs://{self.bucket.name}/{self.name}")
+        return data
+
+    def _load_properties(self):
+        data = self.bucket._store.get(self.name)
+        if data is None:
+            self.md5_hash = self.crc32c = self.generation = self.size = None
+            return
+        self.size = len(data)
+        self.md5_hash = base64.b64encode(hashlib.md5(data).digest()).decode()
+        self.crc32c = base64.b64encode(zlib.crc32(data).to_bytes(4, "big")).decode()
+        self.generation = self.bucket._generations.get(self.name)
+        self.metadata = self.bucket._metadata.get(self.name)
+
+    def exists(self):
+        self.bucket._rpc()
+        return self.bucket._store.get(self.name) is not None
+
+    def reload(self):
+        self.bucket._rpc()
+        self._data()
+        self._load_properties()
+
+    def download_as_bytes(self):
+        self.bucket._rpc()
+        return self._data()
+
+    def download_as_text(self, encoding="utf-8"):
+        self.bucket._rpc()
+        return self._data().decode(encoding)
+
+    def download_to_file(self, file_obj):
+        self.bucket._rpc()
+        file_obj.write(self._data())
+
+    def open(self, mode="rb", chunk_size=None):
+        if mode not in ("r", "rb"):
+            raise ValueError("LocalBlob.open only supports reading")
+        self.bucket._rpc()
+        stream = io.BytesIO(self._data())
+        return stream if mode == "rb" else io.TextIOWrapper(stream, encoding="utf-8")
+
+    def upload_from_string(self, data, content_type=None):
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        self.bucket._rpc()
+        self.bucket._write(self.name, data, self.metadata)
+        self.content_type = content_type
+        self._load_properties()
+
+    def patch(self):
+        self.bucket._rpc()
+        self.bucket._metadata[self.name] = self.metadata
+
+    def delete(self):
+        self.bucket._rpc()
+        if not self.bucket._store.delete(self.name):
+            raise NotFound(f"gs://{self.bucket.name}/{self.name}")
+        self.bucket._metadata.pop(self.name, None)
+
+
+class LocalBucket:
+    def __init__(self, name, root=None, latency_s=0.0, client=None):
+        self.name = name
+        self.latency_s = latency_s
+        self.client = client
+        self.rpc_count = 0
+        self._store = _DirectoryStore(root) if root else _MemoryStore()
+        self._generations = {}
+        self._metadata = {}
+        self._generation_lock = threading.Lock()
+
+    def _rpc(self):
+        # Simulated network round trip; calls inside client.batch() share one.
+        if self.client is not None and getattr(self.client._batching, "active", False):
+            return
+        self.rpc_count += 1
+        if self.latency_s:
+            time.sleep(self.latency_s)
+
+    def _write(self, name, data, metadata=None):
+        with self._generation_lock:
+            self._generations[name] = self._generations.get(name, 0) + 1
+        if metadata is not None:
+            self._metadata[name] = metadata
+        self._store.put(name, data)
+
+    def blob(self, name):
+        return LocalBlob(self, name)
+
+    def get_blob(self, name):
+        blob = LocalBlob(self, name)
+        return blob if blob.exists() else None
+
+    def list_blobs(self, prefix=""):
+        self._rpc()
+        return [LocalBlob(self, name) for name in self._store.names() if name.startswith(prefix)]
+
+    def rename_blob(self, blob, new_name):
+        # Like GCS, a rename is a copy plus a delete.
+        self._rpc()
+        data = blob._data()
+        self._write(new_name, data, self._metadata.get(blob.name))
+        blob.delete()
+        return LocalBlob(self, new_name)
+
+    def delete_blobs(self, blobs, on_error=None):
+        for blob in blobs:
+            try:
+                blob.delete()
+            except NotFound:
+                if on_error is None:
+                    raise
+                on_error(blob)
+
+
+class LocalStorageClient:
+    """Drop-in for storage.Client(); `root` makes buckets directories under it."""
+
+    def __init__(self, root=None, latency_s=0.0):
+        self.root = root
+        self.latency_s = latency_s
+        self._buckets = {}
+        self.batch_requests = 0
+        self._batching = threading.local()  # batch() is per thread, like the real client's
+
+    def bucket(self, name):
+        if name not in self._buckets:
+            root = os.path.join(self.root, name) if self.root else None
+            self._buckets[name] = LocalBucket(name, root, self.latency_s, self)
+        return self._buckets[name]
+
+    @contextlib.contextmanager
+    def batch(self):
+        self._batching.active = True
+        try:
+            yield
+        finally:
+            self._batching.active = False
+            self.batch_requests += 1
+            if self.latency_s:
+                time.sleep(self.latency_s)
+
+
+class LocalSnapshot:
+    def __init__(self, reference, data, update_time=None):
+        self.reference = reference
+        self.id = reference.id
+        self._data = data
+        self.update_time = update_time
+
+    @property
+    def exists(self):
+        return self._data is not None
+
+    def to_dict(self):
+        return copy.deepcopy(self._data) if self._data is not None else None
+
+
+class LocalDocument:
+    def __init__(self, db, collection, doc_id):
+        self._db = db
+        self.id = doc_id
+        self.path = f"{collection}/{doc_id}"
+
+    def get(self):
+        return LocalSnapshot(self, *self._db._read_versioned(self.path))
+
+    def set(self, data, merge=False):
+        self._db._write(self.path, data, merge)
+
+    def create(self, data):
+        self._db._write(self.path, data, "create")
+
+    def update(self, data, option=None):
+        if self._db._read(self.path) is None:
+            raise NotFound(self.path)
+        self._db._write(self.path, data, "update", option)
+
+    def delete(self):
+        self._db._delete(self.path)
+
+
+class LocalCollection:
+    def __init__(self, db, name):
+        self._db = db
+        self.id = name
+
+    def document(self, doc_id):
+        return LocalDocument(self._db, self.id, doc_id)
+
+    def stream(self):
+        prefix = f"{self.id}/"
+        for path in self._db._paths(prefix):
+            yield LocalSnapshot(self.document(path[len(prefix):]), self._db._read(path))
+
+
+class LocalWriteBatch:
+    def __init__(self, db):
+        self._db = db
+        self._ops = []
+
+    def set(self, reference, data, merge=False):
+        self._ops.append(("set", reference, data, merge))
+
+    def update(self, reference, data):
+        self._ops.append(("set", reference, data, "update"))
+
+    def delete(self, reference):
+        self._ops.append(("delete", reference, None, False))
+
+    def commit(self):
+        self._db.commits += 1
+        with self._db._lock:
+            for op, reference, data, merge in self._ops:
+                if op == "set":
+                    self._db._write_locked(reference.path, data, merge)
+                else:
+                    self._db._docs.pop(reference.path, None)
+                    self._db._update_times.pop(reference.path, None)
+        self._ops = []
+
+
+class LocalBulkWriter(LocalWriteBatch):
+    def on_write_error(self, callback):
+        pass  # local writes do not fail
+
+    def flush(self):
+        self.commit()
+
+    def close(self):
+        self.commit()
+
+
+def _merge_maps(target, data):
+    for key, value in data.items():
+        if isinstance(value, dict) and isinstance(target.get(key), dict):
+            _merge_maps(target[key], value)
+        else:
+            target[key] = value
+
+
+class LocalFirestore:
+    """Thread-safe in-memory Firestore with the client methods main.py uses."""
+
+    def __init__(self):
+        self._docs = {}
+        self._update_times = {}
+        self._clock = itertools.count(1)
+        self._lock = threading.Lock()
+        self.commits = 0
+
+    def collection(self, name):
+        return LocalCollection(self, name)
+
+    def batch(self):
+        return LocalWriteBatch(self)
+
+    def bulk_writer(self):
+        return LocalBulkWriter(self)
+
+    def write_option(self, last_update_time):
+        return SimpleNamespace(last_update_time=last_update_time)
+
+    def get_all(self, references):
+        for reference in references:
+            yield LocalSnapshot(reference, self._read(reference.path))
+
+    def _paths(self, prefix):
+        with self._lock:
+            return sorted(p for p in self._docs if p.startswith(prefix) and "/" not in p[len(prefix):])
+
+    def _read(self, path):
+        with self._lock:
+            data = self._docs.get(path)
+            return copy.deepcopy(data) if data is not None else None
+
+    def _read_versioned(self, path):
+        # (data, update_time); update_time is a counter standing in for the commit timestamp.
+        with self._lock:
+            data = self._docs.get(path)
+            return (copy.deepcopy(data) if data is not None else None), self._update_times.get(path)
+
+    def _write(self, path, data, merge, option=None):
+        self.commits += 1
+        with self._lock:
+            if merge == "create" and path in self._docs:
+                raise Conflict(f"Document already exists: {path}")
+            if option is not None and self._update_times.get(path) != option.last_update_time:
+                raise FailedPrecondition(f"{path} was updated since {option.last_update_time}")
+            self._write_locked(path, data, merge)
+
+    def _write_locked(self, path, data, merge):
+        # set(merge=True) merges nested maps field by field, like Firestore; update() replaces
+        # each top-level field it names.
+        data = copy.deepcopy(data)
+        self._update_times[path] = next(self._clock)
+        if merge == "update" and path in self._docs:
+            self._docs[path].update(data)
+        elif merge and path in self._docs:
+            _merge_maps(self._docs[path], data)
+        else:
+            self._docs[path] = data
+
+    def _delete(self, path):
+        self.commits += 1
+        with self._lock:
+            self._docs.pop(path, None)
+            self._update_times.pop(path, None)
+
+
+class _Message:
+    """Keyword-argument record standing in for a vision_v1 proto message."""
+
+    def __init__(self, **fields):
+        self.__dict__.update(fields)
+
+
+def local_vision_v1(client_factory):
+    """A module with the vision_v1 types main.py builds requests from; ImageAnnotatorClient() is client_factory()."""
+    module = types.ModuleType("google.cloud.vision_v1")
+    module.Feature = type("Feature", (_Message,), {"Type": SimpleNamespace(DOCUMENT_TEXT_DETECTION=1)})
+    for name in ("GcsSource", "InputConfig", "GcsDestination", "OutputConfig", "AsyncAnnotateFileRequest",
+                 "AnnotateFileRequest"):
+        setattr(module, name, type(name, (_Message,), {}))
+    module.ImageAnnotatorClient = client_factory
+    return module
+
+
+class _LocalOperation:
+    def __init__(self, name, done, errors):
+        self.operation = SimpleNamespace(name=name)
+        self._done = done
+        self._errors = errors
+
+    def done(self):
+        return self._done.is_set()
+
+    def result(self, timeout=None):
+        if not self._done.wait(timeout):
+            raise TimeoutError(f"{self.operation.name} did not finish in {timeout}s")
+        if self._errors:
+            raise self._errors[0]
+        return SimpleNamespace()
+
+
+class LocalVisionClient:
+    """Drop-in for vision_v1.ImageAnnotatorClient() reading PDFs from a LocalStorageClient.
+
+    "OCR" returns the text registered for the PDF's URI with transcribe(), else the
+    PDF's own text layer (pdf_text), else a placeholder per page. Each request costs
+    `latency_s` plus `page_s` per page. async_batch_annotate_files writes the output
+    shards under the destination prefix from a background thread, like the real
+    long-running operation.
+    """
+
+    def __init__(self, storage_client, latency_s=0.0, page_s=0.0):
+        self.storage_client = storage_client
+        self.latency_s = latency_s
+        self.page_s = page_s
+        self.calls = Counter()
+        self._transcripts = {}
+        self._operations = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self.transport = SimpleNamespace(operations_client=SimpleNamespace(get_operation=self._get_operation))
+
+    def transcribe(self, uri, page_texts):
+        self._transcripts[uri] = list(page_texts)
+
+    def _blob(self, uri):
+        bucket, _, name = uri[len("gs://"):].partition("/")
+        return self.storage_client.bucket(bucket).blob(name)
+
+    def _page_texts(self, uri):
+        if uri in self._transcripts:
+            return self._transcripts[uri]
+        import pdf_text
+        texts = pdf_text.page_texts(self._blob(uri).download_as_bytes()) or [None]
+        return [text if text is not None else f"Scanned page {page}" for page, text in enumerate(texts, start=1)]
+
+    def _count(self, call):
+        with self._lock:
+            self.calls[call] += 1
+
+    def batch_annotate_files(self, requests):
+        self._count("batch_annotate_files")
+        responses = []
+        for request in requests:
+            texts = self._page_texts(request.input_config.gcs_source.uri)
+            time.sleep(self.latency_s + self.page_s * len(request.pages))
+            responses.append(SimpleNamespace(responses=[
+                SimpleNamespace(error=SimpleNamespace(message=""),
+                                full_text_annotation=SimpleNamespace(text=texts[page - 1]))
+                for page in request.pages]))
+        return SimpleNamespace(responses=responses)
+
+    def async_batch_annotate_files(self, requests):
+        self._count("async_batch_annotate_files")
+        import pdf_text
+        name = f"operations/local-{next(self._ids)}"
+        done, errors = threading.Event(), []
+
+        def run():
+            try:
+                for request in requests:
+                    texts = self._page_texts(request.input_config.gcs_source.uri)
+                    time.sleep(self.latency_s + self.page_s * len(texts))
+                    prefix = request.output_config.gcs_destination.uri
+                    size = getattr(request.output_config, "batch_size", None) or 20
+                    for start in range(0, len(texts), size):
+                        shard = texts[start:start + size]
+                        self._blob(f"{prefix}output-{start + 1}-to-{start + len(shard)}.json").upload_from_string(
+                            json.dumps(pdf_text.vision_output(shard)), content_type="application/json")
+            except Exception as e:
+                errors.append(e)
+            finally:
+                done.set()
+
+        self._operations[name] = done
+        threading.Thread(target=run, name=name, daemon=True).start()
+        return _LocalOperation(name, done, errors)
+
+    def _get_operation(self, name):
+        done = self._operations.get(name)
+        return SimpleNamespace(name=name, done=done is not None and done.is_set())
+
+
+class LocalOpenAI:
+    """Drop-in for openai.OpenAI(): chat.completions.create answered by respond(messages, model).
+
+    Tokens are counted as characters / 4. A completion takes `latency_s` to the first
+    token and `token_s` per output token, is cut at max_tokens like the API
+    (finish_reason "length"), and with stream=True arrives as token-sized delta chunks
+    followed by a usage chunk. `usage` totals calls and tokens across threads.
+    """
+
+    CHARS_PER_TOKEN = 4
+
+    def __init__(self, respond=None, latency_s=0.0, token_s=0.0):
+        self.respond = respond or (lambda messages, model: "{}")
+        self.latency_s = latency_s
+        self.token_s = token_s
+        self.usage = Counter()
+        self._lock = threading.Lock()
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def _create(self, model, messages, max_tokens=None, temperature=None, stream=False, stream_options=None,
+                **kwargs):
+        content = self.respond(messages, model)
+        finish_reason = "stop"
+        if max_tokens is not None and len(content) > max_tokens * self.CHARS_PER_TOKEN:
+            content, finish_reason = content[:max_tokens * self.CHARS_PER_TOKEN], "length"
+        prompt_tokens = sum(len(message["content"]) for message in messages) // self.CHARS_PER_TOKEN
+        completion_tokens = -(-len(content) // self.CHARS_PER_TOKEN)
+        usage = SimpleNamespace(prompt_tokens=prompt_tokens, completion_tokens=completion_tokens,
+                                total_tokens=prompt_tokens + completion_tokens)
+        with self._lock:
+            self.usage.update(calls=1, prompt_tokens=prompt_tokens, completion_tokens=completion_tokens)
+        if stream:
+            return self._stream(content, usage, finish_reason, bool((stream_options or {}).get("include_usage")))
+        time.sleep(self.latency_s + completion_tokens * self.token_s)
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content),
+                                                        finish_reason=finish_reason)], usage=usage)
+
+    def _stream(self, content, usage, finish_reason, include_usage):
+        time.sleep(self.latency_s)
+        step = self.CHARS_PER_TOKEN
+        for i in range(0, len(content), step):
+            time.sleep(self.token_s)
+            last = i + step >= len(content)
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=content[i:i + step]),
+                                                           finish_reason=finish_reason if last else None)],
+                                  usage=None)
+        if include_usage:
+            yield SimpleNamespace(choices=[], usage=usage)
+
+
+class LocalGenAI:
+    """Stand-in for the google.generativeai module: configure() and GenerativeModel(name).generate_content()."""
+
+    def __init__(self, respond=None, latency_s=0.0):
+        self.respond = respond or (lambda prompt, model: "[]")
+        self.latency_s = latency_s
+        self.calls = Counter()
+        self._lock = threading.Lock()
+
+    def configure(self, api_key=None, **kwargs):
+        pass
+
+    def GenerativeModel(self, model_name, **kwargs):
+        genai = self
+
+        class _Model:
+            def generate_content(self, prompt, **kwargs):
+                with genai._lock:
+                    genai.calls[model_name] += 1
+                time.sleep(genai.latency_s)
+                return SimpleNamespace(text=genai.respond(prompt, model_name))
+
+        return _Model()
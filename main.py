@@ -1,120 +1,222 @@
+import asyncio
 import json
 import os
-import tempfile
-import logging
-from datetime import datetime
-from firebase_admin import credentials, firestore, initialize_app
-from firebase_functions import https_fn, storage_fn, options
-from google.cloud import storage
-from google.cloud import vision_v1
-import spacy
-from spacy.matcher import PhraseMatcher
-from openai import OpenAI
 import re
-import google.generativeai as genai  # Added for Gemini API
-
-# Configure logging to output to Cloud Logging
-logger = logging.getLogger('resume-parsing')
-logger.setLevel(logging.INFO)  # Ensure INFO level logs are captured
-handler = logging.StreamHandler()
-handler.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
-logger.addHandler(handler)
-
-# Initialize Firebase Admin SDK
-logger.info("Initializing Firebase Admin SDK...")
-try:
-    initialize_app(credentials.ApplicationDefault())
-    logger.info("Firebase Admin SDK initialized successfully.")
-except Exception as e:
-    logger.error(f"Failed to initialize Firebase Admin SDK: {str(e)}")
-    raise
-
-# Log environment variables for debugging
-logger.info(f"Environment variables: {dict(os.environ)}")
-
-# Initialize OpenAI client using environment variable
-openai_api_key = os.environ.get("OPENAI_API_KEY")
-if not openai_api_key:
-    logger.warning("OpenAI API key not found in environment variables.")
-openai_client = OpenAI(api_key=openai_api_key) if openai_api_key else None
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+import content_cache
+import course_scheduler
+import datastore
+import extraction_modes
+import extraction_rules
+import llm_cache
+import llm_stream
+import metrics
+import pipeline_dag
+import pdf_text
+import resume_index
+import resume_sections
+import skill_gap
+import structured_logging
+import vision_text
+from startup_timing import timed, track_cold_start
+
+with timed("firebase_functions"):
+    from firebase_functions import https_fn, storage_fn, options
+
+# Structured JSON logs for Cloud Logging, written from a background thread; levels, sampling,
+# size caps and redaction are configured by environment (see structured_logging.py).
+logger = structured_logging.configure('resume-parsing')
+
+# Heavy SDKs (Firebase Admin, Storage, Vision, spaCy, OpenAI, Gemini) are imported lazily
+# by the functions that use them, so a cold start only pays for its own dependencies.
+# See startup_timing.py for the per-dependency report and budgets.
+
+BUCKET_NAME = "login-app-b82df.firebasestorage.app"
 
 # Globals
+firebase_app = None
+openai_client = None
 db = None
+storage_client = None
+vision_client = None
+buckets = {}
 nlp = None
-job_title_matcher = None
-skills_matcher = None
 education_matcher = None
 field_matcher = None
-certification_matcher = None
-
-def init_services(load_spacy=False):
-    global db, nlp, job_title_matcher, skills_matcher, education_matcher, field_matcher, certification_matcher
+taxonomies = None
+
+_firebase_lock = threading.Lock()
+
+def init_firebase():
+    global firebase_app
+    if firebase_app is None:
+        with _firebase_lock:
+            if firebase_app is not None:
+                return firebase_app
+            logger.info("Initializing Firebase Admin SDK...")
+            try:
+                with timed("firebase_admin"):
+                    from firebase_admin import credentials, initialize_app
+                with timed("firebase_admin.initialize_app"):
+                    firebase_app = initialize_app(credentials.ApplicationDefault())
+                logger.info("Firebase Admin SDK initialized successfully.")
+            except Exception as e:
+                logger.error(f"Failed to initialize Firebase Admin SDK: {str(e)}")
+                raise
+    return firebase_app
+
+def get_openai_client():
+    global openai_client
+    if openai_client is None:
+        # Initialize OpenAI client using environment variable
+        openai_api_key = os.environ.get("OPENAI_API_KEY")
+        if not openai_api_key:
+            logger.warning("OpenAI API key not found in environment variables.")
+            return None
+        with timed("openai"):
+            from openai import OpenAI
+        with timed("openai.client"):
+            openai_client = OpenAI(api_key=openai_api_key)
+    return openai_client
+
+# Process-wide client registry: each client/bucket handle is created once per instance and
+# shared across requests (and threads) so HTTP/gRPC connections and auth tokens are reused.
+# Every lookup is counted ("client.created.storage", "client.reused.bucket", ...) in the
+# invocation's spans record and in the metrics summary.
+_clients_lock = threading.Lock()
+
+def _count_client(kind, name):
+    metrics.count(f"client.{kind}.{name}")
+
+def get_storage_client():
+    global storage_client
+    if storage_client is None:
+        with _clients_lock:
+            if storage_client is None:
+                with timed("google.cloud.storage"):
+                    from google.cloud import storage
+                with timed("storage.client"):
+                    storage_client = storage.Client()
+                _count_client("created", "storage")
+                return storage_client
+    _count_client("reused", "storage")
+    return storage_client
+
+def get_bucket(bucket_name=BUCKET_NAME):
+    bucket = buckets.get(bucket_name)
+    if bucket is None:
+        client = get_storage_client()
+        with _clients_lock:
+            if bucket_name not in buckets:
+                buckets[bucket_name] = client.bucket(bucket_name)
+                _count_client("created", "bucket")
+                return buckets[bucket_name]
+            bucket = buckets[bucket_name]
+    _count_client("reused", "bucket")
+    return bucket
+
+def get_vision_client():
+    global vision_client
+    if vision_client is None:
+        with _clients_lock:
+            if vision_client is None:
+                with timed("google.cloud.vision_v1"):
+                    from google.cloud import vision_v1
+                with timed("vision.client"):
+                    vision_client = vision_v1.ImageAnnotatorClient()
+                _count_client("created", "vision")
+                return vision_client
+    _count_client("reused", "vision")
+    return vision_client
+
+# Readiness of the lazily-initialized services. Each service has its own lock so the first
+# request on an instance loads it exactly once (single flight) while concurrent requests
+# wait for that load instead of starting their own.
+NOT_LOADED, LOADING, READY, FAILED = "not_loaded", "loading", "ready", "failed"
+service_state = {"firestore": NOT_LOADED, "spacy": NOT_LOADED, "taxonomy": NOT_LOADED}
+_service_locks = {"firestore": threading.Lock(), "spacy": threading.Lock(), "taxonomy": threading.Lock()}
+
+def _single_flight(service, loader):
+    if service_state[service] == READY:
+        return False
+    with _service_locks[service]:
+        if service_state[service] == READY:
+            return False
+        # A previous FAILED load is retried by the next request.
+        service_state[service] = LOADING
+        try:
+            loader()
+        except Exception:
+            service_state[service] = FAILED
+            raise
+        service_state[service] = READY
+        return True
+
+def _load_firestore():
+    global db
+    init_firebase()
+    logger.info("Initializing Firestore client...")
+    with timed("firestore.client"):
+        from firebase_admin import firestore
+        db = firestore.client()
+    logger.info("Firestore client initialized successfully.")
+
+def _load_spacy():
+    global nlp, education_matcher, field_matcher
+    logger.info("Initializing spaCy model...")
+    with timed("spacy"):
+        import spacy
+        import nlp_artifact
+
+    # Prefer the prebuilt artifact (see nlp_artifact.py); rebuild from the full model otherwise.
+    with timed("spacy.artifact"):
+        artifact = nlp_artifact.load()
+    if artifact is not None:
+        loaded_nlp, matchers = artifact
+        logger.info("spaCy model and matchers loaded from prebuilt artifact.")
+    else:
+        with timed("spacy.load"):
+            loaded_nlp = spacy.load("en_core_web_sm")
+        with timed("spacy.matchers"):
+            matchers = nlp_artifact.build_matchers(loaded_nlp)
+        logger.info("spaCy model and matchers built from en_core_web_sm.")
+
+    education_matcher = matchers["education"]
+    field_matcher = matchers["field"]
+    nlp = extraction_modes.prepare_pipeline(loaded_nlp)
+    logger.info(f"spaCy pipeline: {nlp.pipe_names}, modes: {extraction_modes.available_modes(nlp)}")
+
+def _load_taxonomies():
+    global taxonomies
+    logger.info("Loading skill, soft skill, job title and certification taxonomies...")
+    with timed("taxonomy"):
+        from taxonomy import DEFAULT_NAMES, load_taxonomies
+        taxonomies = load_taxonomies(DEFAULT_NAMES + ("soft_skills",))
+    logger.info(f"Taxonomies loaded: { {name: len(t) for name, t in taxonomies.items()} }")
+
+def init_services(load_spacy=False, load_taxonomy=False):
     try:
-        if db is None:
-            logger.info("Initializing Firestore client...")
-            db = firestore.client()
-            logger.info("Firestore client initialized successfully.")
-
-        if load_spacy and nlp is None:
-            logger.info("Initializing spaCy model...")
-            nlp = spacy.load("en_core_web_sm")
-            logger.info("spaCy model initialized successfully.")
-
-            job_title_matcher = PhraseMatcher(nlp.vocab)
-            job_titles = [
-                "Software Engineer", "Senior Software Engineer", "Product Manager", "Data Scientist",
-                "Project Manager", "DevOps Engineer", "System Administrator", "Web Developer",
-                "Frontend Developer", "Backend Developer", "Full Stack Developer", "Machine Learning Engineer"
-            ]
-            job_title_patterns = [nlp(title) for title in job_titles]
-            job_title_matcher.add("JOB_TITLE", job_title_patterns)
-            logger.info("PhraseMatcher initialized for job titles.")
-
-            skills_matcher = PhraseMatcher(nlp.vocab)
-            skills = [
-                "Python", "Java", "JavaScript", "C++", "SQL", "AWS", "Docker", "Kubernetes",
-                "React", "Angular", "Node.js", "Machine Learning", "Data Analysis", "Project Management",
-                "Git", "Linux", "MySQL", "MongoDB", "TensorFlow", "Pandas", "NumPy", "Agile", "Scrum"
-            ]
-            skills_patterns = [nlp(skill) for skill in skills]
-            skills_matcher.add("SKILL", skills_patterns)
-            logger.info("PhraseMatcher initialized for skills/tools.")
-
-            education_matcher = PhraseMatcher(nlp.vocab)
-            education_levels = [
-                "Bachelor", "Master", "PhD", "Associate", "Diploma", "B.S.", "M.S.", "MBA", "B.A.", "M.A."
-            ]
-            education_patterns = [nlp(level) for level in education_levels]
-            education_matcher.add("EDUCATION_LEVEL", education_patterns)
-            logger.info("PhraseMatcher initialized for education levels.")
-
-            field_matcher = PhraseMatcher(nlp.vocab)
-            fields = [
-                "Computer Science", "Engineering", "Information Technology", "Business Administration",
-                "Mathematics", "Physics", "Economics", "Electrical Engineering", "Mechanical Engineering",
-                "Data Science", "Software Engineering"
-            ]
-            field_patterns = [nlp(field) for field in fields]
-            field_matcher.add("EDUCATION_FIELD", field_patterns)
-            logger.info("PhraseMatcher initialized for education fields.")
-
-            certification_matcher = PhraseMatcher(nlp.vocab)
-            certifications = [
-                "AWS Certified Solutions Architect", "PMP", "Certified ScrumMaster", "Google Cloud Professional",
-                "Microsoft Certified", "Cisco Certified", "CompTIA Security+", "Certified Ethical Hacker",
-                "Oracle Certified", "Salesforce Certified"
-            ]
-            certification_patterns = [nlp(cert) for cert in certifications]
-            certification_matcher.add("CERTIFICATION", certification_patterns)
-            logger.info("PhraseMatcher initialized for certifications.")
+        if _single_flight("firestore", _load_firestore):
+            _count_client("created", "firestore")
+        else:
+            _count_client("reused", "firestore")
+        if load_spacy:
+            _single_flight("spacy", _load_spacy)
+        if load_spacy or load_taxonomy:
+            _single_flight("taxonomy", _load_taxonomies)
     except Exception as e:
         logger.error(f"Error in init_services: {str(e)}")
         raise
 
 @https_fn.on_call(region="asia-south2")
+@track_cold_start
+@metrics.traced
 def upload_resume(req: https_fn.CallableRequest):
     logger.info("Starting upload_resume function...")
-    init_services(load_spacy=False)
     try:
         uid = req.auth.uid
         filename = req.data.get("filename")
@@ -125,13 +227,14 @@ def upload_resume(req: https_fn.CallableRequest):
         logger.info(f"Verifying upload for UID: {uid}, Filename: {filename}")
 
         # Verify the file exists in Firebase Storage
-        bucket_name = "login-app-b82df.firebasestorage.app"
+        bucket_name = BUCKET_NAME
         file_path = f"resumes/{uid}/{filename}"
-        storage_client = storage.Client()
-        bucket = storage_client.bucket(bucket_name)
+        bucket = get_bucket(bucket_name)
         blob = bucket.blob(file_path)
 
-        if not blob.exists():
+        with metrics.span("gcs.exists"):
+            exists = blob.exists()
+        if not exists:
             logger.error(f"File not found in Storage at gs://{bucket_name}/{file_path}")
             raise https_fn.HttpsError('not-found', f"Uploaded file not found for user {uid}")
 
@@ -142,275 +245,763 @@ def upload_resume(req: https_fn.CallableRequest):
         return {"status": "failed", "error": str(e)}
 
 @https_fn.on_call(region="asia-south2", timeout_sec=120, memory=512)
+@track_cold_start
+@metrics.traced
 def parse_resume_by_vision(req: https_fn.CallableRequest):
     logger.info("Starting parse_resume_by_vision function...")
     init_services(load_spacy=False)
     try:
-        logger.info(f"Auth object: {req.auth}")
         if not req.auth:
             logger.error("User is not authenticated.")
             raise https_fn.HttpsError('unauthenticated', 'User must be authenticated')
 
         uid = req.auth.uid
         logger.info(f"User UID: {uid}")
+        # wait=False returns as soon as OCR is running; the storage trigger takes it from there
+        # and the client polls resume_pipeline/{uid}. wait=True keeps the old blocking contract.
+        wait = (req.data or {}).get("wait", True)
+        force = (req.data or {}).get("force", False)
 
-        bucket_name = "login-app-b82df.firebasestorage.app"
+        bucket_name = BUCKET_NAME
         file_path = f"resumes/{uid}/resume.pdf"
-        output_dir = f"parsed_output/{uid}/"  # Use directory as prefix
 
         logger.info(f"Checking if PDF exists at gs://{bucket_name}/{file_path}...")
-        storage_client = storage.Client()
-        bucket = storage_client.bucket(bucket_name)
-        blob = bucket.blob(file_path)
-        if not blob.exists():
+        bucket = get_bucket(bucket_name)
+        blob = bucket.get_blob(file_path)
+        if blob is None:
             logger.error(f"PDF file does not exist at gs://{bucket_name}/{file_path}")
             raise https_fn.HttpsError('not-found', f"PDF file not found for user {uid}")
 
-        client = vision_v1.ImageAnnotatorClient()
-        mime_type = "application/pdf"
+        outcome = run_resume_parse(uid, blob, force=force, wait=wait)
+        if outcome == "cached":
+            return {"status": "success", "message": "Vision parsing complete", "cached": True}
+        if outcome == "started":
+            return {"status": "success", "message": "Vision parsing started", "pipeline": f"{PIPELINE_COLLECTION}/{uid}"}
+        return {"status": "success", "message": "Vision parsing complete"}
+    except Exception as e:
+        logger.error(f"Error in parse_resume_by_vision: {str(e)}")
+        return {"status": "failed", "error": str(e)}
 
-        gcs_source_uri = f"gs://{bucket_name}/{file_path}"
-        gcs_dest_uri = f"gs://{bucket_name}/{output_dir}"  # Directory prefix for Vision API
+def run_resume_parse(uid, blob, force=False, wait=True):
+    """Get output-1-to-1.json written for this resume.pdf; returns "cached", "started" (wait=False) or "complete"."""
+    if force:
+        content_cache.invalidate(db, uid, "parse")
+    # The upload trigger may already be running OCR on this exact upload; force re-parses regardless.
+    if not claim_resume_parse(uid, blob, force=force):
+        operation = None
+    elif not force and parse_cache_hit(uid, blob):
+        return "cached"
+    else:
+        try:
+            operation = start_resume_parse(uid, blob)
+        except Exception as e:
+            set_pipeline_status(uid, "failed", error=str(e))
+            raise
 
-        feature = vision_v1.Feature(type_=vision_v1.Feature.Type.DOCUMENT_TEXT_DETECTION)
-        gcs_source = vision_v1.GcsSource(uri=gcs_source_uri)
-        input_config = vision_v1.InputConfig(gcs_source=gcs_source, mime_type=mime_type)
-        gcs_dest = vision_v1.GcsDestination(uri=gcs_dest_uri)
-        output_config = vision_v1.OutputConfig(gcs_destination=gcs_dest)
+    if not wait:
+        return "started"
 
-        request = vision_v1.AsyncAnnotateFileRequest(
-            features=[feature], input_config=input_config, output_config=output_config
-        )
-
-        logger.info("Sending request to Vision API...")
-        operation = client.async_batch_annotate_files(requests=[request])
+    if operation is not None:
         logger.info("Waiting for Vision API operation to complete...")
         operation.result(timeout=60)
         logger.info("Vision API operation completed successfully.")
-
-        # List files in the output directory
-        blobs = bucket.list_blobs(prefix=output_dir)
-        output_files = [blob.name for blob in blobs if blob.name.endswith(".json")]
-        if not output_files:
-            logger.error(f"No output files found in gs://{bucket_name}/{output_dir}")
-            raise https_fn.HttpsError('internal', "Vision API did not produce output files")
-
-        # Find the latest file (Vision API appends suffixes like output-1-to-1.json)
-        latest_file = max(output_files, key=lambda x: x)
-        logger.info(f"Latest output file: {latest_file}")
-
-        # Rename the latest file to output-1-to-1.json
-        target_path = f"parsed_output/{uid}/output-1-to-1.json"
-        source_blob = bucket.blob(latest_file)
-        bucket.rename_blob(source_blob, target_path)
-        logger.info(f"Renamed {latest_file} to {target_path}")
-
-        # Delete any other JSON files in the directory
-        for file in output_files:
-            if file != target_path:
-                bucket.blob(file).delete()
-                logger.info(f"Deleted old file: {file}")
-
-        return {"status": "success", "message": "Vision parsing complete"}
+        finalize_vision_output(uid, operation_done=True)
+    else:
+        wait_for_pipeline(uid, OCR_DONE_STAGES, timeout=60)
+    return "complete"
+
+# Event-driven resume pipeline. Each stage is triggered by the object the previous one writes:
+#   resumes/{uid}/resume.pdf                -> write output-1-to-1.json from the PDF text layer, or
+#                                              start Vision OCR (no waiting on the operation)
+#   parsed_output/{uid}/raw/output-*.json   -> once every shard is in, merge them into output-1-to-1.json
+#   parsed_output/{uid}/output-1-to-1.json  -> build the resume section index
+# Progress is written to resume_pipeline/{uid} so the client polls one document. Field extraction
+# is left to the extract_resume_* callable the client picks, so a trigger can't overwrite its result.
+PIPELINE_COLLECTION = "resume_pipeline"
+OCR_DONE_STAGES = ("ocr_complete", "indexing", "indexed")
+INDEX_STAGES = ("indexing", "indexed")
+PARSE_RUNNING_STAGES = ("parsing", "ocr_running")
+# A parse claim not updated for this long belongs to an invocation that died or a lost Vision
+# operation; the next upload event or callable restarts the parse instead of waiting on it.
+PIPELINE_CLAIM_STALE_SEC = int(os.environ.get("PIPELINE_CLAIM_STALE_SEC", "600"))
+RESUME_PDF_RE = re.compile(r"^resumes/([^/]+)/resume\.pdf$")
+VISION_RAW_RE = re.compile(r"^parsed_output/([^/]+)/raw/.+\.json$")
+VISION_OUTPUT_RE = re.compile(r"^parsed_output/([^/]+)/output-1-to-1\.json$")
+VISION_SHARD_RE = re.compile(r"output-(\d+)-to-(\d+)\.json$")
+# Pages per Vision output shard (Vision accepts 1-100).
+VISION_BATCH_SIZE = int(os.environ.get("VISION_BATCH_SIZE", "20"))
+VISION_READ_WORKERS = 8
+VISION_DELETE_BATCH = 100  # Cloud Storage batch request limit
+VISION_OPERATION_WAIT_SEC = 30
+# Scanned pages up to this count are OCR'd synchronously (the batch_annotate_files per-file limit).
+VISION_SYNC_MAX_PAGES = 5
+
+def set_pipeline_status(uid, stage, **fields):
+    status = {"stage": stage, "updated": datetime.utcnow().isoformat(), **fields}
+    with metrics.span("firestore.set", collection=PIPELINE_COLLECTION):
+        db.collection(PIPELINE_COLLECTION).document(uid).set(status, merge=True)
+    logger.info(f"Pipeline {uid}: {stage}")
+
+def set_pipeline_status_if(uid, stage, allow, **fields):
+    """set_pipeline_status, but only if allow(current status) still holds when the write lands.
+
+    The write is conditional on the document being unchanged since it was read
+    (create() when there is none), so concurrent writers re-check instead of
+    overwriting each other. Returns whether the status was written.
+    """
+    from google.api_core.exceptions import Conflict, FailedPrecondition
+    reference = db.collection(PIPELINE_COLLECTION).document(uid)
+    while True:
+        with metrics.span("firestore.get", collection=PIPELINE_COLLECTION):
+            snapshot = reference.get()
+        if not allow(snapshot.to_dict() if snapshot.exists else {}):
+            return False
+        status = {"stage": stage, "updated": datetime.utcnow().isoformat(), **fields}
+        try:
+            with metrics.span("firestore.set", collection=PIPELINE_COLLECTION):
+                if snapshot.exists:
+                    reference.update(status, option=db.write_option(last_update_time=snapshot.update_time))
+                else:
+                    reference.create(status)
+        except (Conflict, FailedPrecondition):
+            continue  # another writer got in first; re-check against its status
+        logger.info(f"Pipeline {uid}: {stage}")
+        return True
+
+def pipeline_status_age(status):
+    try:
+        return (datetime.utcnow() - datetime.fromisoformat(status["updated"])).total_seconds()
+    except (KeyError, TypeError, ValueError):
+        return float("inf")
+
+def claim_resume_parse(uid, blob, force=False):
+    """Mark this upload's generation as being parsed before any PDF or Vision work.
+
+    False when another invocation already parsed it or is parsing it, unless its
+    claim is older than PIPELINE_CLAIM_STALE_SEC (it died, or its Vision operation
+    was lost), in which case the parse is restarted. force always claims.
+    """
+    generation = str(blob.generation)
+    current = {}
+
+    def allow(status):
+        current.clear()
+        current.update(status, stale=False)
+        if force or status.get("source_generation") != generation or status.get("stage") == "failed":
+            return True
+        if status.get("stage") in PARSE_RUNNING_STAGES:
+            current["stale"] = pipeline_status_age(status) > PIPELINE_CLAIM_STALE_SEC
+            return current["stale"]
+        return False
+
+    if set_pipeline_status_if(uid, "parsing", allow, source_generation=generation, operation=None, error=None):
+        if current["stale"]:
+            logger.warning(f"Restarting the parse of generation {generation}: the {current['stage']} claim is stale")
+        return True
+    logger.info(f"OCR already {current.get('stage')} for generation {generation}")
+    return False
+
+def set_ocr_complete(uid, **fields):
+    # output-1-to-1.json is already written, and its upload triggers indexing, which may
+    # have moved the stage on by now; don't set it back.
+    set_pipeline_status_if(uid, "ocr_complete", lambda status: status.get("stage") not in INDEX_STAGES,
+                           error=None, **fields)
+
+def get_pipeline_status(uid):
+    with metrics.span("firestore.get", collection=PIPELINE_COLLECTION):
+        snapshot = db.collection(PIPELINE_COLLECTION).document(uid).get()
+    return snapshot.to_dict() if snapshot.exists else None
+
+def wait_for_pipeline(uid, stages, timeout):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        status = get_pipeline_status(uid) or {}
+        if status.get("stage") in stages:
+            return status
+        if status.get("stage") == "failed":
+            raise https_fn.HttpsError('internal', status.get("error", "Resume pipeline failed"))
+        time.sleep(1)
+    raise https_fn.HttpsError('deadline-exceeded', "Timed out waiting for Vision OCR")
+
+def start_vision_ocr(uid, source_generation, source_key=None):
+    client = get_vision_client()
+    from google.cloud import vision_v1
+
+    bucket_name = BUCKET_NAME
+    gcs_source_uri = f"gs://{bucket_name}/resumes/{uid}/resume.pdf"
+    gcs_dest_uri = f"gs://{bucket_name}/parsed_output/{uid}/raw/"  # Directory prefix for Vision API
+
+    feature = vision_v1.Feature(type_=vision_v1.Feature.Type.DOCUMENT_TEXT_DETECTION)
+    gcs_source = vision_v1.GcsSource(uri=gcs_source_uri)
+    input_config = vision_v1.InputConfig(gcs_source=gcs_source, mime_type="application/pdf")
+    gcs_dest = vision_v1.GcsDestination(uri=gcs_dest_uri)
+    # Vision writes one output-{start}-to-{end}.json shard per batch_size pages.
+    output_config = vision_v1.OutputConfig(gcs_destination=gcs_dest, batch_size=VISION_BATCH_SIZE)
+
+    request = vision_v1.AsyncAnnotateFileRequest(
+        features=[feature], input_config=input_config, output_config=output_config
+    )
+
+    # Shards left by an earlier operation on this prefix would be merged into this one's output.
+    delete_blobs_batched([blob for _, _, blob in list_vision_shards(get_bucket(), uid)])
+
+    logger.info("Sending request to Vision API...")
+    with metrics.span("vision.async_start"):
+        operation = client.async_batch_annotate_files(requests=[request])
+    # The operation's first shards can be merged (ocr_complete) before this status lands.
+    set_pipeline_status_if(uid, "ocr_running", lambda status: status.get("stage") in PARSE_RUNNING_STAGES,
+                           source_generation=source_generation, source_key=source_key,
+                           operation=operation.operation.name, batch_size=VISION_BATCH_SIZE, error=None)
+    return operation
+
+def ocr_pages_sync(uid, pages):
+    # {page_number: text} for a few pages of resume.pdf, without the async operation and GCS output.
+    client = get_vision_client()
+    from google.cloud import vision_v1
+
+    gcs_source = vision_v1.GcsSource(uri=f"gs://{BUCKET_NAME}/resumes/{uid}/resume.pdf")
+    request = vision_v1.AnnotateFileRequest(
+        input_config=vision_v1.InputConfig(gcs_source=gcs_source, mime_type="application/pdf"),
+        features=[vision_v1.Feature(type_=vision_v1.Feature.Type.DOCUMENT_TEXT_DETECTION)],
+        pages=pages,
+    )
+    with metrics.span("vision.sync", items=len(pages)):
+        response = client.batch_annotate_files(requests=[request])
+    texts = {}
+    for page, image_response in zip(pages, response.responses[0].responses):
+        if image_response.error.message:
+            raise RuntimeError(f"Vision OCR failed for page {page}: {image_response.error.message}")
+        texts[page] = image_response.full_text_annotation.text
+    return texts
+
+def write_parsed_output(uid, texts):
+    # Same document shape as the Vision output, so every reader of output-1-to-1.json is unchanged.
+    blob = get_bucket().blob(f"parsed_output/{uid}/output-1-to-1.json")
+    data = json.dumps(pdf_text.vision_output(texts), separators=(",", ":"))
+    with metrics.span("gcs.upload", bytes=len(data)):
+        blob.upload_from_string(data, content_type="application/json")
+    return blob
+
+def parse_cache_hit(uid, blob):
+    # Same resume.pdf bytes as the last parse, and its output-1-to-1.json is still the one produced.
+    output = get_bucket().get_blob(f"parsed_output/{uid}/output-1-to-1.json")
+    entry = content_cache.lookup(
+        db, uid, "parse", content_cache.content_key(blob), content_cache.PARSE_VERSION,
+        check=lambda entry: output is not None and content_cache.content_key(output) == entry.get("output_key"))
+    if entry is None:
+        return False
+    set_pipeline_status(uid, "ocr_complete", source_generation=str(blob.generation), source="cache",
+                        operation=None, error=None)
+    return True
+
+def start_resume_parse(uid, blob):
+    """Use the PDF's own text layer where it is usable and OCR only the scanned pages.
+
+    Returns the Vision operation when the whole file went to async OCR, or None when
+    output-1-to-1.json has already been written.
+    """
+    source_generation = str(blob.generation)
+    source_key = content_cache.content_key(blob)
+    with metrics.span("gcs.download") as span:
+        data = blob.download_as_bytes()
+        span.set(bytes=len(data))
+    with metrics.span("parse.pdf_text") as span:
+        texts = pdf_text.page_texts(data)
+        span.set(items=len(texts or []))
+    if texts is None:
+        logger.info(f"No readable text layer in {blob.name}; using Vision OCR")
+        return start_vision_ocr(uid, source_generation, source_key)
+
+    scanned = [page for page, text in enumerate(texts, start=1) if text is None]
+    if len(scanned) > VISION_SYNC_MAX_PAGES:
+        logger.info(f"{len(scanned)} of {len(texts)} pages have no text layer; using Vision OCR")
+        return start_vision_ocr(uid, source_generation, source_key)
+
+    source = "text_layer"
+    if scanned:
+        logger.info(f"OCR'ing scanned pages {scanned} of {len(texts)}")
+        ocr_texts = ocr_pages_sync(uid, scanned)
+        for page in scanned:
+            texts[page - 1] = ocr_texts.get(page, "")
+        source = "text_layer+vision"
+    output = write_parsed_output(uid, texts)
+    content_cache.store(db, uid, "parse", source_key, content_cache.PARSE_VERSION,
+                        output_key=content_cache.content_key(output), source=source)
+    set_ocr_complete(uid, pages=len(texts), source=source, ocr_pages=scanned,
+                     source_generation=source_generation, operation=None)
+    logger.info(f"Wrote {output.name} from the PDF text layer ({len(scanned)} page(s) OCR'd)")
+    return None
+
+def list_vision_shards(bucket, uid):
+    # [(start_page, end_page, blob)] ordered by start page (numerically: "output-11" sorts before "output-2").
+    shards = []
+    for blob in bucket.list_blobs(prefix=f"parsed_output/{uid}/raw/"):
+        if match := VISION_SHARD_RE.search(blob.name):
+            shards.append((int(match.group(1)), int(match.group(2)), blob))
+    shards.sort(key=lambda shard: shard[0])
+    return shards
+
+def vision_operation_done(operation_name, timeout=VISION_OPERATION_WAIT_SEC):
+    # The last shard can land a moment before the operation is marked done.
+    operations = get_vision_client().transport.operations_client
+    deadline = time.monotonic() + timeout
+    while True:
+        if operations.get_operation(operation_name).done:
+            return True
+        if time.monotonic() >= deadline:
+            return False
+        time.sleep(1)
+
+def vision_shards_complete(shards, batch_size, operation_name=None):
+    expected_start = 1
+    for start, end, _ in shards:
+        if start != expected_start:
+            return False  # a shard in between has not been written yet
+        expected_start = end + 1
+    start, end, _ = shards[-1]
+    if end - start + 1 < batch_size:
+        return True  # a short shard can only be the last one
+    # A full last shard is ambiguous (page count may be an exact multiple); ask Vision.
+    return bool(operation_name) and vision_operation_done(operation_name)
+
+def read_vision_pages(blob):
+    # Download and parse overlap (the JSON is streamed), so they are one span.
+    with metrics.span("gcs.read_vision_output", bytes=blob.size) as span, \
+            blob.open("rb", chunk_size=vision_text.DEFAULT_CHUNK_SIZE) as stream:
+        pages = list(vision_text.iter_full_texts(stream))
+        span.set(items=len(pages))
+    return pages
+
+def delete_blobs_batched(blobs):
+    # One batch request per VISION_DELETE_BATCH objects instead of a round trip each.
+    from google.api_core.exceptions import NotFound
+    client = get_storage_client()
+    for i in range(0, len(blobs), VISION_DELETE_BATCH):
+        chunk = blobs[i:i + VISION_DELETE_BATCH]
+        try:
+            with client.batch():
+                for blob in chunk:
+                    blob.delete()
+        except NotFound:
+            logger.info("Some Vision shards were already deleted by a concurrent finalize")
+
+def finalize_vision_output(uid, operation_done=False):
+    from google.api_core.exceptions import NotFound
+    bucket = get_bucket()
+    shards = list_vision_shards(bucket, uid)
+    if not shards:
+        # Already finalized by a concurrent trigger/callable.
+        logger.info(f"No raw Vision output left in gs://{BUCKET_NAME}/parsed_output/{uid}/raw/")
+        return False
+
+    status = get_pipeline_status(uid) or {}
+    if not operation_done:
+        batch_size = status.get("batch_size") or VISION_BATCH_SIZE
+        if not vision_shards_complete(shards, batch_size, status.get("operation")):
+            logger.info(f"Waiting for more Vision shards for {uid}: have {[s[:2] for s in shards]}")
+            return False
+
+    target_path = f"parsed_output/{uid}/output-1-to-1.json"
+    blobs = [blob for _, _, blob in shards]
+    try:
+        if len(shards) == 1:
+            # Single shard: a server-side rename, no download/upload.
+            output = bucket.rename_blob(blobs[0], target_path)
+            blobs = []
+        else:
+            with ThreadPoolExecutor(max_workers=min(VISION_READ_WORKERS, len(blobs))) as pool:
+                pages = [text for shard_pages in pool.map(read_vision_pages, blobs) for text in shard_pages]
+            # Only the page texts are kept; every reader of output-1-to-1.json uses just those.
+            output = write_parsed_output(uid, pages)
+    except NotFound:
+        logger.info(f"Vision shards for {uid} were already merged by a concurrent finalize")
+        return False
+    logger.info(f"Merged {len(shards)} Vision shard(s) (pages 1-{shards[-1][1]}) into {target_path}")
+
+    delete_blobs_batched(blobs)
+    content_cache.store(db, uid, "parse", status.get("source_key"), content_cache.PARSE_VERSION,
+                        output_key=content_cache.content_key(output), source="vision")
+    set_ocr_complete(uid, pages=shards[-1][1], source="vision", ocr_pages=None)
+    return True
+
+@storage_fn.on_object_finalized(bucket=BUCKET_NAME, region="asia-south2", memory=1024, cpu=1, timeout_sec=300)
+@track_cold_start
+@metrics.traced
+def on_resume_storage_event(event: storage_fn.CloudEvent[storage_fn.StorageObjectData]):
+    name = event.data.name
+    uid = None
+    try:
+        if match := RESUME_PDF_RE.match(name):
+            uid = match.group(1)
+            init_services(load_spacy=False)
+            blob = get_bucket().get_blob(name)
+            if blob is None:
+                logger.info(f"{name} was deleted before it could be parsed")
+                return
+            if not claim_resume_parse(uid, blob):
+                return
+            if parse_cache_hit(uid, blob):
+                # Same bytes re-uploaded: output-1-to-1.json is unchanged, so no write will
+                # trigger indexing; run it here (itself cached) to finish the pipeline.
+                set_pipeline_status(uid, "indexing")
+                load_resume_index(uid)
+                set_pipeline_status(uid, "indexed")
+            else:
+                start_resume_parse(uid, blob)
+        elif match := VISION_RAW_RE.match(name):
+            uid = match.group(1)
+            init_services(load_spacy=False)
+            finalize_vision_output(uid)
+        elif match := VISION_OUTPUT_RE.match(name):
+            uid = match.group(1)
+            init_services(load_spacy=False)
+            set_pipeline_status(uid, "indexing")
+            # Segment once; the extractors and analyze_missing_skills read this index.
+            load_resume_index(uid)
+            set_pipeline_status(uid, "indexed")
     except Exception as e:
-        logger.error(f"Error in parse_resume_by_vision: {str(e)}")
-        return {"status": "failed", "error": str(e)}
+        logger.error(f"Error in on_resume_storage_event for {name}: {str(e)}")
+        if uid is not None and db is not None:
+            set_pipeline_status(uid, "failed", error=str(e))
+        raise
 
-@https_fn.on_call(region="asia-south2", memory=512)
+# Several requests per instance share the single spaCy model loaded by init_services.
+@https_fn.on_call(region="asia-south2", memory=1024, cpu=1, concurrency=8)
+@track_cold_start
+@metrics.traced
 def extract_resume_fields(req: https_fn.CallableRequest):
     logger.info("Starting extract_resume_fields function...")
-    init_services(load_spacy=True)
+    # spaCy is only loaded on a cache miss (see run_resume_field_extraction).
+    init_services(load_spacy=False)
     try:
         uid = req.auth.uid
         logger.info(f"User UID: {uid}")
-        bucket_name = "login-app-b82df.firebasestorage.app"
-        output_path = f"parsed_output/{uid}/output-1-to-1.json"  # Always read from output-1-to-1.json
-
-        logger.info(f"Checking for JSON file at gs://{bucket_name}/{output_path}...")
-        storage_client = storage.Client()
-        bucket = storage_client.bucket(bucket_name)
-        blob = bucket.blob(output_path)
-
-        if not blob.exists():
-            logger.error(f"No JSON file found at gs://{bucket_name}/{output_path}")
-            raise https_fn.HttpsError('not-found', f"No parsed JSON file found for user {uid}")
-
-        with tempfile.NamedTemporaryFile(delete=False) as temp:
-            blob.download_to_file(temp)
-            temp.flush()
-            temp.seek(0)
-            parsed_data = json.load(temp)
-        logger.info("Parsed JSON downloaded successfully.")
-
-        full_text = parsed_data['responses'][0]['fullTextAnnotation']['text']
-        logger.info(f"Full text extracted: {full_text[:500]}...")
-
-        doc = nlp(full_text)
-        experience_pattern = r'(\d+)\s*(years|yrs)\s*(of)?\s*experience'
-        experience_matches = re.findall(experience_pattern, full_text, re.IGNORECASE)
-        years_of_experience = experience_matches[0][0] + " years" if experience_matches else "Not Found"
-
-        job_title_matches = job_title_matcher(doc)
-        job_titles = [doc[start:end].text for match_id, start, end in job_title_matches]
-        job_title_pattern = r'(worked as|currently|last position as)\s*([A-Za-z\s]+)'
-        job_title_regex_matches = re.findall(job_title_pattern, full_text, re.IGNORECASE)
-        job_titles.extend([match[1].strip() for match in job_title_regex_matches])
-        current_job_title = job_titles[0] if job_titles else "Not Found"
-
-        description_keywords = ["project", "work", "responsibilities", "developed", "led", "managed"]
-        sentences = [sent.text.strip() for sent in doc.sents]
-        description_sentences = [sent for sent in sentences if any(keyword in sent.lower() for keyword in description_keywords)]
-        brief_description = " ".join(description_sentences[:2]) if description_sentences else "Not Found"
-
-        skills_matches = skills_matcher(doc)
-        skills = [doc[start:end].text for match_id, start, end in skills_matches]
-
-        education_matches = education_matcher(doc)
-        education_levels = [doc[start:end].text for match_id, start, end in education_matches]
-        field_matches = field_matcher(doc)
-        education_fields = [doc[start:end].text for match_id, start, end in field_matches]
-        education_level = education_levels[0] if education_levels else "Not Found"
-        education_field = education_fields[0] if education_fields else "Not Found"
-        highest_education = f"{education_level} in {education_field}" if education_level != "Not Found" and education_field != "Not Found" else "Not Found"
-
-        certification_matches = certification_matcher(doc)
-        certifications = [doc[start:end].text for match_id, start, end in certification_matches]
-        cert_pattern = r'(certified in|certification in)\s*([A-Za-z\s]+)'
-        cert_regex_matches = re.findall(cert_pattern, full_text, re.IGNORECASE)
-        certifications.extend([match[1].strip() for match in cert_regex_matches])
-
-        entities = {
-            "current_job_title": current_job_title,
-            "years_of_experience": years_of_experience,
-            "brief_description": brief_description,
-            "key_skills_tools": skills or ["Not Found"],
-            "highest_education": highest_education,
-            "certifications": certifications or ["Not Found"],
-            "last_extracted": datetime.utcnow().isoformat(),
-            "extracted_by": "spaCy"
-        }
-
-        doc_ref = db.collection("resume").document(uid)
-        doc_ref.delete()
-        doc_ref.set(entities, merge=False)
+        data = req.data or {}
+        entities = run_resume_field_extraction(uid, mode=data.get("mode"), force=data.get("force", False))
         return {"status": "success", "fields": entities}
     except Exception as e:
         logger.error(f"Error in extract_resume_fields: {str(e)}")
         return {"status": "failed", "error": str(e)}
 
-@https_fn.on_call(region="asia-south2", memory=512, secrets=["OPENAI_API_KEY"])
-def extract_resume_openai(req: https_fn.CallableRequest):
-    logger.info("Starting extract_resume_openai function...")
-    try:
-        init_services(load_spacy=False)
-        if not openai_client:
-            raise ValueError("OpenAI client not initialized.")
-        if db is None:
-            raise ValueError("Firestore client not initialized.")
-
-        uid = req.auth.uid
-        logger.info(f"User UID: {uid}")
-        bucket_name = "login-app-b82df.firebasestorage.app"
-        output_path = f"parsed_output/{uid}/output-1-to-1.json"  # Always read from output-1-to-1.json
-
-        storage_client = storage.Client()
-        bucket = storage_client.bucket(bucket_name)
-        blob = bucket.blob(output_path)
-
-        if not blob.exists():
-            logger.error(f"No JSON file found at gs://{bucket_name}/{output_path}")
-            raise https_fn.HttpsError('not-found', f"No parsed JSON file found for user {uid}")
+def read_vision_text(blob):
+    # Streams only the page texts out of the Vision output (no temp file, no full json.load),
+    # joining every response so multi-page outputs are not cut to the first page.
+    with metrics.span("gcs.read_vision_output", bytes=blob.size) as span, \
+            blob.open("rb", chunk_size=vision_text.DEFAULT_CHUNK_SIZE) as stream:
+        full_text = vision_text.read_full_text(stream)
+        span.set(chars=len(full_text))
+    logger.info("Vision output text streamed successfully.")
+    return full_text
+
+def vision_output_blob(uid):
+    bucket_name = BUCKET_NAME
+    output_path = f"parsed_output/{uid}/output-1-to-1.json"  # Always read from output-1-to-1.json
+
+    logger.info(f"Checking for JSON file at gs://{bucket_name}/{output_path}...")
+    blob = get_bucket(bucket_name).get_blob(output_path)
+
+    if blob is None:
+        logger.error(f"No JSON file found at gs://{bucket_name}/{output_path}")
+        raise https_fn.HttpsError('not-found', f"No parsed JSON file found for user {uid}")
+    return blob
+
+def load_resume_index(uid, blob=None):
+    """Section index of the user's parsed resume, built from the Vision output if missing or stale."""
+    blob = blob or vision_output_blob(uid)
+    key = content_cache.content_key(blob)
+    index = resume_index.load(db, uid, key)
+    if index is None:
+        full_text = read_vision_text(blob)
+        with metrics.span("parse.resume_index", chars=len(full_text)):
+            index = resume_index.build(full_text, key)
+        resume_index.store(db, uid, index)
+        logger.info(f"Resume index built for {uid}: {[section['name'] for section in index['sections']]}")
+    if index["text"] is None:
+        index = {**index, "text": read_vision_text(blob)}
+    return index
+
+def extract_entities(full_text, mode=None):
+    # Long OCR texts are chunked; only the components the selected mode needs are run.
+    mode = extraction_modes.resolve_mode(nlp, mode)
+    chunks = extraction_modes.chunk_text(full_text)
+    disabled = extraction_modes.disabled_components(nlp, mode)
+    with metrics.span("nlp.pipe", mode=mode, chars=len(full_text), items=len(chunks)):
+        docs = list(nlp.pipe(chunks, disable=disabled))
+    with metrics.span("nlp.fields"):
+        return entities_from_docs(full_text, docs, mode)
+
+def experience_spans(full_text):
+    # Date ranges count as work history inside Experience sections, or anywhere but Education.
+    sections = resume_sections.segment(full_text)
+    spans = [(s.start, s.end) for s in sections if s.name == "experience"]
+    return spans or [(s.start, s.end) for s in sections if s.name != "education"]
+
+def entities_from_docs(full_text, docs, mode):
+    # Every regex-derived field comes from one pass over the text (extraction_rules.py).
+    rules = extraction_rules.scan(full_text)
+    if rules.stated_years:
+        years_of_experience = extraction_rules.format_years(rules.stated_years[0])
+    else:
+        years = extraction_rules.experience_years(rules.date_ranges, experience_spans(full_text))
+        years_of_experience = extraction_rules.format_years(years) if years else "Not Found"
+
+    job_titles = taxonomies["job_titles"].find_canonical(full_text)
+    job_titles.extend(rules.job_titles)
+    current_job_title = job_titles[0] if job_titles else "Not Found"
+
+    description_keywords = ["project", "work", "responsibilities", "developed", "led", "managed"]
+    sentences = [sent.text.strip() for doc in docs for sent in doc.sents]
+    description_sentences = [sent for sent in sentences if any(keyword in sent.lower() for keyword in description_keywords)]
+    brief_description = " ".join(description_sentences[:2]) if description_sentences else "Not Found"
+
+    skills = taxonomies["skills"].find_canonical(full_text)
+
+    education_levels = [doc[start:end].text for doc in docs for match_id, start, end in education_matcher(doc)]
+    education_fields = [doc[start:end].text for doc in docs for match_id, start, end in field_matcher(doc)]
+    education_level = education_levels[0] if education_levels else "Not Found"
+    education_field = education_fields[0] if education_fields else "Not Found"
+    highest_education = f"{education_level} in {education_field}" if education_level != "Not Found" and education_field != "Not Found" else "Not Found"
+
+    certifications = taxonomies["certifications"].find_canonical(full_text)
+    certifications.extend(rules.certifications)
+
+    entities = {
+        "current_job_title": current_job_title,
+        "years_of_experience": years_of_experience,
+        "brief_description": brief_description,
+        "key_skills_tools": skills or ["Not Found"],
+        "highest_education": highest_education,
+        "certifications": certifications or ["Not Found"],
+        "last_extracted": datetime.utcnow().isoformat(),
+        "extracted_by": "spaCy",
+        "extraction_mode": mode
+    }
+    return entities
+
+def extract_fields_version(mode=None):
+    # Cached fields go stale with the extractor code, the requested mode, or the pattern/taxonomy data.
+    from resume_patterns import patterns_fingerprint
+    from taxonomy import fingerprint as taxonomy_fingerprint
+    return ":".join([content_cache.EXTRACT_FIELDS_VERSION, mode or extraction_modes.DEFAULT_MODE,
+                     patterns_fingerprint(), taxonomy_fingerprint()])
+
+def run_resume_field_extraction(uid, mode=None, force=False):
+    blob = vision_output_blob(uid)
+    store = datastore.DataStore(db)
+    key = content_cache.content_key(blob)
+    version = extract_fields_version(mode)
+    if force:
+        content_cache.invalidate(db, uid, "extract_fields")
+    elif entry := content_cache.lookup(db, uid, "extract_fields", key, version):
+        store.put("resume", uid, entry["result"])
+        return entry["result"]
 
-        with tempfile.NamedTemporaryFile(delete=False) as temp:
-            blob.download_to_file(temp)
-            temp.flush()
-            temp.seek(0)
-            parsed_data = json.load(temp)
-
-        full_text = parsed_data['responses'][0]['fullTextAnnotation']['text']
-        logger.info(f"Full text: {full_text[:500]}...")
-
-        prompt = f"""
+    init_services(load_spacy=True)
+    full_text = load_resume_index(uid, blob)["text"]
+    logger.info(f"Full text extracted: {len(full_text)} characters")
+
+    entities = extract_entities(full_text, mode)
+
+    store.put("resume", uid, entities)
+    content_cache.store(db, uid, "extract_fields", key, version, result=entities)
+    return entities
+
+# Field descriptions for the OpenAI extractors; the hybrid extractor asks only for the missing ones.
+RESUME_FIELD_PROMPTS = {
+    "current_job_title": "The current or last job title (string)",
+    "years_of_experience": "Total years of work experience (string, e.g., \"5 years\")",
+    "brief_description": "A brief description of work or projects (string, 1-2 sentences)",
+    "key_skills_tools": "A list of key skills or tools (list of strings)",
+    "highest_education": "Highest education level and field (string, e.g., \"Bachelor in Computer Science\")",
+    "certifications": "A list of certification courses (list of strings)",
+}
+RESUME_FIELDS = tuple(RESUME_FIELD_PROMPTS)
+RESUME_MODEL_PARAMS = {"model": "gpt-3.5-turbo", "max_tokens": 500, "temperature": 0.3}
+
+def resume_fields_prompt(text, fields, label="Resume text"):
+    field_lines = "\n".join(f"        - {field}: {RESUME_FIELD_PROMPTS[field]}" for field in fields)
+    return f"""
         Extract the following structured data from the resume text below and return it as a pure JSON string:
-        - current_job_title: The current or last job title (string)
-        - years_of_experience: Total years of work experience (string, e.g., "5 years")
-        - brief_description: A brief description of work or projects (string, 1-2 sentences)
-        - key_skills_tools: A list of key skills or tools (list of strings)
-        - highest_education: Highest education level and field (string, e.g., "Bachelor in Computer Science")
-        - certifications: A list of certification courses (list of strings)
+{field_lines}
         If a field cannot be found, use "Not Found" for strings or ["Not Found"] for lists.
 
-        Resume text:
-        {full_text}
+        {label}:
+        {text}
         """
 
+def request_resume_fields(openai_client, text, fields, label="Resume text"):
+    """Ask the model for `fields` from `text`; returns (parsed JSON, token usage)."""
+    with metrics.span("llm", model=RESUME_MODEL_PARAMS["model"]) as span:
         response = openai_client.chat.completions.create(
-            model="gpt-3.5-turbo",
+            model=RESUME_MODEL_PARAMS["model"],
             messages=[
                 {"role": "system", "content": "You are a helpful assistant that extracts structured data from resumes and returns it as a pure JSON string."},
-                {"role": "user", "content": prompt}
+                {"role": "user", "content": resume_fields_prompt(text, fields, label)}
             ],
-            max_tokens=500,
-            temperature=0.3
+            max_tokens=RESUME_MODEL_PARAMS["max_tokens"],
+            temperature=RESUME_MODEL_PARAMS["temperature"]
         )
+        span.usage(response.usage)
 
-        raw_response = response.choices[0].message.content
-        logger.info(f"Raw OpenAI response: {raw_response}")
-
-        json_match = re.search(r'\{.*\}', raw_response, re.DOTALL)
-        json_str = json_match.group(0) if json_match else raw_response
-        extracted_data = json.loads(json_str)
-
-        extracted_data["last_extracted"] = datetime.utcnow().isoformat()
-        extracted_data["extracted_by"] = "OpenAI"
+    raw_response = response.choices[0].message.content
+    if structured_logging.LOG_RESUME_DATA:
+        logger.debug("Raw OpenAI response: %s", raw_response)
 
-        doc_ref = db.collection("resume").document(uid)
-        doc_ref.delete()
-        doc_ref.set(extracted_data, merge=False)
-        return {"status": "success", "fields": extracted_data}
-    except Exception as e:
-        logger.error(f"Error in extract_resume_openai: {str(e)}")
-        return {"status": "failed", "error": str(e)}
+    json_match = re.search(r'\{.*\}', raw_response, re.DOTALL)
+    json_str = json_match.group(0) if json_match else raw_response
+    usage = {"prompt_tokens": response.usage.prompt_tokens, "completion_tokens": response.usage.completion_tokens}
+    return json.loads(json_str), usage
 
 @https_fn.on_call(region="asia-south2", memory=512, secrets=["OPENAI_API_KEY"])
-def generate_jd(req: https_fn.CallableRequest):
-    logger.info("Starting generate_jd function...")
+@track_cold_start
+@metrics.traced
+def extract_resume_openai(req: https_fn.CallableRequest):
+    logger.info("Starting extract_resume_openai function...")
     try:
         init_services(load_spacy=False)
+        openai_client = get_openai_client()
         if not openai_client:
             raise ValueError("OpenAI client not initialized.")
         if db is None:
-            logger.error("Firestore client (db) is None after init_services.")
             raise ValueError("Firestore client not initialized.")
 
-        logger.info(f"Type of db: {type(db)}")
-
         uid = req.auth.uid
         logger.info(f"User UID: {uid}")
+        blob = vision_output_blob(uid)
 
-        goal_ref = db.collection('udata').document(uid)
-        logger.info(f"Goal ref: {goal_ref}")
-        goal_doc = goal_ref.get()
-        if not goal_doc.exists:
-            logger.error(f"No goal data found for user {uid}")
-            raise https_fn.HttpsError('not-found', "Goal data not found")
+        store = datastore.DataStore(db)
+        key = content_cache.content_key(blob)
+        if (req.data or {}).get("force", False):
+            content_cache.invalidate(db, uid, "extract_openai")
+        elif entry := content_cache.lookup(db, uid, "extract_openai", key, content_cache.EXTRACT_OPENAI_VERSION):
+            store.put("resume", uid, entry["result"])
+            return {"status": "success", "fields": entry["result"], "cached": True}
+
+        full_text = load_resume_index(uid, blob)["text"]
+        logger.info(f"Full text: {len(full_text)} characters")
+
+        extracted_data, _ = request_resume_fields(openai_client, full_text, RESUME_FIELDS)
 
-        goal_data = goal_doc.to_dict()
-        company = goal_data.get('company', '')
-        position = goal_data.get('position', '')
-        location = goal_data.get('location', '')
-        deadline = goal_data.get('deadline', '')
+        extracted_data["last_extracted"] = datetime.utcnow().isoformat()
+        extracted_data["extracted_by"] = "OpenAI"
 
-        resume_ref = db.collection('resume').document(uid)
-        resume_doc = resume_ref.get()
-        if not resume_doc.exists:
-            logger.error(f"No resume data found for user {uid}")
-            raise https_fn.HttpsError('not-found', "Resume data not found")
+        store.put("resume", uid, extracted_data)
+        content_cache.store(db, uid, "extract_openai", key, content_cache.EXTRACT_OPENAI_VERSION,
+                            result=extracted_data)
+        return {"status": "success", "fields": extracted_data}
+    except Exception as e:
+        logger.error(f"Error in extract_resume_openai: {str(e)}")
+        return {"status": "failed", "error": str(e)}
 
-        resume_data = resume_doc.to_dict()
-        experience = resume_data.get('years_of_experience', 'Not Found')
+def field_found(value):
+    if isinstance(value, list):
+        return any(field_found(item) for item in value)
+    return value is not None and str(value).strip() not in ("", "Not Found")
+
+def run_hybrid_extraction(uid, openai_client, mode=None, force=False):
+    """spaCy for every field, then the LLM for the ones it missed, sent only their resume sections."""
+    blob = vision_output_blob(uid)
+    store = datastore.DataStore(db)
+    key = content_cache.content_key(blob)
+    version = f"{extract_fields_version(mode)}:{content_cache.EXTRACT_HYBRID_VERSION}"
+    if force:
+        content_cache.invalidate(db, uid, "extract_hybrid")
+    elif entry := content_cache.lookup(db, uid, "extract_hybrid", key, version):
+        store.put("resume", uid, entry["result"])
+        return entry["result"]
 
-        prompt = f"""
+    init_services(load_spacy=True)
+    index = load_resume_index(uid, blob)
+    full_text = index["text"]
+    entities = extract_entities(full_text, mode)
+
+    extracted_by = {field: "spaCy" for field in RESUME_FIELDS if field_found(entities.get(field))}
+    missing = [field for field in RESUME_FIELDS if field not in extracted_by]
+    # Tokens as characters / 4, against what extract_resume_openai would have sent for this resume.
+    full_prompt_tokens = len(resume_fields_prompt(full_text, RESUME_FIELDS)) // 4
+    sent_prompt_tokens = 0
+    usage = {"prompt_tokens": 0, "completion_tokens": 0}
+    # A result missing fields because the LLM couldn't be asked is saved but not cached, so
+    # the next call retries the LLM instead of serving the degraded fields until the resume changes.
+    complete = not missing
+    if missing and openai_client:
+        context = resume_sections.context_for(full_text, resume_index.sections(index), missing)
+        sent_prompt_tokens = len(resume_fields_prompt(context, missing, "Resume sections")) // 4
+        logger.info(f"Asking OpenAI for {missing} from {len(context)} of {len(full_text)} characters")
+        try:
+            found, usage = request_resume_fields(openai_client, context, missing, "Resume sections")
+            for field in missing:
+                if field_found(found.get(field)):
+                    entities[field] = found[field]
+                    extracted_by[field] = "OpenAI"
+            complete = True
+        except Exception as e:
+            # The spaCy fields are still worth saving; the missing ones stay "Not Found".
+            logger.warning(f"OpenAI fallback failed for {missing}: {str(e)}")
+    elif missing:
+        logger.warning(f"OpenAI client not initialized; {missing} stay Not Found.")
+
+    entities["extracted_by"] = {field: extracted_by.get(field, "Not Found") for field in RESUME_FIELDS}
+    entities["llm_tokens"] = {**usage, "tokens_saved_estimate": full_prompt_tokens - sent_prompt_tokens}
+
+    store.put("resume", uid, entities)
+    if complete:
+        content_cache.store(db, uid, "extract_hybrid", key, version, result=entities)
+    return entities
+
+@https_fn.on_call(region="asia-south2", memory=1024, cpu=1, concurrency=8, secrets=["OPENAI_API_KEY"])
+@track_cold_start
+@metrics.traced
+def extract_resume_hybrid(req: https_fn.CallableRequest):
+    logger.info("Starting extract_resume_hybrid function...")
+    init_services(load_spacy=False)
+    try:
+        uid = req.auth.uid
+        logger.info(f"User UID: {uid}")
+        data = req.data or {}
+        entities = run_hybrid_extraction(uid, get_openai_client(), mode=data.get("mode"),
+                                         force=data.get("force", False))
+        return {"status": "success", "fields": entities}
+    except Exception as e:
+        logger.error(f"Error in extract_resume_hybrid: {str(e)}")
+        return {"status": "failed", "error": str(e)}
+
+# JDs depend only on (company, position, location, experience), which many users share.
+JD_MODEL_PARAMS = {"model": "gpt-4o", "max_tokens": 1000, "temperature": 0.7, "prompt_version": 1}
+jd_cache = llm_cache.LLMCache("generate_jd", ttl_s=int(os.environ.get("JD_CACHE_TTL_SEC", str(7 * 24 * 3600))),
+                              max_entries=int(os.environ.get("JD_CACHE_MAX_ENTRIES", "512")))
+
+def jd_cache_inputs(company, position, location, experience):
+    years = re.search(r'\d+(?:\.\d+)?', str(experience))
+    return {
+        "company": llm_cache.normalize(company),
+        "position": llm_cache.normalize(position),
+        "location": llm_cache.normalize(location),
+        "experience": years.group(0) if years else llm_cache.normalize(experience),
+    }
+
+# Sections the app renders; streamed sections of any other shape are not written.
+JD_SECTION_TYPES = {"summary": str, "responsibilities": (list, str), "qualifications": (list, str),
+                    "skills": (list, str), "relevance": str}
+
+def jd_section_writer(store, uid):
+    """on_section callback for request_jd that writes each complete, valid section to jd/{uid}."""
+    written = []
+
+    def on_section(name, value):
+        if not value or not isinstance(value, JD_SECTION_TYPES.get(name, ())):
+            logger.warning(f"Skipping streamed JD section {name!r}: {type(value).__name__}")
+            return
+        # The first section replaces the previous JD; the rest merge into it.
+        store.put('jd', uid, {name: value, "partial": True}, merge=bool(written))
+        written.append(name)
+
+    return on_section
+
+def request_jd(openai_client, company, position, location, experience, on_section=None, timings=None):
+    """The JD as a dict; with on_section, the completion is streamed and on_section(name, value)
+    is called as each top-level section completes (timings gets first_item_ms/total_ms)."""
+    prompt = f"""
         Generate a professional job description for a position at {company} as a {position}, located in {location}, requiring experience within range of 0.5 years from {experience}. Use current market trends and industry standards to create a realistic and appealing JD. Structure the response as a JSON object with:
         - "summary": A brief overview of the role (2-3 sentences).
         - "responsibilities": A list of 5-7 key duties (bullet points as text, e.g., "- Duty 1").
@@ -420,133 +1011,371 @@ def generate_jd(req: https_fn.CallableRequest):
         Tailor the content to the specific company, role, and location with smart analysis based on latest market insights. Return only the JSON object.
         """
 
+    messages = [
+        {"role": "system", "content": "You are a job description expert with knowledge of 2025 market trends."},
+        {"role": "user", "content": prompt},
+    ]
+    if on_section is not None:
+        jd_data, raw_response, stream_timings = llm_stream.stream_json(
+            openai_client, lambda path, value: on_section(path[0], value) if len(path) == 1 else None,
+            model=JD_MODEL_PARAMS["model"], messages=messages,
+            max_tokens=JD_MODEL_PARAMS["max_tokens"], temperature=JD_MODEL_PARAMS["temperature"])
+        logger.debug("Streamed OpenAI response: %s", raw_response)
+        if timings is not None:
+            timings.update(stream_timings)
+        return jd_data
+
+    with metrics.span("llm", model=JD_MODEL_PARAMS["model"]) as span:
         response = openai_client.chat.completions.create(
-            model="gpt-4o",
-            messages=[
-                {"role": "system", "content": "You are a job description expert with knowledge of 2025 market trends."},
-                {"role": "user", "content": prompt},
-            ],
-            max_tokens=1000,
-            temperature=0.7,
+            model=JD_MODEL_PARAMS["model"],
+            messages=messages,
+            max_tokens=JD_MODEL_PARAMS["max_tokens"],
+            temperature=JD_MODEL_PARAMS["temperature"],
         )
-
-        raw_response = response.choices[0].message.content
-        logger.info(f"Raw OpenAI response: {raw_response}")
-
-        json_match = re.search(r'\{.*\}', raw_response, re.DOTALL)
-        json_str = json_match.group(0) if json_match else raw_response
-        jd_data = json.loads(json_str)
-
-        db.collection('jd').document(uid).set(jd_data, merge=True)
-        logger.info(f"JD saved to Firestore for user {uid}")
-
-        return {"status": "success"}
-    except Exception as e:
-        logger.error(f"Error in generate_jd: {str(e)}")
-        return {"status": "failed", "error": str(e)}
+        span.usage(response.usage)
+
+    raw_response = response.choices[0].message.content
+    logger.debug("Raw OpenAI response: %s", raw_response)
+
+    json_match = re.search(r'\{.*\}', raw_response, re.DOTALL)
+    json_str = json_match.group(0) if json_match else raw_response
+    return json.loads(json_str)
+
+def cached_jd(openai_client, goal_data, experience, on_section=None, timings=None):
+    """(jd_data, source) for the goal and experience, from jd_cache or a new completion."""
+    company = goal_data.get('company', '')
+    position = goal_data.get('position', '')
+    location = goal_data.get('location', '')
+    return jd_cache.get_or_compute(
+        jd_cache_inputs(company, position, location, experience), JD_MODEL_PARAMS,
+        lambda: request_jd(openai_client, company, position, location, experience, on_section, timings), db=db)
+
+def run_generate_jd(uid, openai_client, store, goal_data, resume_data, stream=False):
+    """Generate the JD for the user's goal and resume and write it to jd/{uid}; returns (jd_data, source, timings)."""
+    if goal_data is None:
+        logger.error(f"No goal data found for user {uid}")
+        raise https_fn.HttpsError('not-found', "Goal data not found")
+    if resume_data is None:
+        logger.error(f"No resume data found for user {uid}")
+        raise https_fn.HttpsError('not-found', "Resume data not found")
+
+    experience = resume_data.get('years_of_experience', 'Not Found')
+    timings = {}
+    jd_data, source = cached_jd(openai_client, goal_data, experience,
+                                jd_section_writer(store, uid) if stream else None, timings)
+    logger.info(f"JD for user {uid} from {source}; cache stats: {jd_cache.stats()}")
+    if timings:
+        logger.info(f"JD stream for user {uid}: first section after {timings['first_item_ms']} ms "
+                    f"of {timings['total_ms']} ms")
+
+    store.put('jd', uid, {**jd_data, "partial": False} if stream else jd_data, merge=True)
+    return jd_data, source, timings
 
 @https_fn.on_call(region="asia-south2", memory=512, secrets=["OPENAI_API_KEY"])
-def analyze_missing_skills(req: https_fn.CallableRequest):
-    logger.info("Starting analyze_missing_skills function...")
+@track_cold_start
+@metrics.traced
+def generate_jd(req: https_fn.CallableRequest):
+    logger.info("Starting generate_jd function...")
     try:
         init_services(load_spacy=False)
+        openai_client = get_openai_client()
         if not openai_client:
             raise ValueError("OpenAI client not initialized.")
         if db is None:
+            logger.error("Firestore client (db) is None after init_services.")
             raise ValueError("Firestore client not initialized.")
 
+        logger.info(f"Type of db: {type(db)}")
+
         uid = req.auth.uid
         logger.info(f"User UID: {uid}")
 
-        # Fetch JD from Firestore
-        jd_doc = db.collection('jd').document(uid).get()
-        if not jd_doc.exists:
-            logger.error(f"No JD found for user {uid}")
-            raise https_fn.HttpsError('not-found', "JD not found")
-
-        jd_data = jd_doc.to_dict()
-        jd_text = (
-            f"Summary: {jd_data.get('summary', '')}\n"
-            f"Responsibilities: {jd_data.get('responsibilities', '')}\n"
-            f"Qualifications: {jd_data.get('qualifications', '')}\n"
-            f"Skills: {jd_data.get('skills', '')}\n"
-            f"Relevance: {jd_data.get('relevance', '')}"
-        )
+        # Goal and resume in one round trip.
+        store = datastore.DataStore(db)
+        goal_data, resume_data = store.get_many([('udata', uid), ('resume', uid)])
 
-        # Fetch resume from Firestore
-        resume_doc = db.collection('resume').document(uid).get()
-        if not resume_doc.exists:
-            logger.error(f"No resume found for user {uid}")
-            raise https_fn.HttpsError('not-found', "Resume not found")
-
-        resume_data = resume_doc.to_dict()
-        resume_text = (
-            f"Job Title: {resume_data.get('current_job_title', '')}\n"
-            f"Experience: {resume_data.get('years_of_experience', '')}\n"
-            f"Description: {resume_data.get('brief_description', '')}\n"
-            f"Skills: {', '.join(resume_data.get('key_skills_tools', []))}\n"
-            f"Education: {resume_data.get('highest_education', '')}\n"
-            f"Certifications: {', '.join(resume_data.get('certifications', []))}"
-        )
+        # {"stream": true}: sections are written to jd/{uid} as they are generated ("partial": true
+        # until the whole JD is in), so the app can render them before the completion finishes.
+        stream = bool((req.data or {}).get("stream"))
+        jd_data, source, timings = run_generate_jd(uid, openai_client, store, goal_data, resume_data, stream)
+        logger.info(f"JD saved to Firestore for user {uid}; round trips: {dict(store.round_trips)}")
 
-        # Open AI prompt
-        prompt = f"""
-        You are a career expert tasked with comparing a job description (JD) and a resume to identify gaps. Follow these steps:
-        1. Extract all required skills, qualifications, and experiences from the JD, considering all sections (summary, responsibilities, qualifications, skills, relevance).
-        2. Identify skills, qualifications, and experiences present in the resume, considering all sections (job title, experience, description, skills, education, certifications).
-        3. Compare the two and identify:
-           - "education_gap": If the JD's qualifications require a specific education level or field (e.g., "Bachelor's degree in Computer Science") that the resume's highest_education does not meet (e.g., "Diploma in Mechanical Engineering"), describe the mismatch as a string (e.g., "JD requires: Bachelor's degree in Computer Science; Resume has: Diploma in Mechanical Engineering"). If no mismatch, return "No education gap".
-           - "high_priority_gaps": Critical non-skill requirements (e.g., certifications, core experiences) in the JD that are missing from the resume (e.g., "JD requires: AWS certification; Not found in resume").
-           - "low_priority_gaps": Less critical non-skill requirements (e.g., nice-to-have experiences) in the JD that are missing from the resume (e.g., "JD requires: Experience with microservices architecture; Not found in resume").
-           - Missing skills: Skills required by the JD but not present in the resume.
-        4. Categorize missing skills into:
-           - "technical_skills": Skills related to tools, technologies, or specific expertise (e.g., "Kubernetes", "Python").
-           - "soft_skills": Skills related to interpersonal or behavioral traits (e.g., "Communication", "Problem-solving").
-           Use your judgment to categorize skills and prioritize non-skill gaps based on their importance to the role.
-        Return the result as a JSON object with "education_gap" (string), "high_priority_gaps" (list of strings), "low_priority_gaps" (list of strings), "technical_skills" (list of strings), and "soft_skills" (list of strings). Do not include any additional text or explanations.
-
-        JD:
-        {jd_text}
-
-        Resume:
-        {resume_text}
-        """
+        if stream:
+            return {"status": "success", "source": source, "timings": timings}
+        return {"status": "success"}
+    except Exception as e:
+        logger.error(f"Error in generate_jd: {str(e)}")
+        return {"status": "failed", "error": str(e)}
 
+# The gap analysis runs locally (skill_gap.py); the LLM only classifies the JD items the
+# local rules can't, in a much smaller prompt than the previous whole-JD-vs-resume comparison.
+SKILL_GAP_MODEL_PARAMS = {"model": "gpt-4o", "max_tokens": 400, "temperature": 0}
+RESUME_EVIDENCE_SECTIONS = ("summary", "experience", "skills", "certifications", "projects")
+
+def classify_residual(openai_client, residual, resume_data):
+    with metrics.span("llm", model=SKILL_GAP_MODEL_PARAMS["model"]) as span:
         response = openai_client.chat.completions.create(
-            model="gpt-4o",
+            model=SKILL_GAP_MODEL_PARAMS["model"],
             messages=[
                 {"role": "system", "content": "You are a career expert specializing in resume and JD analysis."},
-                {"role": "user", "content": prompt},
+                {"role": "user", "content": skill_gap.residual_prompt(residual, resume_data)},
             ],
-            max_tokens=1500,
-            temperature=0.7,
+            max_tokens=SKILL_GAP_MODEL_PARAMS["max_tokens"],
+            temperature=SKILL_GAP_MODEL_PARAMS["temperature"],
         )
+        span.usage(response.usage)
+
+    raw_response = response.choices[0].message.content
+    logger.debug("Raw OpenAI response: %s", raw_response)
+
+    json_match = re.search(r'\{.*\}', raw_response, re.DOTALL)
+    json_str = json_match.group(0) if json_match else raw_response
+    return json.loads(json_str)
+
+def run_skill_analysis(uid, store, jd_data, resume_data, index, stream=False):
+    """Compare the JD with the resume and write skill_analysis/{uid}; returns the analysis."""
+    if jd_data is None:
+        logger.error(f"No JD found for user {uid}")
+        raise https_fn.HttpsError('not-found', "JD not found")
+    if resume_data is None:
+        logger.error(f"No resume found for user {uid}")
+        raise https_fn.HttpsError('not-found', "Resume not found")
+
+    # Skills written anywhere in these sections count as present, not just the extracted list.
+    index = resume_index.valid(index)
+    resume_text = resume_index.section_text(index, RESUME_EVIDENCE_SECTIONS) if index else ""
+    analysis_data, residual = skill_gap.analyze(jd_data, resume_data, taxonomies, resume_text)
+    engine = "local"
+    if residual and stream:
+        # The local analysis is complete on its own; the app can show it while the LLM runs.
+        store.put('skill_analysis', uid, {**analysis_data, 'engine': engine, 'partial': True, 'uid': uid,
+                                          'timestamp': datetime.utcnow().isoformat()})
+    if residual:
+        logger.info(f"{len(residual)} JD items left for the LLM: {residual}")
+        openai_client = get_openai_client()
+        try:
+            if not openai_client:
+                raise ValueError("OpenAI client not initialized.")
+            skill_gap.apply_residual(analysis_data, classify_residual(openai_client, residual, resume_data))
+            engine = "local+llm"
+        except Exception as e:
+            # The local analysis stands on its own; only the residual items go unclassified.
+            logger.warning(f"Residual classification failed, keeping the local analysis: {str(e)}")
+
+    # Add timestamp and UID to the result
+    analysis_data['engine'] = engine
+    analysis_data['uid'] = uid
+    analysis_data['timestamp'] = datetime.utcnow().isoformat()
+
+    # Store in Firestore (overwrite existing document)
+    store.put('skill_analysis', uid, analysis_data)
+    return analysis_data
 
-        raw_response = response.choices[0].message.content
-        logger.info(f"Raw OpenAI response: {raw_response}")
-
-        json_match = re.search(r'\{.*\}', raw_response, re.DOTALL)
-        json_str = json_match.group(0) if json_match else raw_response
-        analysis_data = json.loads(json_str)
+@https_fn.on_call(region="asia-south2", memory=512, secrets=["OPENAI_API_KEY"])
+@track_cold_start
+@metrics.traced
+def analyze_missing_skills(req: https_fn.CallableRequest):
+    logger.info("Starting analyze_missing_skills function...")
+    try:
+        init_services(load_taxonomy=True)
+        if db is None:
+            raise ValueError("Firestore client not initialized.")
 
-        # Add timestamp and UID to the result
-        analysis_data['uid'] = uid
-        analysis_data['timestamp'] = datetime.utcnow().isoformat()
+        uid = req.auth.uid
+        logger.info(f"User UID: {uid}")
 
-        # Store in Firestore (overwrite existing document)
-        db.collection('skill_analysis').document(uid).set(analysis_data, merge=False)
-        logger.info(f"Analysis saved to Firestore for user {uid}")
+        # JD, resume and resume index in one round trip.
+        store = datastore.DataStore(db)
+        jd_data, resume_data, index = store.get_many(
+            [('jd', uid), ('resume', uid), (resume_index.COLLECTION, uid)])
+        analysis_data = run_skill_analysis(uid, store, jd_data, resume_data, index,
+                                           stream=bool((req.data or {}).get("stream")))
+        logger.info(f"Analysis saved to Firestore for user {uid} ({analysis_data['engine']}); "
+                    f"round trips: {dict(store.round_trips)}")
 
         return {"status": "success", "result": analysis_data}
     except Exception as e:
         logger.error(f"Error in analyze_missing_skills: {str(e)}")
         return {"status": "failed", "error": str(e)}
 
+# Course recommendations depend only on the skill, so they are looked up and cached per skill
+# (shared by every user) instead of in one prompt per user.
+COURSE_CATEGORIES = ("Technical Skills", "Soft Skills", "High Priority Gaps", "Low Priority Gaps")
+COURSE_MODEL_PARAMS = {"model": "gpt-4o", "max_tokens": 700, "temperature": 0.7, "prompt_version": 1}
+COURSE_SEARCH_WORKERS = 8
+# Streamed course lists are written to course_search/{uid} at most this often.
+COURSE_STREAM_WRITE_INTERVAL_S = int(os.environ.get("COURSE_STREAM_WRITE_INTERVAL_MS", "250")) / 1000
+course_cache = llm_cache.LLMCache("search_courses",
+                                  ttl_s=int(os.environ.get("COURSE_CACHE_TTL_SEC", str(14 * 24 * 3600))),
+                                  max_entries=int(os.environ.get("COURSE_CACHE_MAX_ENTRIES", "2048")))
+
+def valid_course(course):
+    return isinstance(course, dict) and bool(course.get("title")) and bool(course.get("link"))
+
+def request_courses(openai_client, skill, usage, on_course=None):
+    """Courses for one skill; with on_course, the completion is streamed and on_course(course)
+    is called for each valid course as soon as it is complete."""
+    prompt = f"""
+        You are an expert in online education and course recommendations. I need to find courses to improve the skill: {skill}
+        Search for courses on the following platforms, ensuring they are accessible in India:
+        - Udemy: Find relevant courses with high ratings (4.5+ stars) and significant enrollments (e.g., 10,000+ students).
+        - Coursera: Find courses from reputable institutions (e.g., universities or companies like Google, IBM).
+        - YouTube: Identify authentic education channels with high views (e.g., 500,000+ views on relevant videos) and suggest either their playlists or create a playlist of the most relevant 3-5 videos for the skill.
+        Additionally, if there are other well-known sources (e.g., edX, Udacity, LinkedIn Learning) with relevant courses for this skill, include those as well.
+        For each course, provide:
+        - Source (e.g., Udemy, Coursera, YouTube).
+        - Course or playlist title.
+        - Fee in Indian Rupees (INR) (e.g., "Free", "₹4150", "Subscription-based"). Convert USD to INR using an exchange rate of 1 USD = 83 INR.
+        - Duration (e.g., "10 hours", "4 weeks").
+        - Direct link (or a search link if a direct link isn't available).
+        Provide the top 5 course or playlist suggestions. Ensure the suggestions are recent (2024 or 2025). Return the result as a JSON object with the structure:
+        {{"courses": [{{"source": "...", "title": "...", "fee": "...", "duration": "...", "link": "..."}}, ...]}}
+        """
+
+    messages = [
+        {"role": "system", "content": "You are an expert in online education and course recommendations."},
+        {"role": "user", "content": prompt},
+    ]
+    if on_course is not None:
+        def on_item(path, value):
+            if path[0] == "courses" and len(path) == 2 and valid_course(value):
+                on_course(value)
+
+        course_data, raw_response, timings = llm_stream.stream_json(
+            openai_client, on_item, model=COURSE_MODEL_PARAMS["model"], messages=messages,
+            max_tokens=COURSE_MODEL_PARAMS["max_tokens"], temperature=COURSE_MODEL_PARAMS["temperature"])
+        usage.update({key: timings[key] for key in ("prompt_tokens", "completion_tokens") if key in timings})
+        logger.info(f"Streamed courses for {skill}: first after {timings['first_item_ms']} ms "
+                    f"of {timings['total_ms']} ms")
+        logger.debug("Streamed OpenAI response for %s: %s", skill, raw_response)
+        courses = course_data.get("courses")
+        if not courses:
+            raise ValueError(f"No courses returned for {skill}")
+        return courses
+
+    with metrics.span("llm", model=COURSE_MODEL_PARAMS["model"]) as span:
+        response = openai_client.chat.completions.create(
+            model=COURSE_MODEL_PARAMS["model"],
+            messages=messages,
+            max_tokens=COURSE_MODEL_PARAMS["max_tokens"],
+            temperature=COURSE_MODEL_PARAMS["temperature"],
+        )
+        span.usage(response.usage)
+    if response.usage is not None:
+        usage.update(prompt_tokens=response.usage.prompt_tokens, completion_tokens=response.usage.completion_tokens)
+
+    raw_response = response.choices[0].message.content
+    logger.debug("Raw OpenAI response for %s: %s", skill, raw_response)
+
+    json_match = re.search(r'\{.*\}', raw_response, re.DOTALL)
+    json_str = json_match.group(0) if json_match else raw_response
+    courses = json.loads(json_str).get("courses")
+    if not courses:
+        raise ValueError(f"No courses returned for {skill}")  # not cached, so it is retried next time
+    return courses
+
+def course_skill_key(skill):
+    # "k8s" and "Kubernetes" share one cache entry.
+    canonical = taxonomies["skills"].canonical(skill) if taxonomies else None
+    return llm_cache.normalize(canonical or skill)
+
+def find_courses(openai_client, skills, on_courses=None):
+    """{skill: [course, ...]} for each skill; only cache misses go to OpenAI, concurrently.
+
+    With on_courses, misses are streamed and on_courses(skill, courses_so_far) is called as
+    each course arrives, and once with the final list for every skill (cached ones included).
+    """
+    usage = Counter()
+    sources = Counter()
+    lock = threading.Lock()
+
+    def lookup(skill):
+        call_usage = Counter()
+        on_course = None
+        if on_courses is not None:
+            streamed = []
+
+            def on_course(course):
+                streamed.append(course)
+                on_courses(skill, list(streamed))
+        try:
+            courses, source = course_cache.get_or_compute(
+                {"skill": course_skill_key(skill)}, COURSE_MODEL_PARAMS,
+                lambda: request_courses(openai_client, skill, call_usage, on_course), db=db)
+        except Exception as e:
+            # One failed skill should not cost the user every other skill's results.
+            logger.error(f"Course search failed for {skill}: {str(e)}")
+            courses, source = [], "failed"
+        if on_courses is not None:
+            on_courses(skill, courses)
+        with lock:
+            usage.update(call_usage)
+            sources[source] += 1
+        return skill, courses
+
+    unique = list(dict.fromkeys(skills))
+    if not unique:
+        return {}, usage, sources
+    with ThreadPoolExecutor(max_workers=min(COURSE_SEARCH_WORKERS, len(unique))) as pool:
+        found = dict(pool.map(metrics.bind(lookup), unique))
+    return found, usage, sources
+
+def run_course_search(uid, openai_client, skills_data, stream=False, save=False):
+    """{category: {skill: [course, ...]}} for the categorized skills; returns (course_data, timings).
+
+    With stream, course lists are written to course_search/{uid} as courses arrive ("status":
+    "streaming" until every skill is done), for progressive rendering; with stream or save the
+    final result is written there too.
+    """
+    # A skill listed under several categories is looked up once.
+    skills = [skill for category in COURSE_CATEGORIES for skill in (skills_data.get(category) or {})]
+
+    store = datastore.DataStore(db)
+    on_courses = writer = None
+    first_course = []
+    start = time.perf_counter()
+    if stream:
+        store.put('course_search', uid, {'status': 'streaming', 'result': {}, 'uid': uid,
+                                         'timestamp': datetime.utcnow().isoformat()})
+        writer = llm_stream.PartialWriter(lambda fields: store.put('course_search', uid, fields, merge=True),
+                                          COURSE_STREAM_WRITE_INTERVAL_S)
+        categories_of = {skill: [category for category in COURSE_CATEGORIES
+                                 if skill in (skills_data.get(category) or {})] for skill in skills}
+
+        def on_courses(skill, courses):
+            if courses and not first_course:
+                first_course.append((time.perf_counter() - start) * 1000)
+            writer.update({'result': {category: {skill: courses} for category in categories_of[skill]}})
+
+    found, usage, sources = find_courses(openai_client, skills, on_courses)
+    total_ms = (time.perf_counter() - start) * 1000
+    logger.info(f"Course search for {len(found)} skills in {total_ms:.0f} ms, "
+                f"sources: {dict(sources)}, tokens: {dict(usage)}")
+
+    course_data = {
+        category: {skill: found.get(skill, []) for skill in (skills_data.get(category) or {})}
+        for category in COURSE_CATEGORIES
+    }
+    timings = {"first_item_ms": round(first_course[0], 1) if first_course else None,
+               "total_ms": round(total_ms, 1)}
+    if writer is not None:
+        writer.flush()
+        logger.info(f"Course stream for user {uid}: first course after {timings['first_item_ms']} ms, "
+                    f"{writer.writes} partial writes")
+    if stream or save:
+        store.put('course_search', uid, {'status': 'complete', 'result': course_data, 'uid': uid,
+                                         'timings': timings, 'timestamp': datetime.utcnow().isoformat()})
+        logger.info(f"Courses saved to Firestore for user {uid}; round trips: {dict(store.round_trips)}")
+    return course_data, timings
+
 @https_fn.on_call(region="asia-south2", memory=512, secrets=["OPENAI_API_KEY"])
+@track_cold_start
+@metrics.traced
 def search_courses(req: https_fn.CallableRequest):
     logger.info("Starting search_courses function...")
     try:
-        init_services(load_spacy=False)
+        init_services(load_spacy=False, load_taxonomy=True)
+        openai_client = get_openai_client()
         if not openai_client:
             raise ValueError("OpenAI client not initialized.")
         if db is None:
@@ -561,103 +1390,215 @@ def search_courses(req: https_fn.CallableRequest):
             logger.error("No skills provided for course search.")
             raise https_fn.HttpsError('invalid-argument', "Skills data is required.")
 
-        # Open AI prompt with escaped curly braces
-        prompt = f"""
-        You are an expert in online education and course recommendations. I need to find courses to improve the following skills, categorized as follows:
-        - Technical Skills: {', '.join(skills_data.get('Technical Skills', {}).keys()) or 'None'}
-        - Soft Skills: {', '.join(skills_data.get('Soft Skills', {}).keys()) or 'None'}
-        - High Priority Gaps: {', '.join(skills_data.get('High Priority Gaps', {}).keys()) or 'None'}
-        - Low Priority Gaps: {', '.join(skills_data.get('Low Priority Gaps', {}).keys()) or 'None'}
-        Search for courses on the following platforms, ensuring they are accessible in India:
-        - Udemy: Find relevant courses with high ratings (4.5+ stars) and significant enrollments (e.g., 10,000+ students).
-        - Coursera: Find courses from reputable institutions (e.g., universities or companies like Google, IBM).
-        - YouTube: Identify authentic education channels with high views (e.g., 500,000+ views on relevant videos) and suggest either their playlists or create a playlist of the most relevant 3-5 videos for the skills.
-        Additionally, if there are other well-known sources (e.g., edX, Udacity, LinkedIn Learning) with relevant courses for these skills, include those as well.
-        For each course, provide:
-        - Source (e.g., Udemy, Coursera, YouTube).
-        - Course or playlist title.
-        - Fee in Indian Rupees (INR) (e.g., "Free", "₹4150", "Subscription-based"). Convert USD to INR using an exchange rate of 1 USD = 83 INR.
-        - Duration (e.g., "10 hours", "4 weeks").
-        - Direct link (or a search link if a direct link isn't available).
-        Provide the top 5 course or playlist suggestions per skill, categorized by the skill type (Technical Skills, Soft Skills, High Priority Gaps, Low Priority Gaps). Ensure the suggestions are recent (2024 or 2025) and relevant to the skills provided. Return the result as a JSON object with the structure:
-        {{
-          "Technical Skills": {{
-            "Skill1": [{{"source": "...", "title": "...", "fee": "...", "duration": "...", "link": "..."}}, ...],
-            ...
-          }},
-          "Soft Skills": {{...}},
-          "High Priority Gaps": {{...}},
-          "Low Priority Gaps": {{...}}
-        }}
-        """
-
-        response = openai_client.chat.completions.create(
-            model="gpt-4o",
-            messages=[
-                {"role": "system", "content": "You are an expert in online education and course recommendations."},
-                {"role": "user", "content": prompt},
-            ],
-            max_tokens=2000,
-            temperature=0.7,
-        )
-
-        raw_response = response.choices[0].message.content
-        logger.info(f"Raw OpenAI response: {raw_response}")
-
-        json_match = re.search(r'\{.*\}', raw_response, re.DOTALL)
-        json_str = json_match.group(0) if json_match else raw_response
-        course_data = json.loads(json_str)
-
-        return {"status": "success", "result": course_data}
+        stream = bool(req.data.get('stream'))
+        course_data, timings = run_course_search(uid, openai_client, skills_data, stream=stream)
+        if not stream:
+            return {"status": "success", "result": course_data}
+        return {"status": "success", "result": course_data, "timings": timings}
     except Exception as e:
         logger.error(f"Error in search_courses: {str(e)}")
         return {"status": "failed", "error": str(e)}
 
-@https_fn.on_call(region="asia-south2", memory=512, secrets=["GEMINI_API_KEY"])
-def schedule_and_block_courses(req: https_fn.CallableRequest):
-    logger.info("Starting schedule_and_block_courses function...")
+# The whole resume-to-courses flow in one callable, as a DAG (pipeline_dag.py) instead of six
+# client round trips, with each stage handing its result to the next in memory:
+#   upload -> parse -> extract -----------> generate_jd -> analyze -> search_courses
+#          \-> prefetch_jd (udata) ------/
+# prefetch_jd reads the goal while OCR runs and, if the user has fields extracted from an earlier
+# resume, generates the JD with that experience into jd_cache; generate_jd then calls OpenAI only
+# if the new resume changed the JD inputs. Stage status and timings are kept in career_pipeline/{uid};
+# a failed run for the same resume.pdf resumes after the stages it completed.
+CAREER_PIPELINE_COLLECTION = "career_pipeline"
+CAREER_STAGES = ("upload", "parse", "extract", "prefetch_jd", "generate_jd", "analyze", "search_courses")
+CAREER_PIPELINE_TIMEOUT_SEC = 540
+CAREER_PIPELINE_PREFETCH_JD = os.environ.get("CAREER_PIPELINE_PREFETCH_JD", "1") == "1"
+
+def set_career_pipeline(uid, status, **fields):
+    fields = {"status": status, "updated": datetime.utcnow().isoformat(), **fields}
+    with metrics.span("firestore.set", collection=CAREER_PIPELINE_COLLECTION):
+        db.collection(CAREER_PIPELINE_COLLECTION).document(uid).set(fields, merge=True)
+    logger.info(f"Career pipeline {uid}: {status}")
+
+def set_career_stage(uid, stage, fields):
+    with metrics.span("firestore.set", collection=CAREER_PIPELINE_COLLECTION):
+        db.collection(CAREER_PIPELINE_COLLECTION).document(uid).set(
+            {"stages": {stage: fields}, "updated": datetime.utcnow().isoformat()}, merge=True)
+    logger.info(f"Career pipeline {uid}: {stage} {fields['status']}")
+
+def course_skills(analysis_data):
+    """search_courses' categorized skills from a skill_analysis document."""
+    def requirement(gap):
+        # "JD requires: X; Resume has: Y" -> "X"
+        return re.sub(r"^JD requires:\s*", "", str(gap)).split("; ", 1)[0]
+
+    return {
+        "Technical Skills": {skill: skill for skill in analysis_data.get("technical_skills") or []},
+        "Soft Skills": {skill: skill for skill in analysis_data.get("soft_skills") or []},
+        "High Priority Gaps": {requirement(gap): gap for gap in analysis_data.get("high_priority_gaps") or []},
+        "Low Priority Gaps": {requirement(gap): gap for gap in analysis_data.get("low_priority_gaps") or []},
+    }
+
+def career_pipeline_stages(uid, blob, openai_client, pipeline_options):
+    """The pipeline's stages; each reads what an earlier run's stages wrote if their results aren't in memory."""
+    stream = bool(pipeline_options.get("stream"))
+
+    def upload(results):
+        if blob is None:
+            logger.error(f"PDF file does not exist at gs://{BUCKET_NAME}/resumes/{uid}/resume.pdf")
+            raise https_fn.HttpsError('not-found', f"PDF file not found for user {uid}")
+        return {"generation": str(blob.generation), "size": blob.size}
+
+    def parse(results):
+        return run_resume_parse(uid, blob, force=pipeline_options.get("force", False))
+
+    def extract(results):
+        index = load_resume_index(uid)
+        if pipeline_options.get("extractor") == "hybrid":
+            entities = run_hybrid_extraction(uid, openai_client, mode=pipeline_options.get("mode"))
+        else:
+            entities = run_resume_field_extraction(uid, mode=pipeline_options.get("mode"))
+        return {"resume": entities, "index": index}
+
+    def prefetch_jd(results):
+        goal_data, previous = datastore.DataStore(db).get_many([('udata', uid), ('resume', uid)])
+        if goal_data is None:
+            logger.error(f"No goal data found for user {uid}")
+            raise https_fn.HttpsError('not-found', "Goal data not found")
+        if previous is not None and CAREER_PIPELINE_PREFETCH_JD:
+            experience = previous.get('years_of_experience', 'Not Found')
+            _, source = cached_jd(openai_client, goal_data, experience)
+            logger.info(f"JD prefetched for user {uid} with the previous experience ({experience}) from {source}")
+        return {"goal": goal_data}
+
+    def generate_jd(results):
+        store = datastore.DataStore(db)
+        goal_data = (results.get("prefetch_jd") or {}).get("goal")
+        resume_data = (results.get("extract") or {}).get("resume")
+        if goal_data is None or resume_data is None:
+            stored_goal, stored_resume = store.get_many([('udata', uid), ('resume', uid)])
+            goal_data, resume_data = goal_data or stored_goal, resume_data or stored_resume
+        jd_data, _, _ = run_generate_jd(uid, openai_client, store, goal_data, resume_data, stream)
+        return jd_data
+
+    def analyze(results):
+        store = datastore.DataStore(db)
+        jd_data = results.get("generate_jd")
+        extracted = results.get("extract") or {}
+        resume_data, index = extracted.get("resume"), extracted.get("index")
+        if jd_data is None or resume_data is None:
+            stored = store.get_many([('jd', uid), ('resume', uid), (resume_index.COLLECTION, uid)])
+            jd_data, resume_data = jd_data or stored[0], resume_data or stored[1]
+            index = index or stored[2]
+        return run_skill_analysis(uid, store, jd_data, resume_data, index, stream)
+
+    def search_courses(results):
+        analysis_data = results.get("analyze") or datastore.DataStore(db).get('skill_analysis', uid)
+        if analysis_data is None:
+            raise https_fn.HttpsError('not-found', "Skill analysis not found")
+        course_data, _ = run_course_search(uid, openai_client, course_skills(analysis_data),
+                                           stream=stream, save=True)
+        return course_data
+
+    stages = {
+        "upload": pipeline_dag.Stage("upload", upload),
+        "parse": pipeline_dag.Stage("parse", parse, after=("upload",)),
+        "extract": pipeline_dag.Stage("extract", extract, after=("parse",)),
+        "prefetch_jd": pipeline_dag.Stage("prefetch_jd", prefetch_jd, after=("upload",)),
+        "generate_jd": pipeline_dag.Stage("generate_jd", generate_jd, after=("prefetch_jd", "extract")),
+        "analyze": pipeline_dag.Stage("analyze", analyze, after=("generate_jd",)),
+        "search_courses": pipeline_dag.Stage("search_courses", search_courses, after=("analyze",)),
+    }
+    return [stages[name] for name in CAREER_STAGES]
+
+def resumable_stages(previous, generation):
+    """Stages an earlier failed (or abandoned) run for the same resume.pdf completed, else None."""
+    if not previous or previous.get("source_generation") != generation:
+        return None
+    status = previous.get("status")
+    if status == "running":
+        updated = datetime.fromisoformat(previous.get("updated") or previous.get("started"))
+        if (datetime.utcnow() - updated).total_seconds() < CAREER_PIPELINE_TIMEOUT_SEC:
+            raise https_fn.HttpsError('already-exists', "The career pipeline is already running")
+    elif status != "failed":
+        return None
+    return {name for name, stage in (previous.get("stages") or {}).items() if stage.get("status") == "done"}
+
+@https_fn.on_call(region="asia-south2", memory=1024, cpu=1, timeout_sec=CAREER_PIPELINE_TIMEOUT_SEC,
+                  secrets=["OPENAI_API_KEY"])
+@track_cold_start
+@metrics.traced
+def run_career_pipeline(req: https_fn.CallableRequest):
+    logger.info("Starting run_career_pipeline function...")
     try:
-        init_services(load_spacy=False)
+        init_services(load_spacy=False, load_taxonomy=True)
+        openai_client = get_openai_client()
+        if not openai_client:
+            raise ValueError("OpenAI client not initialized.")
         if db is None:
             raise ValueError("Firestore client not initialized.")
 
         uid = req.auth.uid
         logger.info(f"User UID: {uid}")
+        pipeline_options = req.data or {}
+
+        blob = get_bucket().get_blob(f"resumes/{uid}/resume.pdf")
+        generation = str(blob.generation) if blob is not None else None
+        previous = datastore.DataStore(db).get(CAREER_PIPELINE_COLLECTION, uid)
+        done = None if pipeline_options.get("restart") else resumable_stages(previous, generation)
+        started = datetime.utcnow().isoformat()
+        if done is None:
+            done = set()
+            db.collection(CAREER_PIPELINE_COLLECTION).document(uid).set({
+                "status": "running", "source_generation": generation, "started": started, "updated": started,
+                "stages": {name: {"status": "pending"} for name in CAREER_STAGES},
+            })
+        else:
+            logger.info(f"Resuming the career pipeline for {uid} after {sorted(done)}")
+            set_career_pipeline(uid, "running", started=started, resumed_after=sorted(done), error=None,
+                                failed_stage=None, stages={name: {"status": "pending", "error": None}
+                                                           for name in CAREER_STAGES if name not in done})
+
+        start = time.perf_counter()
+        try:
+            results, timings = asyncio.run(pipeline_dag.run_dag(
+                career_pipeline_stages(uid, blob, openai_client, pipeline_options),
+                lambda stage, fields: set_career_stage(uid, stage, fields), done))
+        except pipeline_dag.StageError as e:
+            set_career_pipeline(uid, "failed", failed_stage=e.stage, error=str(e.error))
+            raise
+        total_ms = round((time.perf_counter() - start) * 1000, 1)
+        # Stage time beyond wall time is what overlapping the stages saved.
+        set_career_pipeline(uid, "complete", total_ms=total_ms,
+                            overlap_ms=round(max(0.0, sum(timings.values()) - total_ms), 1))
+        logger.info(f"Career pipeline for {uid} done in {total_ms} ms; stages: {timings}")
+
+        return {"status": "success", "pipeline": f"{CAREER_PIPELINE_COLLECTION}/{uid}",
+                "resumed_after": sorted(done), "timings": timings, "total_ms": total_ms,
+                "result": results.get("search_courses")}
+    except Exception as e:
+        logger.error(f"Error in run_career_pipeline: {str(e)}")
+        return {"status": "failed", "error": str(e)}
 
-        data = req.data
-        start_date = data.get("start_date")
-        end_date = data.get("end_date")
-        selected_days = data.get("selected_days", [])
-        time_slot = data.get("time_slot")
-        hours_per_day = data.get("hours_per_day", 2.0)
+# The local scheduler is authoritative; Gemini is only used when asked for ("planner": "gemini")
+# or, if SCHEDULER_LLM_FALLBACK is on, when the constraints can't be parsed locally.
+SCHEDULER_LLM_FALLBACK = os.environ.get("SCHEDULER_LLM_FALLBACK", "1") == "1"
 
-        courses_doc = db.collection('selected_courses').document(uid).get()
-        if not courses_doc.exists:
-            raise https_fn.HttpsError('not-found', "No selected courses found")
+def gemini_schedule(courses, start_date, end_date, selected_days, time_slot, hours_per_day):
+    total_hours = sum(course.hours for course in courses)
+    course_list = ", ".join(f"{course.title} ({course.duration})" for course in courses)
+
+    gemini_api_key = os.environ.get("GEMINI_API_KEY")
+    if not gemini_api_key:
+        logger.error("Gemini API key not found in environment variables")
+        raise ValueError("Gemini API key not found")
+
+    logger.info("Configuring Gemini API...")
+    with timed("google.generativeai"):
+        import google.generativeai as genai
+    genai.configure(api_key=gemini_api_key)
+    model = genai.GenerativeModel("gemini-1.5-flash")
 
-        courses_data = courses_doc.to_dict()
-        total_hours = 0
-        course_list = ""
-        for category in ['technical_skills', 'soft_skills', 'high_priority_gaps', 'low_priority_gaps']:
-            for skill, courses in courses_data.get(category, {}).items():
-                for course in courses:
-                    duration = course.get('duration', '0 hours')
-                    hours = float(re.search(r'(\d+\.?\d*)', duration).group(1) if re.search(r'(\d+\.?\d*)', duration) else 0)
-                    total_hours += hours
-                    course_list += f"{course['title']} ({duration}), "
-
-        # Use Gemini API
-        gemini_api_key = os.environ.get("GEMINI_API_KEY")
-        if not gemini_api_key:
-            logger.error("Gemini API key not found in environment variables")
-            raise ValueError("Gemini API key not found")
-
-        logger.info("Configuring Gemini API...")
-        genai.configure(api_key=gemini_api_key)
-        model = genai.GenerativeModel("gemini-1.5-flash")
-
-        prompt = f"""
-        Create a schedule for completing these courses: {course_list.rstrip(', ')}
+    prompt = f"""
+        Create a schedule for completing these courses: {course_list}
         Constraints:
         - Start date: {start_date}
         - End date: {end_date}
@@ -670,33 +1611,83 @@ def schedule_and_block_courses(req: https_fn.CallableRequest):
         Return only the JSON array, no additional text.
         """
 
+    with metrics.span("llm", model="gemini-1.5-flash") as span:
         response = model.generate_content(prompt)
-        logger.info(f"Gemini response: {response.text}")
+        span.set(chars=len(response.text or ""))
+    logger.debug("Gemini response: %s", response.text)
 
-        if not response.text:
-            raise ValueError("Gemini API returned an empty response")
+    if not response.text:
+        raise ValueError("Gemini API returned an empty response")
 
-        # Extract JSON array from the response
-        json_match = re.search(r'\[.*\]', response.text, re.DOTALL)
-        if not json_match:
-            logger.error(f"Failed to find JSON array in Gemini response: {response.text}")
-            raise ValueError("Gemini response does not contain a JSON array")
+    # Extract JSON array from the response
+    json_match = re.search(r'\[.*\]', response.text, re.DOTALL)
+    if not json_match:
+        logger.error(f"Failed to find JSON array in Gemini response ({len(response.text)} chars)")
+        raise ValueError("Gemini response does not contain a JSON array")
 
-        json_str = json_match.group(0)
-        try:
-            schedule = json.loads(json_str)
-            if not isinstance(schedule, list):
-                raise ValueError("Gemini response is not a JSON array")
-        except json.JSONDecodeError as e:
-            logger.error(f"Failed to parse Gemini response as JSON: {json_str}")
-            raise ValueError(f"Invalid JSON response from Gemini: {str(e)}")
-
-        db.collection('schedules').document(uid).set({
+    json_str = json_match.group(0)
+    try:
+        schedule = json.loads(json_str)
+        if not isinstance(schedule, list):
+            raise ValueError("Gemini response is not a JSON array")
+    except json.JSONDecodeError as e:
+        logger.error(f"Failed to parse Gemini response as JSON ({len(json_str)} chars): {str(e)}")
+        raise ValueError(f"Invalid JSON response from Gemini: {str(e)}")
+    return schedule
+
+@https_fn.on_call(region="asia-south2", memory=512, secrets=["GEMINI_API_KEY"])
+@track_cold_start
+@metrics.traced
+def schedule_and_block_courses(req: https_fn.CallableRequest):
+    logger.info("Starting schedule_and_block_courses function...")
+    try:
+        init_services(load_spacy=False)
+        if db is None:
+            raise ValueError("Firestore client not initialized.")
+
+        uid = req.auth.uid
+        logger.info(f"User UID: {uid}")
+
+        data = req.data
+        start_date = data.get("start_date")
+        end_date = data.get("end_date")
+        selected_days = data.get("selected_days", [])
+        time_slot = data.get("time_slot")
+        hours_per_day = data.get("hours_per_day", 2.0)
+
+        store = datastore.DataStore(db)
+        courses_data = store.get('selected_courses', uid)
+        if courses_data is None:
+            raise https_fn.HttpsError('not-found', "No selected courses found")
+
+        courses = course_scheduler.collect_courses(courses_data)
+        constraints = (start_date, end_date, selected_days, time_slot, hours_per_day)
+        unscheduled = []
+        if data.get("planner") == "gemini":
+            planner = "gemini"
+            schedule = gemini_schedule(courses, *constraints)
+        else:
+            try:
+                plan = course_scheduler.build_schedule(courses, *constraints)
+                planner = "local"
+                schedule, unscheduled = plan.sessions, plan.unscheduled
+                logger.info(f"Scheduled {len(courses)} courses into {len(schedule)} sessions "
+                            f"(Sundays used: {plan.sundays_used}, unscheduled: {len(unscheduled)})")
+            except ValueError as e:
+                if not SCHEDULER_LLM_FALLBACK:
+                    raise
+                logger.warning(f"Local scheduler rejected the constraints ({str(e)}); falling back to Gemini")
+                planner = "gemini"
+                schedule = gemini_schedule(courses, *constraints)
+
+        store.put('schedules', uid, {
             "schedule": schedule,
+            "planner": planner,
+            "unscheduled": unscheduled,
             "timestamp": datetime.utcnow().isoformat()
         }, merge=True)
 
-        return {"status": "success"}
+        return {"status": "success", "unscheduled": unscheduled}
     except Exception as e:
         logger.error(f"Error in schedule_and_block_courses: {str(e)}")
         return {"status": "failed", "error": str(e)}
\ No newline at end of file
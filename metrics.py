@@ -0,0 +1,245 @@
+"""Per-request latency spans with token counts and payload sizes, and in-process percentiles.
+
+    @traced                                   # under track_cold_start on each Cloud Function
+    def extract_resume_openai(req): ...
+
+    with span("gcs.download") as s:           # anywhere below it, in any module
+        data = blob.download_as_bytes()
+        s.set(bytes=len(data))
+    with span("llm", model="gpt-4o") as s:
+        response = client.chat.completions.create(...)
+        s.usage(response.usage)
+
+Each traced invocation logs one structured record ("spans", with these fields)
+
+    {"metric": "spans", "function": "extract_resume_openai", "ms": 2412.3, "error": null,
+     "spans": [{"span": "gcs.download", "ms": 81.2, "bytes": 48211}, {"span": "llm", "ms": 2210.4,
+               "model": "gpt-4o", "prompt_tokens": 1830, "completion_tokens": 412}, ...]}
+
+with the spans in the order they finished; a span inside another has "parent", and
+events counted with count() (e.g. "client.reused.storage") are under "counts". The
+current trace is a context variable, so spans in asyncio.to_thread stages attach
+to it; wrap pool workers with bind(). Spans outside any traced function are only
+aggregated, under the function "-".
+
+Every span also goes into a bounded window per (function, span) (the last
+METRICS_WINDOW durations, with running totals of numeric attributes): snapshot()
+is the percentile view, counters() the per-function event totals, and both are
+logged every METRICS_SUMMARY_EVERY invocations of a function.
+"""
+import functools
+import json
+import logging
+import os
+import random
+import threading
+import time
+from collections import Counter, defaultdict, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+logger = logging.getLogger('resume-parsing')
+
+WINDOW = int(os.environ.get("METRICS_WINDOW", "1024"))
+SUMMARY_EVERY = int(os.environ.get("METRICS_SUMMARY_EVERY", "200"))
+# Numeric span attributes summed in the aggregate view.
+TOTALED = ("bytes", "chars", "prompt_tokens", "completion_tokens", "items")
+
+_trace = ContextVar("metrics_trace", default=None)
+_parent = ContextVar("metrics_parent", default=None)
+
+_windows = defaultdict(lambda: deque(maxlen=WINDOW))
+_totals = defaultdict(Counter)
+_counts = defaultdict(Counter)
+_invocations = Counter()
+_lock = threading.Lock()
+
+
+class Span:
+    def __init__(self, name, attrs):
+        self.name = name
+        self.attrs = attrs
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    def usage(self, usage):
+        """Token counts from an OpenAI `usage` object (or the timings dict of llm_stream.stream_json)."""
+        if usage is None:
+            return
+        get = usage.get if isinstance(usage, dict) else lambda key: getattr(usage, key, None)
+        for key in ("prompt_tokens", "completion_tokens"):
+            if get(key) is not None:
+                self.attrs[key] = get(key)
+
+
+class _Trace:
+    def __init__(self, function):
+        self.function = function
+        self.id = random.getrandbits(32)
+        self.spans = []
+        self.counts = Counter()
+        self.lock = threading.Lock()
+
+
+def current_function():
+    """Name of the traced function this code runs under, or None."""
+    trace = _trace.get()
+    return trace.function if trace else None
+
+
+def current_trace_id():
+    """Random id of the current invocation, or None outside a traced function."""
+    trace = _trace.get()
+    return trace.id if trace else None
+
+
+def payload_size(value):
+    """Size in bytes of a blob payload, or of the JSON encoding of a document."""
+    if value is None:
+        return 0
+    if isinstance(value, (bytes, bytearray)):
+        return len(value)
+    if isinstance(value, str):
+        return len(value.encode("utf-8"))
+    return len(json.dumps(value, default=str, separators=(",", ":")).encode("utf-8"))
+
+
+def _aggregate(function, name, ms, attrs):
+    key = (function, name)
+    with _lock:
+        _windows[key].append(ms)
+        totals = _totals[key]
+        totals["count"] += 1
+        for attr in TOTALED:
+            if isinstance(attrs.get(attr), (int, float)):
+                totals[attr] += attrs[attr]
+        if attrs.get("error"):
+            totals["errors"] += 1
+
+
+@contextmanager
+def span(name, **attrs):
+    """Time the block as `name`; the yielded Span takes token counts, sizes and other attributes."""
+    current = Span(name, attrs)
+    parent = _parent.get()
+    token = _parent.set(name)
+    start = time.perf_counter()
+    try:
+        yield current
+    except BaseException as e:
+        current.attrs["error"] = type(e).__name__
+        raise
+    finally:
+        ms = round((time.perf_counter() - start) * 1000, 2)
+        _parent.reset(token)
+        trace = _trace.get()
+        _aggregate(trace.function if trace else "-", name, ms, current.attrs)
+        if trace is not None:
+            record = {"span": name, "ms": ms, **current.attrs}
+            if parent:
+                record["parent"] = parent
+            with trace.lock:
+                trace.spans.append(record)
+
+
+def count(name, n=1):
+    """Add n to the event counter `name` of the current invocation and of its function's totals."""
+    trace = _trace.get()
+    with _lock:
+        _counts[trace.function if trace else "-"][name] += n
+    if trace is not None:
+        with trace.lock:
+            trace.counts[name] += n
+
+
+def bind(func):
+    """func, running in the caller's trace when called from another thread (e.g. a pool worker)."""
+    trace, parent = _trace.get(), _parent.get()
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        tokens = _trace.set(trace), _parent.set(parent)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _trace.reset(tokens[0])
+            _parent.reset(tokens[1])
+    return wrapper
+
+
+def traced(func):
+    """Trace every invocation of a Cloud Function and log its spans as one structured record."""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        name = func.__name__
+        trace = _Trace(name)
+        token = _trace.set(trace)
+        error = None
+        start = time.perf_counter()
+        try:
+            result = func(*args, **kwargs)
+            # The callables report failures in the response rather than raising.
+            if isinstance(result, dict) and result.get("status") == "failed":
+                error = str(result.get("error"))
+            return result
+        except BaseException as e:
+            error = type(e).__name__
+            raise
+        finally:
+            ms = round((time.perf_counter() - start) * 1000, 2)
+            _aggregate(name, "total", ms, {"error": error})
+            # Still inside the trace, so the invocation's log level and sampling apply.
+            fields = {"metric": "spans", "function": name, "ms": ms, "error": error, "spans": trace.spans}
+            if trace.counts:
+                fields["counts"] = dict(trace.counts)
+            logger.info("spans", extra={"fields": fields})
+            _trace.reset(token)
+            with _lock:
+                _invocations[name] += 1
+                summarize = SUMMARY_EVERY and _invocations[name] % SUMMARY_EVERY == 0
+            if summarize:
+                logger.info("span_summary", extra={"fields": {"metric": "span_summary", "function": name,
+                                                              "spans": snapshot().get(name, {}),
+                                                              "counts": counters().get(name, {})}})
+    return wrapper
+
+
+def _percentile(ordered, pct):
+    return ordered[min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))]
+
+
+def snapshot():
+    """{function: {span: {n, p50_ms, p95_ms, p99_ms, max_ms, count, errors, bytes, ...}}} for this process.
+
+    Percentiles are over the last WINDOW samples; count and the attribute totals
+    cover everything since start (or reset()).
+    """
+    with _lock:
+        windows = {key: sorted(samples) for key, samples in _windows.items()}
+        totals = {key: dict(counter) for key, counter in _totals.items()}
+    view = defaultdict(dict)
+    for (function, name), ordered in windows.items():
+        view[function][name] = {
+            "n": len(ordered),
+            "p50_ms": _percentile(ordered, 50),
+            "p95_ms": _percentile(ordered, 95),
+            "p99_ms": _percentile(ordered, 99),
+            "max_ms": ordered[-1],
+            **totals[(function, name)],
+        }
+    return dict(view)
+
+
+def counters():
+    """{function: {event: count}} of everything count()ed since start (or reset())."""
+    with _lock:
+        return {function: dict(counter) for function, counter in _counts.items()}
+
+
+def reset():
+    with _lock:
+        _windows.clear()
+        _totals.clear()
+        _counts.clear()
+        _invocations.clear()
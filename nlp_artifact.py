@@ -0,0 +1,129 @@
+"""Prebuilt spaCy pipeline + phrase-matcher artifact for extract_resume_fields.
+
+Build it once at deploy time (it is not checked in):
+
+    python nlp_artifact.py build [--out nlp_artifact] [--model en_core_web_sm]
+
+The artifact holds a trimmed pipeline (tokenizer + sentence segmentation only),
+its vocab, and the education matcher pattern docs serialized as DocBins.
+init_services loads it directly instead of running the full en_core_web_sm
+pipeline over every pattern on each cold start, and falls back to the old path
+when the artifact is missing or stale.
+"""
+import argparse
+import json
+import logging
+import os
+import shutil
+
+from resume_patterns import MATCHER_PATTERNS, patterns_fingerprint
+
+logger = logging.getLogger('resume-parsing')
+
+ARTIFACT_VERSION = 2
+DEFAULT_MODEL = "en_core_web_sm"
+DEFAULT_ARTIFACT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "nlp_artifact")
+
+
+def artifact_dir():
+    return os.environ.get("NLP_ARTIFACT_DIR", DEFAULT_ARTIFACT_DIR)
+
+
+def build_matchers(nlp, pattern_docs=None):
+    from spacy.matcher import PhraseMatcher
+
+    matchers = {}
+    for name, (label, patterns) in MATCHER_PATTERNS.items():
+        matcher = PhraseMatcher(nlp.vocab)
+        # PhraseMatcher matches on ORTH, so the tokenizer alone produces equivalent patterns.
+        docs = pattern_docs[name] if pattern_docs else [nlp.make_doc(text) for text in patterns]
+        matcher.add(label, docs)
+        matchers[name] = matcher
+    return matchers
+
+
+def trimmed_pipeline(model=DEFAULT_MODEL):
+    import spacy
+
+    nlp = spacy.load(model)
+    # Only doc.sents and token text are used: keep the small statistical `senter`
+    # and drop the tagger, parser, attribute ruler, lemmatizer and NER.
+    for name in list(nlp.component_names):
+        if name not in ("senter", "tok2vec"):
+            nlp.remove_pipe(name)
+    if "tok2vec" in nlp.component_names and not nlp.get_pipe("tok2vec").listening_components:
+        nlp.remove_pipe("tok2vec")
+    if "senter" in nlp.component_names:
+        if "senter" in nlp.disabled:
+            nlp.enable_pipe("senter")
+    else:
+        nlp.add_pipe("sentencizer")
+    return nlp
+
+
+def build(out_dir=None, model=DEFAULT_MODEL):
+    import spacy
+    from spacy.tokens import DocBin
+
+    out_dir = out_dir or artifact_dir()
+    if os.path.exists(out_dir):
+        shutil.rmtree(out_dir)
+    os.makedirs(os.path.join(out_dir, "patterns"))
+
+    nlp = trimmed_pipeline(model)
+    for name, (_, patterns) in MATCHER_PATTERNS.items():
+        doc_bin = DocBin(attrs=["ORTH"])
+        for text in patterns:
+            doc_bin.add(nlp.make_doc(text))
+        doc_bin.to_disk(os.path.join(out_dir, "patterns", f"{name}.spacy"))
+    nlp.to_disk(os.path.join(out_dir, "pipeline"))
+
+    manifest = {
+        "artifact_version": ARTIFACT_VERSION,
+        "spacy_version": spacy.__version__,
+        "model": f"{nlp.meta.get('name')}-{nlp.meta.get('version')}",
+        "patterns": patterns_fingerprint(),
+        "components": nlp.pipe_names,
+    }
+    with open(os.path.join(out_dir, "manifest.json"), "w") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def load(path=None):
+    """Return (nlp, matchers) from a prebuilt artifact, or None if it is missing or stale."""
+    import spacy
+    from spacy.tokens import DocBin
+
+    path = path or artifact_dir()
+    manifest_path = os.path.join(path, "manifest.json")
+    if not os.path.exists(manifest_path):
+        logger.info(f"No prebuilt NLP artifact at {path}")
+        return None
+    with open(manifest_path) as f:
+        manifest = json.load(f)
+    if (manifest.get("artifact_version") != ARTIFACT_VERSION
+            or manifest.get("patterns") != patterns_fingerprint()
+            or manifest.get("spacy_version", "").split(".")[:2] != spacy.__version__.split(".")[:2]):
+        logger.warning(f"Ignoring stale NLP artifact at {path}: {manifest}")
+        return None
+
+    nlp = spacy.load(os.path.join(path, "pipeline"))
+    pattern_docs = {
+        name: list(DocBin().from_disk(os.path.join(path, "patterns", f"{name}.spacy")).get_docs(nlp.vocab))
+        for name in MATCHER_PATTERNS
+    }
+    return nlp, build_matchers(nlp, pattern_docs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=["build"])
+    parser.add_argument("--out", default=None, help="output directory (default: $NLP_ARTIFACT_DIR or ./nlp_artifact)")
+    parser.add_argument("--model", default=DEFAULT_MODEL)
+    args = parser.parse_args()
+    print(json.dumps(build(args.out, args.model), indent=2))
+
+
+if __name__ == "__main__":
+    main()
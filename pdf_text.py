@@ -0,0 +1,61 @@
+"""Embedded text-layer extraction for resume PDFs.
+
+Most uploads are generated by word processors and already carry a text layer,
+so OCR is only needed for pages that are scanned images. `page_texts` returns
+one entry per page: the page's text when its text layer is usable, or None when
+the page has to go through Vision.
+"""
+import io
+import os
+
+from startup_timing import timed
+
+# A page needs at least this many letters/digits in its text layer to skip OCR.
+MIN_PAGE_CHARS = int(os.environ.get("PDF_TEXT_MIN_CHARS", "50"))
+# Text layers with broken font encodings come out as (cid:NN) runs or U+FFFD.
+MAX_GARBAGE_RATIO = 0.1
+
+
+def usable(text):
+    if not text:
+        return False
+    stripped = "".join(text.split())
+    alnum = sum(ch.isalnum() for ch in stripped)
+    if alnum < MIN_PAGE_CHARS:
+        return False
+    garbage = stripped.count("\ufffd") + 4 * stripped.count("(cid:")
+    return garbage <= MAX_GARBAGE_RATIO * len(stripped)
+
+
+def page_texts(data):
+    """Per-page text layer of a PDF (None for pages that need OCR), or None if the PDF can't be read."""
+    with timed("pypdf"):
+        from pypdf import PdfReader
+        from pypdf.errors import PdfReadError
+
+    try:
+        reader = PdfReader(io.BytesIO(data))
+        if reader.is_encrypted and not reader.decrypt(""):
+            return None
+        pages = list(reader.pages)
+    except (PdfReadError, ValueError, KeyError, OSError):
+        return None
+
+    texts = []
+    for page in pages:
+        try:
+            text = page.extract_text()
+        except Exception:
+            # A single malformed page falls back to OCR instead of failing the document.
+            text = None
+        if usable(text):
+            # Vision page texts end with a newline; keep the joined text identical in shape.
+            texts.append(text if text.endswith("\n") else text + "\n")
+        else:
+            texts.append(None)
+    return texts
+
+
+def vision_output(texts):
+    """The minimal Vision output document read by vision_text (one response per page)."""
+    return {"responses": [{"fullTextAnnotation": {"text": text}} for text in texts]}
@@ -0,0 +1,104 @@
+"""Asyncio runner for a DAG of blocking stages, with per-stage progress for persisting and resuming.
+
+    stages = [Stage("upload", upload), Stage("parse", parse, after=("upload",)),
+              Stage("prefetch", prefetch, after=("upload",)), ...]
+    results, timings = asyncio.run(run_dag(stages, save, done={"upload"}))
+
+Each stage starts as soon as every stage in its `after` has completed, so
+independent stages overlap. Stage functions are ordinary blocking code (GCS,
+Firestore, OpenAI calls) and run in worker threads via asyncio.to_thread; they
+are called with the dict of results of the stages completed in this run.
+Stages in `done` were completed by an earlier run: they count as completed but
+are not run and have no result, so their dependents must read what they wrote.
+
+`save(name, fields)` is called (in a thread) when a stage starts, completes or
+fails, with {"status": "running" | "done" | "failed", "started", "ms", "error"}.
+After the first failure no new stage is started; stages already running are
+finished and recorded, then StageError is raised.
+"""
+import asyncio
+import time
+from collections import namedtuple
+from datetime import datetime
+
+import metrics
+
+Stage = namedtuple("Stage", ["name", "run", "after"], defaults=[()])
+
+
+class StageError(Exception):
+    def __init__(self, stage, error):
+        super().__init__(f"Stage {stage} failed: {error}")
+        self.stage = stage
+        self.error = error
+
+
+def validate(stages):
+    names = [stage.name for stage in stages]
+    if len(set(names)) != len(names):
+        raise ValueError(f"Duplicate stage names: {names}")
+    for stage in stages:
+        unknown = set(stage.after) - set(names)
+        if unknown:
+            raise ValueError(f"Stage {stage.name} depends on unknown stages {sorted(unknown)}")
+    # Kahn's algorithm: every stage must be reachable without a cycle.
+    remaining = {stage.name: set(stage.after) for stage in stages}
+    while remaining:
+        ready = [name for name, after in remaining.items() if not after]
+        if not ready:
+            raise ValueError(f"Stages {sorted(remaining)} form a cycle")
+        for name in ready:
+            del remaining[name]
+        for after in remaining.values():
+            after.difference_update(ready)
+
+
+def _run_stage(stage, results):
+    # In the worker thread, so the stage's own spans (to_thread copies the context) nest under it.
+    with metrics.span(f"stage.{stage.name}"):
+        return stage.run(results)
+
+
+async def run_dag(stages, save, done=()):
+    """Run the stages not in `done`; returns ({name: result}, {name: ms}) for the stages run."""
+    validate(stages)
+    completed = set(done)
+    results, timings = {}, {}
+    pending = [stage for stage in stages if stage.name not in completed]
+    running = {}
+    failure = None
+
+    async def run(stage):
+        await asyncio.to_thread(save, stage.name, {"status": "running", "error": None,
+                                                   "started": datetime.utcnow().isoformat()})
+        start = time.perf_counter()
+        try:
+            result = await asyncio.to_thread(_run_stage, stage, results)
+        except Exception as e:
+            timings[stage.name] = round((time.perf_counter() - start) * 1000, 1)
+            await asyncio.to_thread(save, stage.name, {"status": "failed", "ms": timings[stage.name],
+                                                       "error": str(e)})
+            raise
+        timings[stage.name] = round((time.perf_counter() - start) * 1000, 1)
+        await asyncio.to_thread(save, stage.name, {"status": "done", "ms": timings[stage.name]})
+        return result
+
+    while pending or running:
+        if failure is None:
+            ready = [stage for stage in pending if completed.issuperset(stage.after)]
+            for stage in ready:
+                pending.remove(stage)
+                running[asyncio.create_task(run(stage))] = stage
+        if not running:
+            break
+        finished, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+        for task in finished:
+            stage = running.pop(task)
+            if task.exception() is not None:
+                failure = failure or StageError(stage.name, task.exception())
+            else:
+                results[stage.name] = task.result()
+                completed.add(stage.name)
+    if failure is not None:
+        raise failure
+    return results, timings
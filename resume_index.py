@@ -0,0 +1,68 @@
+"""Per-user section index of the OCR resume text, built once per parsed output.
+
+`resume_index/{uid}` holds the text streamed out of output-1-to-1.json and its
+sections (resume_sections.segment) as offsets into that text, keyed on the
+output's content hash:
+
+    {"key": "md5:...", "version": "1", "text": "...", "chars": 5120,
+     "sections": [{"name": "experience", "heading": "WORK EXPERIENCE", "start": 128, "end": 940}, ...]}
+
+The extractors read the text from here instead of re-downloading and
+re-parsing the Vision JSON, and analyze_missing_skills reads individual
+sections. Text too large for a Firestore document is left out ("text": None)
+and read from the output file instead.
+"""
+from datetime import datetime
+
+import metrics
+import resume_sections
+
+COLLECTION = "resume_index"
+# Bump when segmentation changes, so existing indexes are rebuilt.
+INDEX_VERSION = "1"
+# Firestore documents are limited to 1 MiB.
+MAX_TEXT_BYTES = 900 * 1024
+
+
+def build(text, key):
+    sections = resume_sections.segment(text)
+    return {
+        "key": key,
+        "version": INDEX_VERSION,
+        "text": text if len(text.encode("utf-8")) <= MAX_TEXT_BYTES else None,
+        "chars": len(text),
+        "sections": [section._asdict() for section in sections],
+        "created_at": datetime.utcnow().isoformat(),
+    }
+
+
+def valid(index, key=None):
+    """The index if it is current (and for `key`, if given), else None."""
+    if not index or index.get("version") != INDEX_VERSION or (key is not None and index.get("key") != key):
+        return None
+    return index
+
+
+def load(db, uid, key=None):
+    """The stored index, or None if missing, built by an older version, or for other content."""
+    with metrics.span("firestore.get", collection=COLLECTION) as span:
+        snapshot = db.collection(COLLECTION).document(uid).get()
+        index = snapshot.to_dict() if snapshot.exists else None
+        span.set(bytes=metrics.payload_size(index))
+    return valid(index, key)
+
+
+def store(db, uid, index):
+    with metrics.span("firestore.set", collection=COLLECTION, bytes=metrics.payload_size(index)):
+        db.collection(COLLECTION).document(uid).set(index, merge=False)
+
+
+def sections(index):
+    return [resume_sections.Section(**section) for section in index.get("sections", [])]
+
+
+def section_text(index, names):
+    """Text of the named sections, in resume order ("" if the index has no text)."""
+    text = index.get("text") or ""
+    return "\n\n".join(text[section["start"]:section["end"]].strip()
+                       for section in index.get("sections", []) if section["name"] in names)
@@ -0,0 +1,29 @@
+"""Phrase patterns used by the spaCy matchers in extract_resume_fields.
+
+Skills, job titles and certifications are large alias-aware taxonomies and live
+in taxonomy/*.tsv instead (see taxonomy.py).
+"""
+import hashlib
+import json
+
+EDUCATION_LEVELS = [
+    "Bachelor", "Master", "PhD", "Associate", "Diploma", "B.S.", "M.S.", "MBA", "B.A.", "M.A."
+]
+
+EDUCATION_FIELDS = [
+    "Computer Science", "Engineering", "Information Technology", "Business Administration",
+    "Mathematics", "Physics", "Economics", "Electrical Engineering", "Mechanical Engineering",
+    "Data Science", "Software Engineering"
+]
+
+# matcher name -> (match label, patterns)
+MATCHER_PATTERNS = {
+    "education": ("EDUCATION_LEVEL", EDUCATION_LEVELS),
+    "field": ("EDUCATION_FIELD", EDUCATION_FIELDS),
+}
+
+
+def patterns_fingerprint():
+    # Stored in the prebuilt NLP artifact so a stale artifact is never loaded.
+    payload = json.dumps(MATCHER_PATTERNS, sort_keys=True).encode("utf-8")
+    return hashlib.sha256(payload).hexdigest()[:16]
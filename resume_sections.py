@@ -0,0 +1,93 @@
+"""Split OCR resume text into its sections (Experience, Education, Skills, ...).
+
+A section starts at a short line that is one of the usual resume headings
+("WORK EXPERIENCE", "Technical Skills:", "Education") and runs to the next
+heading; text before the first heading (name, contact line, often the current
+title) is the "header" section. Offsets index into the original text:
+
+    sections = segment(full_text)
+    # [Section(name="header", heading="", start=0, end=112),
+    #  Section(name="experience", heading="WORK EXPERIENCE", start=128, end=940), ...]
+
+`context_for` picks the sections an extractor needs for a set of fields, so an
+LLM is sent those instead of the whole resume.
+"""
+import os
+import re
+from collections import namedtuple
+
+from taxonomy import normalize
+
+Section = namedtuple("Section", ["name", "heading", "start", "end"])
+
+# Headings are matched on the whole (normalized) line, so body text mentioning "skills" isn't one.
+SECTION_HEADINGS = {
+    "summary": ("summary", "professional summary", "career summary", "profile", "professional profile",
+                "objective", "career objective", "about me"),
+    "experience": ("experience", "work experience", "professional experience", "relevant experience",
+                   "employment", "employment history", "work history", "career history", "internships",
+                   "internship"),
+    "education": ("education", "academic background", "academic qualifications", "educational qualifications",
+                  "qualifications", "academics", "education and training"),
+    "skills": ("skills", "technical skills", "key skills", "core skills", "skill set", "core competencies",
+               "competencies", "tools", "technologies", "tech stack", "skills and tools", "skills & tools",
+               "tools and technologies", "tools & technologies"),
+    "certifications": ("certifications", "certification", "certificates", "licenses and certifications",
+                       "licenses & certifications", "courses", "trainings", "training and certifications",
+                       "certifications and courses"),
+    "projects": ("projects", "key projects", "academic projects", "personal projects"),
+}
+_HEADINGS = {normalize(heading): name for name, headings in SECTION_HEADINGS.items() for heading in headings}
+_MAX_HEADING_CHARS = 40
+_LINE_RE = re.compile(r"[^\n]+")
+
+# Sections each extracted field is read from.
+FIELD_SECTIONS = {
+    "current_job_title": ("header", "summary", "experience"),
+    "years_of_experience": ("summary", "experience"),
+    "brief_description": ("summary", "experience", "projects"),
+    "key_skills_tools": ("skills",),
+    "highest_education": ("education",),
+    "certifications": ("certifications",),
+}
+
+# Per-section cap on what context_for sends, and the fallback when a field's sections are missing.
+SECTION_MAX_CHARS = int(os.environ.get("SECTION_MAX_CHARS", "3000"))
+FALLBACK_MAX_CHARS = int(os.environ.get("SECTION_FALLBACK_MAX_CHARS", "12000"))
+
+
+def heading_name(line):
+    """Section name if the line is a resume heading, else None."""
+    line = line.strip().rstrip(":-–—").strip()
+    if not line or len(line) > _MAX_HEADING_CHARS:
+        return None
+    return _HEADINGS.get(normalize(line))
+
+
+def segment(text):
+    """Sections of the text in order; a name repeats if its heading does ("Projects" twice)."""
+    sections = []
+    name, heading, start = "header", "", 0
+    for line in _LINE_RE.finditer(text):
+        found = heading_name(line.group(0))
+        if found is None:
+            continue
+        sections.append(Section(name, heading, start, line.start()))
+        name, heading, start = found, line.group(0).strip().rstrip(":").strip(), line.end()
+    sections.append(Section(name, heading, start, len(text)))
+    return [section for section in sections if text[section.start:section.end].strip()]
+
+
+def context_for(text, sections, fields, max_chars=None):
+    """Text of the sections the fields are read from, or the start of the whole text if any are missing."""
+    max_chars = max_chars or SECTION_MAX_CHARS
+    present = {section.name for section in sections}
+    if any(not present & set(FIELD_SECTIONS.get(field, ())) for field in fields):
+        return text[:FALLBACK_MAX_CHARS]
+    wanted = {name for field in fields for name in FIELD_SECTIONS[field]}
+    parts = []
+    for section in sections:
+        if section.name in wanted:
+            body = text[section.start:section.end].strip()[:max_chars]
+            parts.append(f"{section.heading}:\n{body}" if section.heading else body)
+    return "\n\n".join(parts)
@@ -0,0 +1,269 @@
+"""Local JD-vs-resume gap analysis for analyze_missing_skills.
+
+Both sides are normalized against the skill, soft-skill and certification
+taxonomies; what the taxonomies don't resolve is compared in one batch with
+character 3-gram TF-IDF vectors (a single matrix product of required items
+against resume items), so "ReactJS" matches "React" and "Postgres" matches
+"PostgreSQL". Qualification bullets are classified by rule: education level,
+years of experience, certifications, or skills. Only what none of that can
+classify is returned as `residual` for a small LLM call:
+
+    analysis, residual = analyze(jd_data, resume_data, taxonomies)
+    if residual:
+        apply_residual(analysis, llm_json)
+
+`analysis` has the skill_analysis schema the Flutter client reads:
+education_gap, high_priority_gaps, low_priority_gaps, technical_skills,
+soft_skills.
+"""
+import re
+
+from startup_timing import timed
+from taxonomy import normalize
+
+NO_EDUCATION_GAP = "No education gap"
+# Cosine similarity of 3-gram TF-IDF vectors above which two items are the same skill.
+FUZZY_THRESHOLD = 0.55
+NGRAM = 3
+
+_NOT_FOUND = {"", "not found", "none", "n/a"}
+_BULLET_RE = re.compile(r"^\s*(?:[-*•]|\d+[.)])\s*")
+# Leading/trailing filler around the skill itself in a JD bullet.
+_FILLER_RE = re.compile(
+    r"^(?:(?:strong|solid|good|excellent|deep|proven|hands-on|working|basic|advanced|in-depth)\s+)*"
+    r"(?:(?:knowledge|experience|proficiency|expertise|familiarity|understanding|skills?|ability)\s+"
+    r"(?:of|in|with|to)\s+)?|(?:\s+(?:skills?|experience|knowledge))$", re.IGNORECASE)
+_PRIORITY_LOW_RE = re.compile(r"\b(?:preferred|plus|nice[- ]to[- ]have|bonus|desirable|ideally|advantage)\b",
+                              re.IGNORECASE)
+_YEARS_RE = re.compile(r"(\d+(?:\.\d+)?)\s*\+?\s*(?:(?:-|to)\s*\d+(?:\.\d+)?\s*)?\+?\s*(?:years?|yrs)\b",
+                       re.IGNORECASE)
+_CERT_RE = re.compile(r"\bcertif", re.IGNORECASE)
+_RELATED_FIELD_RE = re.compile(r"\b(?:related|equivalent|similar)\b", re.IGNORECASE)
+_FIELD_RE = re.compile(r"\b(?:in|of)\s+([A-Za-z][A-Za-z &/,-]+)", re.IGNORECASE)
+# Highest level first; a bullet or resume entry gets the first level it mentions.
+_EDUCATION_LEVELS = [
+    (4, re.compile(r"\b(?:ph\.?\s?d|doctorate|doctoral)\b", re.IGNORECASE)),
+    (3, re.compile(r"\b(?:master'?s?|m\.?\s?tech|m\.?sc|m\.s\.|mba|mca|m\.e\.|post-?graduate)\b", re.IGNORECASE)),
+    (2, re.compile(r"\b(?:bachelor'?s?|b\.?\s?tech|b\.?sc|b\.s\.|b\.e\.|bca|undergraduate|degree)\b",
+                   re.IGNORECASE)),
+    (1, re.compile(r"\b(?:diploma|associate'?s?)\b", re.IGNORECASE)),
+]
+
+
+def bullets(value):
+    """JD sections come back either as lists or as "- item" text; return the items."""
+    if not value:
+        return []
+    lines = value if isinstance(value, list) else str(value).splitlines()
+    items = (_BULLET_RE.sub("", str(line)).strip() for line in lines)
+    return [item for item in items if item]
+
+
+def present(value):
+    return value is not None and str(value).strip().lower() not in _NOT_FOUND
+
+
+def skill_phrase(item):
+    """"Strong experience with Apache Airflow" -> "Apache Airflow"."""
+    head, colon, _ = item.partition(":")
+    phrase = head if colon and head.strip() else item
+    return _FILLER_RE.sub("", phrase.strip().rstrip(".")).strip()
+
+
+def education_level(text):
+    for level, pattern in _EDUCATION_LEVELS:
+        if pattern.search(text or ""):
+            return level
+    return 0
+
+
+def required_years(text):
+    match = _YEARS_RE.search(text or "")
+    return float(match.group(1)) if match else None
+
+
+def _ngrams(text):
+    padded = f" {normalize(text)} "
+    return [padded[i:i + NGRAM] for i in range(max(len(padded) - NGRAM + 1, 1))]
+
+
+def similarity(left, right):
+    """len(left) x len(right) cosine similarities of character n-gram TF-IDF vectors."""
+    with timed("numpy"):
+        import numpy as np
+
+    if not left or not right:
+        return np.zeros((len(left), len(right)))
+    docs = [_ngrams(text) for text in (*left, *right)]
+    vocabulary = {}
+    rows, cols = [], []
+    for row, grams in enumerate(docs):
+        for gram in grams:
+            rows.append(row)
+            cols.append(vocabulary.setdefault(gram, len(vocabulary)))
+    counts = np.zeros((len(docs), len(vocabulary)))
+    np.add.at(counts, (rows, cols), 1.0)
+    document_frequency = (counts > 0).sum(axis=0)
+    vectors = counts * (np.log((1 + len(docs)) / (1 + document_frequency)) + 1)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors[:len(left)] @ vectors[len(left):].T
+
+
+def _canonical_items(taxonomy, items):
+    # Canonical names for a list of free-text items: exact lookup, else terms found inside the item.
+    found = []
+    for item in items:
+        canonical = taxonomy.canonical(item)
+        found.extend([canonical] if canonical else taxonomy.find_canonical(item))
+    return list(dict.fromkeys(found))
+
+
+def _missing(required, have, surfaces):
+    """Required names neither in `have` nor close to any resume surface form."""
+    missing = [name for name in required if name not in have]
+    if not missing or not surfaces:
+        return missing
+    scores = similarity(missing, surfaces)
+    # A surface naming only some of a skill's words ("React" for "React Native") shares most of
+    # its n-grams but is a different skill; only whole-token matches are left to the score.
+    surface_tokens = [set(normalize(surface).split()) for surface in surfaces]
+    for row, name in enumerate(missing):
+        tokens = set(normalize(name).split())
+        for col, other in enumerate(surface_tokens):
+            if other < tokens:
+                scores[row, col] = 0.0
+    return [name for name, best in zip(missing, scores.max(axis=1)) if best < FUZZY_THRESHOLD]
+
+
+def _gap(requirement, resume_value=None):
+    if present(resume_value):
+        return f"JD requires: {requirement}; Resume has: {resume_value}"
+    return f"JD requires: {requirement}; Not found in resume"
+
+
+def _education_gap(requirement, education):
+    required = education_level(requirement)
+    if not present(education):
+        return _gap(requirement)
+    if education_level(education) < required:
+        return _gap(requirement, education)
+    if _RELATED_FIELD_RE.search(requirement):
+        return None
+    field = _FIELD_RE.search(requirement)
+    have = _FIELD_RE.search(education)
+    if field and have and similarity([field.group(1)], [have.group(1)])[0, 0] < FUZZY_THRESHOLD:
+        return _gap(requirement, education)
+    return None
+
+
+def _without(taxonomy, text):
+    # Blank out the taxonomy's matches, so "AWS Certified Developer" doesn't also require "AWS".
+    for match in reversed(taxonomy.find(text)):
+        text = text[:match.start] + " " + text[match.end:]
+    return text
+
+
+def analyze(jd_data, resume_data, taxonomies, resume_text=""):
+    """Return (analysis, residual); residual items are the JD text the rules couldn't classify.
+
+    `resume_text` is optional extra resume text (e.g. sections from resume_index) searched for
+    skills, soft skills and certifications besides the extracted fields.
+    """
+    skills, soft, certs = taxonomies["skills"], taxonomies["soft_skills"], taxonomies["certifications"]
+
+    resume_skills = [item for item in resume_data.get("key_skills_tools") or [] if present(item)]
+    resume_certs = [item for item in resume_data.get("certifications") or [] if present(item)]
+    resume_prose = " ".join(str(resume_data.get(field, "")) for field in ("current_job_title", "brief_description"))
+    resume_prose = f"{resume_prose}\n{resume_text}" if resume_text else resume_prose
+    education = resume_data.get("highest_education")
+    years = required_years(str(resume_data.get("years_of_experience", "")))
+    surfaces = resume_skills + resume_certs
+
+    have_skills = set(_canonical_items(skills, resume_skills)) | set(skills.find_canonical(resume_prose))
+    have_soft = set(_canonical_items(soft, resume_skills)) | set(soft.find_canonical(resume_prose))
+    have_certs = set(_canonical_items(certs, resume_certs)) | set(certs.find_canonical(resume_prose))
+
+    skill_items = bullets(jd_data.get("skills"))
+    qualification_items = bullets(jd_data.get("qualifications"))
+    duty_items = bullets(jd_data.get("responsibilities"))
+
+    required_skills, required_soft, unknown_phrases = [], [], []
+    for item in skill_items + qualification_items + duty_items:
+        item = _without(certs, item)
+        required_skills.extend(skills.find_canonical(item))
+        required_soft.extend(soft.find_canonical(item))
+    for item in skill_items:
+        if not skills.find_canonical(item) and not soft.find_canonical(item) and not certs.find_canonical(item):
+            unknown_phrases.append(skill_phrase(item))
+
+    analysis = {
+        "education_gap": NO_EDUCATION_GAP,
+        "high_priority_gaps": [],
+        "low_priority_gaps": [],
+        "technical_skills": _missing(list(dict.fromkeys(required_skills)), have_skills, surfaces),
+        "soft_skills": [name for name in dict.fromkeys(required_soft) if name not in have_soft],
+    }
+    residual = []
+
+    for item in qualification_items:
+        gaps = analysis["low_priority_gaps" if _PRIORITY_LOW_RE.search(item) else "high_priority_gaps"]
+        classified = False
+        if education_level(item):
+            classified = True
+            gap = _education_gap(item, education)
+            if gap and analysis["education_gap"] == NO_EDUCATION_GAP:
+                analysis["education_gap"] = gap
+        needed_years = required_years(item)
+        if needed_years is not None:
+            classified = True
+            if years is None or years < needed_years:
+                gaps.append(_gap(item, resume_data.get("years_of_experience")))
+        required_certs = certs.find_canonical(item)
+        if required_certs:
+            classified = True
+            gaps.extend(_gap(name) for name in _missing(required_certs, have_certs, resume_certs))
+        elif _CERT_RE.search(item):
+            residual.append(item)
+            continue
+        if skills.find_canonical(item) or soft.find_canonical(item):
+            classified = True  # its skills are already in technical_skills / soft_skills
+        if not classified:
+            residual.append(item)
+
+    # Unknown skill phrases are only residual if nothing on the resume resembles them.
+    phrases = [phrase for phrase in dict.fromkeys(unknown_phrases) if phrase]
+    residual.extend(_missing(phrases, set(), surfaces))
+    return analysis, residual
+
+
+def residual_prompt(residual, resume_data):
+    items = "\n".join(f"- {item}" for item in residual)
+    return f"""
+        Compare these job requirements with the resume below. For each requirement the resume does not meet, put it in exactly one list:
+        - "high_priority_gaps": critical non-skill requirements, as "JD requires: ...; Not found in resume"
+        - "low_priority_gaps": nice-to-have non-skill requirements, in the same form
+        - "technical_skills": missing tools, technologies or specific expertise (short skill names)
+        - "soft_skills": missing interpersonal or behavioral skills (short skill names)
+        Leave out requirements the resume meets. Return only a JSON object with those four lists.
+
+        Requirements:
+        {items}
+
+        Resume:
+        Job Title: {resume_data.get('current_job_title', '')}
+        Experience: {resume_data.get('years_of_experience', '')}
+        Description: {resume_data.get('brief_description', '')}
+        Skills: {', '.join(resume_data.get('key_skills_tools') or [])}
+        Education: {resume_data.get('highest_education', '')}
+        Certifications: {', '.join(resume_data.get('certifications') or [])}
+        """
+
+
+def apply_residual(analysis, classified):
+    """Merge the LLM's classification of the residual items into the local analysis."""
+    for field in ("high_priority_gaps", "low_priority_gaps", "technical_skills", "soft_skills"):
+        extra = classified.get(field) or []
+        if isinstance(extra, str):
+            extra = [extra]
+        analysis[field] = list(dict.fromkeys([*analysis[field], *(str(item) for item in extra)]))
+    return analysis
@@ -0,0 +1,97 @@
+"""Cold-start accounting for the Cloud Functions in main.py.
+
+Heavy SDKs are imported lazily inside the functions that need them. Every lazy
+import or client init is wrapped in `timed(name)` so the first invocation on a
+fresh instance can report where its cold-start time went.
+"""
+import functools
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger('resume-parsing')
+
+# SDKs (in import order) that each entry point pulls in on a cold start.
+FUNCTION_DEPENDENCIES = {
+    "upload_resume": ["google.cloud.storage"],
+    "parse_resume_by_vision": ["firebase_admin", "google.cloud.storage", "pypdf", "google.cloud.vision_v1"],
+    "extract_resume_fields": ["firebase_admin", "google.cloud.storage", "spacy"],
+    "extract_resume_openai": ["firebase_admin", "google.cloud.storage", "openai"],
+    "extract_resume_hybrid": ["firebase_admin", "google.cloud.storage", "spacy", "openai"],
+    "generate_jd": ["firebase_admin", "openai"],
+    "analyze_missing_skills": ["firebase_admin", "numpy", "openai"],
+    "search_courses": ["firebase_admin", "openai"],
+    "run_career_pipeline": ["firebase_admin", "google.cloud.storage", "pypdf", "google.cloud.vision_v1", "spacy",
+                            "numpy", "openai"],
+    # Gemini is only imported on the fallback path (see course_scheduler.py).
+    "schedule_and_block_courses": ["firebase_admin"],
+    "on_resume_storage_event": ["firebase_admin", "google.cloud.storage", "pypdf", "google.cloud.vision_v1", "spacy"],
+}
+
+# Budget (ms) for imports + client init on a cold start, per entry point.
+COLD_START_BUDGETS_MS = {
+    "upload_resume": 1000,
+    "parse_resume_by_vision": 2500,
+    "extract_resume_fields": 6000,
+    "extract_resume_openai": 2500,
+    "extract_resume_hybrid": 6500,
+    "generate_jd": 2000,
+    "analyze_missing_skills": 2000,
+    "search_courses": 2000,
+    "run_career_pipeline": 7000,
+    "schedule_and_block_courses": 1500,
+    "on_resume_storage_event": 6000,
+}
+
+_timings = {}
+_reported = set()
+_lock = threading.Lock()
+
+
+@contextmanager
+def timed(name):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        with _lock:
+            # Only the first (cold) occurrence is interesting.
+            _timings.setdefault(name, round(elapsed_ms, 1))
+
+
+def timings():
+    with _lock:
+        return dict(_timings)
+
+
+def report(function_name):
+    entries = timings()
+    total_ms = round(sum(entries.values()), 1)
+    budget_ms = COLD_START_BUDGETS_MS.get(function_name)
+    return {
+        "function": function_name,
+        "timings_ms": entries,
+        "total_ms": total_ms,
+        "budget_ms": budget_ms,
+        "within_budget": budget_ms is None or total_ms <= budget_ms,
+    }
+
+
+def track_cold_start(func):
+    """Log the startup report once per instance, after the first invocation."""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        try:
+            return func(*args, **kwargs)
+        finally:
+            name = func.__name__
+            with _lock:
+                first = name not in _reported
+                _reported.add(name)
+            if first:
+                result = report(name)
+                log = logger.info if result["within_budget"] else logger.warning
+                log(f"Cold start report: {result}")
+    return wrapper
@@ -0,0 +1,218 @@
+"""Structured, sampled, non-blocking logging for the Cloud Functions.
+
+    logger = structured_logging.configure('resume-parsing')
+
+Request threads only put records on a bounded queue; one listener thread formats
+them as Cloud Logging JSON lines on stderr, {"severity", "message", "time",
+"function", ...} plus the fields passed as extra={"fields": {...}}. A slow log
+pipe never blocks a request: when the queue is full the record is dropped and
+counted, and the count is logged once there is room again.
+
+On the request thread (cheap checks, before anything is queued):
+    LOG_LEVEL, LOG_LEVELS            default level, and per-function levels, e.g.
+                                     LOG_LEVELS="extract_resume_openai=DEBUG,search_courses=WARNING"
+    LOG_SAMPLE_RATE, LOG_SAMPLE_RATES  share of invocations whose records below WARNING
+                                     are kept (default 1), e.g. LOG_SAMPLE_RATES="generate_jd=0.1";
+                                     decided once per invocation, so a sampled request logs completely
+On the listener thread:
+    LOG_MAX_CHARS                    messages (and tracebacks) are cut to this many characters
+    redaction                        e-mail addresses, phone numbers, API keys, bearer tokens
+                                     and JWTs are masked in messages and tracebacks
+
+"function" is the traced Cloud Function the record was logged from
+(metrics.current_function()). Large payloads (model responses) are logged at
+DEBUG with %-style arguments, so they cost nothing unless a function's level is
+DEBUG. Resume text is never logged, only its length; the model's resume-field
+responses are logged only with LOG_RESUME_DATA=1 as well, since redaction
+doesn't catch names or addresses. LOG_ASYNC=0 formats and writes on the calling
+thread instead, e.g. when debugging locally.
+"""
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import re
+import sys
+from datetime import datetime, timezone
+
+import metrics
+
+
+def _parse_map(spec, convert):
+    # "name=value,name=value"
+    entries = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        name, _, value = item.partition("=")
+        entries[name.strip()] = convert(value.strip())
+    return entries
+
+
+def _level(name):
+    level = logging.getLevelName(name.upper())
+    if not isinstance(level, int):
+        raise ValueError(f"Unknown log level '{name}'")
+    return level
+
+
+DEFAULT_LEVEL = _level(os.environ.get("LOG_LEVEL", "INFO"))
+FUNCTION_LEVELS = _parse_map(os.environ.get("LOG_LEVELS", ""), _level)
+SAMPLE_RATE = float(os.environ.get("LOG_SAMPLE_RATE", "1"))
+SAMPLE_RATES = _parse_map(os.environ.get("LOG_SAMPLE_RATES", ""), float)
+MAX_CHARS = int(os.environ.get("LOG_MAX_CHARS", "2000"))
+QUEUE_SIZE = int(os.environ.get("LOG_QUEUE_SIZE", "10000"))
+ASYNC = os.environ.get("LOG_ASYNC", "1") == "1"
+LOG_RESUME_DATA = os.environ.get("LOG_RESUME_DATA", "0") == "1"
+
+_REDACTIONS = [
+    (re.compile(r"\b(?:sk-[A-Za-z0-9_-]{16,}|AIza[0-9A-Za-z_-]{30,})"), "[REDACTED_KEY]"),
+    (re.compile(r"\beyJ[A-Za-z0-9_-]+\.[A-Za-z0-9_-]+\.[A-Za-z0-9_-]+"), "[REDACTED_JWT]"),
+    (re.compile(r"(?i)\bbearer\s+[A-Za-z0-9._~+/=-]+"), "Bearer [REDACTED]"),
+    (re.compile(r"[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}"), "[REDACTED_EMAIL]"),
+]
+# +91 98765 43210, (555) 123-4567, 9876543210: 10-12 digits (13 with a country code),
+# which leaves dates, durations, blob generations and epoch times alone.
+_PHONE_CANDIDATE = re.compile(r"(?<![\w.])\+?\(?\d[\d ().-]{8,}\d(?!\w|\.\d)")
+_DATE = re.compile(r"\d{4}-\d{2}-\d{2}")
+
+
+def _phone(match):
+    text = match.group(0)
+    digits = sum(c.isdigit() for c in text)
+    if 10 <= digits <= (13 if text.startswith("+") else 12) and not _DATE.search(text):
+        return "[REDACTED_PHONE]"
+    return text
+
+
+def redact(text):
+    for pattern, replacement in _REDACTIONS:
+        text = pattern.sub(replacement, text)
+    return _PHONE_CANDIDATE.sub(_phone, text)
+
+
+def _cap(text, max_chars):
+    if len(text) <= max_chars:
+        return text
+    return f"{text[:max_chars]}... [{len(text) - max_chars} chars truncated]"
+
+
+class RequestFilter(logging.Filter):
+    """Per-function level and per-invocation sampling; stamps record.function."""
+
+    def __init__(self, level=DEFAULT_LEVEL, levels=None, sample_rate=SAMPLE_RATE, sample_rates=None):
+        super().__init__()
+        self.level = level
+        self.levels = FUNCTION_LEVELS if levels is None else levels
+        self.sample_rate = sample_rate
+        self.sample_rates = SAMPLE_RATES if sample_rates is None else sample_rates
+
+    def minimum_level(self):
+        return min([self.level, *self.levels.values()])
+
+    def filter(self, record):
+        function = metrics.current_function()
+        record.function = function
+        if record.levelno < self.levels.get(function, self.level):
+            return False
+        if record.levelno >= logging.WARNING:
+            return True
+        rate = self.sample_rates.get(function, self.sample_rate)
+        if rate >= 1:
+            return True
+        trace_id = metrics.current_trace_id()
+        if trace_id is None:
+            return random.random() < rate
+        return trace_id % 10000 < rate * 10000
+
+
+class JsonFormatter(logging.Formatter):
+    """One Cloud Logging JSON line per record, redacted and size-capped."""
+
+    def __init__(self, max_chars=MAX_CHARS):
+        super().__init__()
+        self.max_chars = max_chars
+
+    def format(self, record):
+        entry = {
+            "severity": record.levelname,
+            "message": _cap(redact(record.getMessage()), self.max_chars),
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "logger": record.name,
+        }
+        function = getattr(record, "function", None)
+        if function:
+            entry["function"] = function
+        if record.exc_info:
+            entry["exception"] = _cap(redact(self.formatException(record.exc_info)), self.max_chars)
+        fields = getattr(record, "fields", None)
+        if fields:
+            entry.update(fields)
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that never blocks the caller and leaves formatting to the listener.
+
+    Records stay in this process, so they are queued as they are (the base class
+    formats them first to make them picklable). A full queue drops the record.
+    """
+
+    def __init__(self, maxsize=QUEUE_SIZE):
+        super().__init__(queue.Queue(maxsize))
+        self.dropped = 0
+        self._reported = 0
+
+    def prepare(self, record):
+        return record
+
+    def enqueue(self, record):
+        # Called under the handler's lock.
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+            return
+        if self.dropped > self._reported:
+            try:
+                self.queue.put_nowait(logging.makeLogRecord({
+                    "name": record.name, "levelno": logging.WARNING, "levelname": "WARNING",
+                    "msg": f"Dropped {self.dropped - self._reported} log records (queue full)"}))
+                self._reported = self.dropped
+            except queue.Full:
+                pass
+
+
+def build_handler(stream=None, asynchronous=ASYNC, request_filter=None, max_chars=MAX_CHARS,
+                  queue_size=QUEUE_SIZE):
+    """(handler to attach to a logger, QueueListener or None); the listener is already started."""
+    output = logging.StreamHandler(stream or sys.stderr)
+    output.setFormatter(JsonFormatter(max_chars))
+    listener = None
+    if asynchronous:
+        handler = DroppingQueueHandler(queue_size)
+        listener = logging.handlers.QueueListener(handler.queue, output)
+        listener.start()
+    else:
+        handler = output
+    handler.addFilter(request_filter or RequestFilter())
+    return handler, listener
+
+
+_configured = {}
+
+
+def configure(name):
+    """The named logger with one structured handler; records still queued at exit are written then."""
+    logger = logging.getLogger(name)
+    if name in _configured:
+        return logger
+    request_filter = RequestFilter()
+    handler, listener = build_handler(request_filter=request_filter)
+    logger.setLevel(request_filter.minimum_level())
+    logger.addHandler(handler)
+    if listener is not None:
+        atexit.register(listener.stop)
+    _configured[name] = (handler, listener)
+    return logger
@@ -0,0 +1,242 @@
+"""File-backed skill / job-title / certification taxonomies and a one-pass multi-pattern matcher.
+
+Taxonomy files are TSV (optionally gzipped), one canonical term per line with
+`|`-separated aliases and, optionally, the `|`-separated surfaces that only match
+with exactly that capitalization; blank lines and `#` comments are ignored:
+
+    Kubernetes<TAB>k8s|kube
+    Node.js<TAB>Node|NodeJS<TAB>Node
+    Swift<TAB><TAB>Swift
+
+Everything else matches regardless of case, so "python" and "kubernetes" in
+prose are found, while ordinary words that are also skill names ("swift",
+"rust", "a node") are not taken for the skill.
+
+Matching is Aho-Corasick over word tokens rather than characters: patterns and
+text go through the same tokenizer and case folding, so one left-to-right pass
+over the text finds every term with word boundaries for free. The automaton has
+one node per distinct token prefix instead of per character, so memory grows
+with the taxonomy and match time with the text only (benchmarks/bench_taxonomy.py).
+Case-sensitive surfaces share those nodes and are checked against the original
+text only when they match.
+"""
+import functools
+import gzip
+import hashlib
+import os
+import re
+from array import array
+from collections import namedtuple
+
+DEFAULT_TAXONOMY_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "taxonomy")
+
+# Words, with internal '.'/'-' joins ("node.js", "e-commerce") and trailing '+'/'#'
+# ("c++", "c#", "security+"); any other non-space character is its own token.
+_TOKEN_RE = re.compile(r"\w+(?:[.\-]\w+)*[+#]*|[^\w\s]")
+
+Match = namedtuple("Match", ["canonical", "text", "start", "end"])
+
+
+def taxonomy_dir():
+    return os.environ.get("TAXONOMY_DIR", DEFAULT_TAXONOMY_DIR)
+
+
+def tokenize(text):
+    """Yield (normalized token, start, end) with offsets into the original text."""
+    for m in _TOKEN_RE.finditer(text):
+        yield m.group(0).casefold(), m.start(), m.end()
+
+
+def normalize(text):
+    return " ".join(token for token, _, _ in tokenize(text))
+
+
+class TermMatcher:
+    """Token-level Aho-Corasick automaton over the surface forms of a taxonomy."""
+
+    def __init__(self):
+        self._token_ids = {}
+        # Per-node state; the int columns are typed arrays to keep large taxonomies compact.
+        self._goto = [None]             # node -> {token_id: child} (None for leaves)
+        self._fail = array("i", [0])
+        self._depth = array("i", [0])
+        self._term = array("i", [-1])      # node -> term id ending exactly here, or -1
+        self._out_link = array("i", [0])   # node -> nearest proper suffix node with a term (0 = none)
+        self._terms = []          # term id -> canonical name
+        self._cased = {}          # node -> {exact token tuple} when only those spellings match
+        self._compiled = False
+
+    def __len__(self):
+        return len(self._terms)
+
+    def add(self, surface, canonical, cased=False):
+        tokens = [token for token, _, _ in tokenize(surface)]
+        if not tokens:
+            return
+        node = 0
+        for token in tokens:
+            token_id = self._token_ids.setdefault(token, len(self._token_ids))
+            children = self._goto[node]
+            if children is None:
+                children = self._goto[node] = {}
+            child = children.get(token_id)
+            if child is None:
+                child = len(self._goto)
+                children[token_id] = child
+                self._goto.append(None)
+                self._fail.append(0)
+                self._depth.append(self._depth[node] + 1)
+                self._term.append(-1)
+                self._out_link.append(0)
+            node = child
+        if self._term[node] == -1:
+            self._term[node] = len(self._terms)
+            self._terms.append(canonical)
+            if cased:
+                self._cased[node] = set()
+        if node in self._cased:
+            if cased:
+                self._cased[node].add(tuple(_TOKEN_RE.findall(surface)))
+            else:
+                del self._cased[node]  # a case-insensitive surface for the same tokens wins
+        self._compiled = False
+
+    def compile(self):
+        # Breadth-first failure links, as in the classic construction.
+        goto, fail, term, out_link = self._goto, self._fail, self._term, self._out_link
+        queue = []
+        for child in (goto[0] or {}).values():
+            fail[child] = 0
+            queue.append(child)
+        head = 0
+        while head < len(queue):
+            node = queue[head]
+            head += 1
+            for token_id, child in (goto[node] or {}).items():
+                queue.append(child)
+                state = fail[node]
+                while state and token_id not in (goto[state] or ()):
+                    state = fail[state]
+                target = (goto[state] or {}).get(token_id, 0)
+                fail[child] = target if target != child else 0
+                out_link[child] = fail[child] if term[fail[child]] != -1 else out_link[fail[child]]
+        self._compiled = True
+
+    def find_all(self, text, overlapping=False):
+        """Return Match tuples in text order.
+
+        By default overlapping matches are resolved leftmost-longest, so
+        "Senior Software Engineer" does not also report "Software Engineer".
+        """
+        if not self._compiled:
+            self.compile()
+        goto, fail, term, out_link, depth = self._goto, self._fail, self._term, self._out_link, self._depth
+        token_ids, cased = self._token_ids, self._cased
+        starts, ends = [], []
+        found = []
+        node = 0
+        for index, (token, start, end) in enumerate(tokenize(text)):
+            starts.append(start)
+            ends.append(end)
+            token_id = token_ids.get(token)
+            if token_id is None:
+                node = 0
+                continue
+            while node and token_id not in (goto[node] or ()):
+                node = fail[node]
+            node = (goto[node] or {}).get(token_id, 0)
+            hit = node if term[node] != -1 else out_link[node]
+            while hit:
+                first = index - depth[hit] + 1
+                if hit not in cased or tuple(text[starts[i]:ends[i]] for i in range(first, index + 1)) in cased[hit]:
+                    found.append((starts[first], end, term[hit]))
+                hit = out_link[hit]
+        if not overlapping:
+            found = _leftmost_longest(found)
+        else:
+            found.sort()
+        return [Match(self._terms[t], text[s:e], s, e) for s, e, t in found]
+
+
+def _leftmost_longest(spans):
+    spans.sort(key=lambda span: (span[0], -span[1]))
+    kept = []
+    last_end = -1
+    for start, end, term_id in spans:
+        if start >= last_end:
+            kept.append((start, end, term_id))
+            last_end = end
+    return kept
+
+
+class Taxonomy:
+    def __init__(self, name, entries=()):
+        self.name = name
+        self.matcher = TermMatcher()
+        self._canonical = {}
+        for canonical, aliases in entries:
+            self.add(canonical, aliases)
+
+    def __len__(self):
+        return len(set(self._canonical.values()))
+
+    def add(self, canonical, aliases=(), cased=()):
+        for surface in (canonical, *aliases):
+            self.matcher.add(surface, canonical, cased=surface in cased)
+            self._canonical.setdefault(normalize(surface), canonical)
+
+    def canonical(self, term):
+        """Exact (normalized) lookup of a term or alias; None if unknown."""
+        return self._canonical.get(normalize(term))
+
+    def find(self, text):
+        return self.matcher.find_all(text)
+
+    def find_canonical(self, text):
+        """Distinct canonical names found in text, in order of first occurrence."""
+        return list(dict.fromkeys(match.canonical for match in self.find(text)))
+
+    @classmethod
+    def from_file(cls, path, name=None):
+        taxonomy = cls(name or os.path.basename(path).split(".")[0])
+        opener = gzip.open if path.endswith(".gz") else open
+        with opener(path, "rt", encoding="utf-8") as f:
+            for line in f:
+                line = line.rstrip("\n")
+                if not line.strip() or line.lstrip().startswith("#"):
+                    continue
+                canonical, _, rest = line.partition("\t")
+                aliases, _, cased = rest.partition("\t")
+                taxonomy.add(canonical.strip(), _surfaces(aliases), _surfaces(cased))
+        taxonomy.matcher.compile()
+        return taxonomy
+
+
+def _surfaces(column):
+    return [surface.strip() for surface in column.split("|") if surface.strip()]
+
+
+DEFAULT_NAMES = ("skills", "job_titles", "certifications")
+
+
+def taxonomy_path(name, directory=None):
+    directory = directory or taxonomy_dir()
+    for suffix in (".tsv", ".tsv.gz"):
+        path = os.path.join(directory, name + suffix)
+        if os.path.exists(path):
+            return path
+    raise FileNotFoundError(f"Taxonomy '{name}' not found in {directory}")
+
+
+def load_taxonomies(names=DEFAULT_NAMES, directory=None):
+    return {name: Taxonomy.from_file(taxonomy_path(name, directory), name) for name in names}
+
+
+@functools.lru_cache(maxsize=None)
+def fingerprint(names=DEFAULT_NAMES, directory=None):
+    """Hash of the taxonomy files' contents; cached results keyed on it go stale when they change."""
+    digest = hashlib.sha256()
+    for name in names:
+        with open(taxonomy_path(name, directory), "rb") as f:
+            digest.update(name.encode("utf-8") + b"\0" + f.read())
+    return digest.hexdigest()[:16]
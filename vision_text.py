@@ -0,0 +1,126 @@
+"""Streaming extraction of `responses[*].fullTextAnnotation.text` from Vision output JSON.
+
+A Vision DOCUMENT_TEXT_DETECTION output file is dominated by per-page, block,
+paragraph, word and symbol geometry, and the functions only need the page
+texts. This scanner reads the document in chunks straight from the blob
+stream and tracks just enough structure (container stack + current key) to
+recognize the target strings. Nothing else is decoded or kept, so memory
+stays at roughly one read chunk plus the longest string.
+"""
+import codecs
+import json
+import re
+
+# Structural characters outside strings; literals and numbers are never needed.
+_STRUCT = re.compile(r'["{}\[\]:,]')
+# Remainder of a JSON string after its opening quote (unrolled to avoid per-char backtracking).
+_STRING_TAIL = re.compile(r'[^"\\]*(?:\\.[^"\\]*)*"', re.DOTALL)
+
+DEFAULT_CHUNK_SIZE = 256 * 1024
+# Containers off the target path (geometry, words, symbols, ...) are skipped by running the
+# C JSON decoder over at most this many characters; larger ones are walked token by token
+# until their children are small enough. Bounds both the wasted work and transient memory.
+SKIP_WINDOW = 16 * 1024
+
+_decoder = json.JSONDecoder()
+
+
+def _is_target(stack):
+    # {"responses": [ {"fullTextAnnotation": {"text": <here>}} ]}
+    return (len(stack) == 4
+            and stack[0][1] == "responses"
+            and not stack[1][0]
+            and stack[2][1] == "fullTextAnnotation"
+            and stack[3][0] and stack[3][1] == "text")
+
+
+def _on_target_path(stack, is_object):
+    # Could a container opened here (at depth len(stack)) contain the target string?
+    depth = len(stack)
+    if depth == 0:
+        return True
+    if depth == 1:
+        return not is_object and stack[0][1] == "responses"
+    if depth == 2:
+        return is_object
+    if depth == 3:
+        return is_object and stack[2][1] == "fullTextAnnotation"
+    return False
+
+
+def iter_full_texts(stream, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Yield each response's fullTextAnnotation.text, in document order, from a binary stream."""
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    buf = ""
+    pos = 0
+    eof = False
+    read_size = chunk_size
+    # One entry per open container: [is_object, current_key, expecting_key]
+    stack = []
+
+    while True:
+        m = _STRUCT.search(buf, pos)
+        tail = None
+        if m is not None and m.group() == '"':
+            tail = _STRING_TAIL.match(buf, m.end())
+        if m is None or (m.group() == '"' and tail is None):
+            if eof:
+                if m is not None:
+                    raise ValueError("Truncated Vision output: unterminated string")
+                break
+            # Keep an incomplete string for the next read; everything before it is consumed.
+            buf = buf[m.start():] if m is not None else ""
+            pos = 0
+            data = stream.read(read_size)
+            if not data:
+                eof = True
+                buf += decoder.decode(b"", final=True)
+            else:
+                buf += decoder.decode(data)
+            # Grow reads only while the same string still spans the whole buffer.
+            read_size = min(read_size * 2, 16 * chunk_size) if m is not None and m.start() == 0 else chunk_size
+            continue
+
+        start = m.start()
+        if tail is not None:
+            end = tail.end()
+            top = stack[-1] if stack else None
+            if top is not None and top[0] and top[2]:
+                raw = buf[start + 1:end - 1]
+                top[1] = json.loads(buf[start:end]) if "\\" in raw else raw
+            elif _is_target(stack):
+                yield json.loads(buf[start:end])
+            pos = end
+            continue
+
+        char = m.group()
+        if char == "{" or char == "[":
+            if not _on_target_path(stack, char == "{"):
+                try:
+                    _, length = _decoder.raw_decode(buf[start:start + SKIP_WINDOW])
+                    pos = start + length
+                    continue
+                except ValueError:
+                    pass
+            stack.append([char == "{", None, char == "{"])
+        elif char == "}" or char == "]":
+            stack.pop()
+        elif char == ":":
+            stack[-1][2] = False
+        elif stack and stack[-1][0]:  # "," inside an object: a key comes next
+            stack[-1][2] = True
+        pos = start + 1
+
+
+def join_pages(texts):
+    # Page texts normally end with a newline already; make sure pages never run together.
+    parts = []
+    for text in texts:
+        if parts and not parts[-1].endswith("\n"):
+            parts.append("\n")
+        parts.append(text)
+    return "".join(parts)
+
+
+def read_full_text(stream, chunk_size=DEFAULT_CHUNK_SIZE):
+    return join_pages(iter_full_texts(stream, chunk_size))